@@ -1,31 +1,85 @@
 # app/api/endpoints/agent.py
 from fastapi import APIRouter, Depends, HTTPException, Body, status, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
-from typing import Dict, Any, Optional, List
+from pydantic import ValidationError
+from typing import Dict, Any, Optional, List, Iterator
 import os
 import json
+import orjson
 import uuid
+import time
+import queue
 import logging
+import threading
+from copy import deepcopy
 from datetime import datetime
 from pathlib import Path
 
-from app.db.base import get_db
-from app.db.schemas import AnalysisCreate, AnalysisResponse, AgentResponse, UsageCreate
+from app.db.base import get_db, SessionLocal
+from app.db.checkpointer import SQLCheckpointSaver
+from app.db.store import SQLStore
+from app.db.schemas import AnalysisCreate, AnalysisResponse, AgentResponse, AgentBudgets, UsageCreate, JobCreate, JobResponse
 from app.db import crud
+from app.db.models import AgentJob
+from app.services.access_tracker import file_access_tracker
+from app.services.job_queue import JobQueue
+from app.services.usage_recorder import usage_recorder
 from src.agent.graph import ScienceAgent
+from src.agent.budget import budget_report, estimate_cost
+from src.agent.agent import report_tool_call
+from src.agent.schemas import REPORT_FIELDS, REPORT_TEMPLATE, repair_report
+from src.helpers.json_extract import extract_json_object
+from src.helpers.log_sampling import SampledLogger
+from src.openai_tool.provider import get_provider_metrics
+from src.telemetry import registry
+from src.helpers.artifacts import artifact_url, publish_plot
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+# Full agent states are only logged at DEBUG, and then only for a sample of requests
+sampled_logger = SampledLogger(logger)
 
-# Initialize the agent
-science_agent = ScienceAgent()
+# Initialize the agent with durable conversation state. Checkpoints and the store
+# live in the database so any worker process can continue any thread.
+checkpointer = SQLCheckpointSaver(SessionLocal)
+_science_agent: Optional[ScienceAgent] = None
+_science_agent_lock = threading.Lock()
 
+def get_science_agent() -> ScienceAgent:
+    """The shared agent, whose graph is compiled on first use rather than at import."""
+    global _science_agent
+    if _science_agent is None:
+        with _science_agent_lock:
+            if _science_agent is None:
+                _science_agent = ScienceAgent(checkpointer=checkpointer, store=SQLStore(SessionLocal))
+    return _science_agent
 
 
-def save_usage_data(run_id: str, usage_metadata: Dict[str, Any], analysis_id: Optional[int], db: Session):
-    """Save token usage data to database."""
+
+def parse_budgets(request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate the token, cost and step budgets of a request body.
+    
+    Raises:
+        HTTPException: 422 when a budget is not a number or is negative
+    """
+    try:
+        budgets = AgentBudgets.model_validate({name: request_data.get(name) for name in AgentBudgets.model_fields})
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[
+                {**error, "loc": ["body", *error["loc"]]}
+                for error in e.errors(include_url=False, include_context=False)
+            ]
+        )
+    return budgets.model_dump()
+
+
+def save_usage_data(run_id: str, usage_metadata: Dict[str, Any], analysis_id: Optional[int] = None):
+    """Queue token usage data for the batched usage writer (see app/services/usage_recorder.py)."""
     if not usage_metadata:
         return
     
@@ -36,140 +90,146 @@ def save_usage_data(run_id: str, usage_metadata: Dict[str, Any], analysis_id: Op
             input_tokens=usage_metadata.get("input_tokens", 0),
             output_tokens=usage_metadata.get("output_tokens", 0),
             total_tokens=usage_metadata.get("total_tokens", 0),
-            model_name=usage_metadata.get("model_name", None)
+            cached_tokens=usage_metadata.get("cached_tokens"),
+            model_name=usage_metadata.get("model_name", None),
+            cost=usage_metadata.get("cost"),
+            llm_latency_ms=usage_metadata.get("llm_latency_ms"),
+            steps=usage_metadata.get("steps"),
+            token_budget=usage_metadata.get("token_budget"),
+            cost_budget=usage_metadata.get("cost_budget"),
+            step_budget=usage_metadata.get("step_budget"),
+            budget_exhausted=usage_metadata.get("budget_exhausted", False)
         )
         
-        crud.create_usage(db, usage_create)
-    except OperationalError as e:
+        usage_recorder.record(usage_create)
+    except ValueError as e:
         # Log the error but don't fail the whole request
-        logger.error(f"Failed to save usage data: {str(e)}")
-        if "no such table: usages" in str(e):
-            logger.error("The 'usages' table does not exist. Please run database migrations.")
+        logger.error(f"Failed to record usage data: {str(e)}")
 
 
 def extract_final_result(agent_result):
     """
     Extract the final structured result from the agent output.
-    Handles various formats including JSON enclosed in code blocks.
+    
+    The validated AgentReport stored by the graph is used when present. Otherwise the
+    last AgentReport tool call or the last AI message is searched for a JSON object
+    with the tolerant single-pass extractor (handles prose and code fences).
     """
-    import json
-    import re
+    if not isinstance(agent_result, dict):
+        return None
     
-    # If agent_result is already a dict with a 'messages' key, extract the messages
-    messages = agent_result.get('messages', []) if isinstance(agent_result, dict) else []
+    if agent_result.get("final_report"):
+        return agent_result["final_report"]
     
     # Find the last AI message in the list
-    ai_messages = [msg for msg in messages if hasattr(msg, 'content') and getattr(msg, 'type', None) != 'tool']
-    
-    # If no AI messages found, return None
+    messages = agent_result.get('messages', [])
+    ai_messages = [msg for msg in messages if getattr(msg, 'type', None) == 'ai']
     if not ai_messages:
         return None
     
-    # Get the content of the last AI message
-    last_message_content = ai_messages[-1].content if ai_messages else None
+    # A report that failed validation still carries its arguments
+    report_call = report_tool_call(ai_messages[-1])
+    if report_call:
+        return report_call["args"]
     
-    if not last_message_content:
+    content = ai_messages[-1].content
+    if not isinstance(content, str) or not content:
         return None
     
-    # Try to extract JSON from the message content
-    # First check if content is enclosed in code block with json formatter
-    json_code_pattern = r'```(?:json)?\s*([\s\S]*?)\s*```'
-    match = re.search(json_code_pattern, last_message_content)
-    
-    if match:
-        # Extract the content from the code block
-        extracted_content = match.group(1).strip()
-        # Make sure it starts with a curly brace (JSON object)
-        if extracted_content.startswith('{'):
-            json_str = extracted_content
-        else:
-            # If it doesn't start with {, try to find JSON object within the extracted content
-            json_obj_match = re.search(r'(\{[\s\S]*\})', extracted_content)
-            json_str = json_obj_match.group(1) if json_obj_match else extracted_content
-    else:
-        # If no code block found, try to extract the entire JSON object from the content
-        json_pattern = r'(\{[\s\S]*?\})(?:\s*$|\s*[^}])'
-        match = re.search(json_pattern, last_message_content)
-        if match:
-            json_str = match.group(1)
-        else:
-            # Last resort: try to find any JSON object in the content
-            json_str = last_message_content
-    
-    # Debug print
-    print(f"Attempting to parse JSON: {json_str[:100]}...")
-    
-    # Try to parse the extracted content as JSON
+    result = extract_json_object(content, REPORT_FIELDS)
+    if result is None:
+        print("All JSON extraction attempts failed")
+    return result
+
+
+def new_turn_messages(messages: List[Any]) -> List[Any]:
+    """Messages produced since the last human message (the current conversation turn)."""
+    for index in range(len(messages) - 1, -1, -1):
+        if getattr(messages[index], "type", None) == "human":
+            return messages[index:]
+    return messages
+
+
+def prune_checkpoints(thread_id: str):
+    """Prune old checkpoints of the thread and expired threads."""
     try:
-        parsed_json = json.loads(json_str)
-        
-        # Verify it has the expected structure (for validation)
-        required_fields = ['action_plan', 'decisions_and_justifications', 'observations', 
-                         'visualizations', 'summary', 'next_steps', 'conclusion']
-        
-        # Check if the parsed JSON has the required fields
-        missing_fields = [field for field in required_fields if field not in parsed_json]
-        if missing_fields:
-            print(f"Parsed JSON is missing required fields: {missing_fields}")
-            # Try to extract a more complete JSON object
-            complete_json_pattern = r'(\{[\s\S]*?"conclusion"[\s\S]*?\})'
-            match = re.search(complete_json_pattern, last_message_content)
-            if match:
-                try:
-                    complete_json = json.loads(match.group(1))
-                    return complete_json
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse complete JSON: {str(e)}")
-        
-        return parsed_json
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error: {str(e)}")
-        
-        # Cleanup the JSON string and try again
-        try:
-            # Fix common JSON syntax issues
-            cleaned_json_str = json_str.replace("'", "\"")  # Replace single quotes with double quotes
-            cleaned_json_str = re.sub(r',(\s*[\]}])', r'\1', cleaned_json_str)  # Remove trailing commas
-            parsed_json = json.loads(cleaned_json_str)
-            return parsed_json
-        except json.JSONDecodeError:
-            pass
-        
-        # As a final fallback, try to find any complete JSON structure in the entire message
-        try:
-            # This pattern looks for a complete JSON object with all required fields
-            complete_pattern = r'\{[\s\S]*?"action_plan"[\s\S]*?"decisions_and_justifications"[\s\S]*?"observations"[\s\S]*?"visualizations"[\s\S]*?"summary"[\s\S]*?"next_steps"[\s\S]*?"conclusion"[\s\S]*?\}'
-            match = re.search(complete_pattern, last_message_content)
-            if match:
-                try:
-                    return json.loads(match.group(0))
-                except json.JSONDecodeError:
-                    pass
-            
-            # If we still can't find a complete JSON, look for any JSON objects and check if they're valid
-            json_candidates = re.findall(r'(\{[\s\S]*?\})', last_message_content)
-            for candidate in sorted(json_candidates, key=len, reverse=True):  # Try the longest candidates first
-                try:
-                    result = json.loads(candidate)
-                    # Check if it has at least some of the required fields
-                    if isinstance(result, dict) and any(field in result for field in required_fields):
-                        return result
-                except json.JSONDecodeError:
-                    continue
-        except Exception as e:
-            print(f"Error in fallback JSON extraction: {str(e)}")
+        checkpointer.prune(thread_id)
+        checkpointer.prune_expired()
+    except OperationalError as e:
+        logger.error(f"Failed to prune checkpoints: {str(e)}")
+
+
+def plot_web_path(path: str) -> str:
+    """Convert a plot file path to the URL it is served under."""
+    # Plots are served as content-addressed artifacts with immutable caching
+    artifact = publish_plot(path)
+    if artifact:
+        return artifact_url(artifact)
+    # If path starts with physical directory, convert to web path
+    if path.startswith("src/data/"):
+        return path.replace("src/data/", "/data/")
+    # If path already starts with /data, keep it as is
+    if path.startswith("/data/"):
+        return path
+    # Otherwise, assume it's a relative path and make it absolute
+    return f"/data/uploads/graphs/{os.path.basename(path)}"
+
+
+def build_agent_response(agent_result: Dict[str, Any], thread_id: str) -> Dict[str, Any]:
+    """Build the API response from the final agent state."""
+    # Extract the final structured result from agent output
+    result = extract_final_result(agent_result)
+    
+    if result:
+        # A report forced by an exhausted budget or extracted from text may miss
+        # fields or have invalid ones; those get the template values
+        result = repair_report(result)
+    else:
+        # If no structured result was found, use the default template
+        result = deepcopy(REPORT_TEMPLATE)
         
-        print("All JSON extraction attempts failed")
-        return None
+        # Check if there are any plot paths in agent_result
+        if "plot_paths" in agent_result and agent_result["plot_paths"]:
+            result["visualizations"] = []
+            for i, path in enumerate(agent_result["plot_paths"]):
+                result["visualizations"].append({
+                    "path": plot_web_path(path),
+                    "description": f"Generated visualization {i+1}",
+                    "key_insights": ["Visualization generated from analysis"]
+                })
+    
+    # Fix: Update visualizations paths if they exist in the result
+    if "visualizations" in result and result["visualizations"]:
+        for viz in result["visualizations"]:
+            if not viz.get("path"):
+                continue
+            artifact = publish_plot(viz["path"])
+            if artifact:
+                viz["path"] = artifact_url(artifact)
+            elif viz["path"].startswith("src/data/"):
+                viz["path"] = viz["path"].replace("src/data/", "/data/")
+    
+    # Report budget consumption alongside the result
+    result["budget"] = budget_report(
+        agent_result.get("budget"),
+        agent_result.get("usage"),
+        agent_result.get("budget_exhausted")
+    )
+    # The thread can be continued with /api/agent/continue
+    result["thread_id"] = thread_id
+    return result
 
 
 def extract_usage_metadata(agent_result: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract token usage metadata from agent messages."""
+    """Extract token usage, cost and budget metadata from agent messages."""
     total_usage = {
         "input_tokens": 0,
         "output_tokens": 0,
         "total_tokens": 0,
-        "model_name": None
+        "cached_tokens": 0,
+        "model_name": None,
+        "cost": 0.0,
+        "steps": 0
     }
     
     # Extract usage from all AI messages
@@ -181,17 +241,35 @@ def extract_usage_metadata(agent_result: Dict[str, Any]) -> Dict[str, Any]:
                     total_usage["input_tokens"] += usage.get("input_tokens", 0)
                     total_usage["output_tokens"] += usage.get("output_tokens", 0)
                     total_usage["total_tokens"] += usage.get("total_tokens", 0)
+                    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read") or 0
+                    total_usage["cached_tokens"] += cached_tokens
+                    total_usage["steps"] += 1
                     # Get model name from the last message with a model name
+                    model_name = None
                     if hasattr(message, "response_metadata") and message.response_metadata:
                         model_name = message.response_metadata.get("model_name")
                         if model_name:
                             total_usage["model_name"] = model_name
+                    total_usage["cost"] += estimate_cost(
+                        model_name, usage.get("input_tokens", 0), usage.get("output_tokens", 0), cached_tokens
+                    )
+    
+    # Time spent waiting on the model this turn (tracked by the graph)
+    total_usage["llm_latency_ms"] = (agent_result.get("usage") or {}).get("llm_ms")
+    
+    # Budget limits of the run
+    budget = agent_result.get("budget") or {}
+    total_usage["token_budget"] = budget.get("token_budget")
+    total_usage["cost_budget"] = budget.get("cost_budget")
+    total_usage["step_budget"] = budget.get("step_budget")
+    total_usage["budget_exhausted"] = bool(agent_result.get("budget_exhausted"))
     
     return total_usage
 
 
+# Plain def: the agent run and the session calls block, so they run in the threadpool
 @router.post("/run", response_model=AgentResponse)
-async def run_agent(
+def run_agent(
     background_tasks: BackgroundTasks,
     request_data: Dict[str, Any] = Body(...),
     file_id: Optional[int] = None,
@@ -204,6 +282,7 @@ async def run_agent(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Query is required"
         )
+    budgets = parse_budgets(request_data)
     
     # Create an analysis record if file_id is provided
     analysis_id = None
@@ -215,6 +294,7 @@ async def run_agent(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="File not found"
             )
+        file_access_tracker.record(file_id)
         
         # Create analysis record
         analysis = crud.create_analysis(
@@ -230,65 +310,22 @@ async def run_agent(
     # Run the agent
     thread_id = f"science-session-{uuid.uuid4()}"
     try:
-        agent_result = science_agent.run(query, thread_id)
-        print(f"Agent result: {agent_result}")
-        
-        # Extract the final structured result from agent output
-        result = extract_final_result(agent_result)
+        agent_result = get_science_agent().run(
+            query,
+            thread_id,
+            **budgets
+        )
+        sampled_logger.debug("Agent result: %s", agent_result)
         
-        if not result:
-            # If no structured result was found, use a default template
-            result = {
-                "action_plan": [
-                    {"step": 1, "description": "Process didnt complete"},
-                ],
-                "decisions_and_justifications": [
-                    {"decision": "None",
-                     "justification": "None",
-                      "tool_used": "None"}
-                ],
-                "observations": ["Analysis Failed"],
-                "visualizations": [],
-                "summary": "Analysis wasnt completed.",
-                "next_steps": ["None"],
-                "conclusion": "Agent run failed or didnt complete."
-            }
-            
-            # Check if there are any plot paths in agent_result
-            if "plot_paths" in agent_result and agent_result["plot_paths"]:
-                result["visualizations"] = []
-                for i, path in enumerate(agent_result["plot_paths"]):
-                    # If path starts with physical directory, convert to web path
-                    if path.startswith("src/data/"):
-                        web_path = path.replace("src/data/", "/data/")
-                    # If path already starts with /data, keep it as is
-                    elif path.startswith("/data/"):
-                        web_path = path
-                    # Otherwise, assume it's a relative path and make it absolute
-                    else:
-                        web_path = f"/data/uploads/graphs/{os.path.basename(path)}"
-                        
-                    result["visualizations"].append({
-                        "path": web_path,
-                        "description": f"Generated visualization {i+1}",
-                        "key_insights": ["Visualization generated from analysis"]
-                    })
+        result = build_agent_response(agent_result, thread_id)
         
         # Extract usage metadata
         usage_metadata = extract_usage_metadata(agent_result)
         
-        # Try to save usage data, but don't fail the request if it doesn't work
-        try:
-            background_tasks.add_task(save_usage_data, thread_id, usage_metadata, analysis_id, db)
-        except Exception as e:
-            logger.error(f"Failed to queue usage data task: {str(e)}")
+        save_usage_data(thread_id, usage_metadata, analysis_id)
         
-        # Fix: Update visualizations paths if they exist in the result
-        if "visualizations" in result and result["visualizations"]:
-            for viz in result["visualizations"]:
-                if "path" in viz and viz["path"].startswith("src/data/"):
-                    viz["path"] = viz["path"].replace("src/data/", "/data/")
-        print("final result:", result)
+        background_tasks.add_task(prune_checkpoints, thread_id)
+        sampled_logger.debug("Final result: %s", result)
         return result
         
     
@@ -297,4 +334,376 @@ async def run_agent(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Agent execution failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/continue", response_model=AgentResponse)
+def continue_agent(
+    background_tasks: BackgroundTasks,
+    request_data: Dict[str, Any] = Body(...),
+    db: Session = Depends(get_db)
+):
+    """Continue an existing conversation thread from its saved state."""
+    query = request_data.get("query")
+    thread_id = request_data.get("thread_id")
+    if not query or not thread_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Query and thread_id are required"
+        )
+    budgets = parse_budgets(request_data)
+    
+    if not get_science_agent().get_conversation_history(thread_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation thread not found"
+        )
+    
+    try:
+        agent_result = get_science_agent().continue_conversation(
+            query,
+            thread_id,
+            **budgets
+        )
+        result = build_agent_response(agent_result, thread_id)
+        
+        # Usage of this turn only; earlier turns were recorded when they ran
+        usage_metadata = extract_usage_metadata({**agent_result, "messages": new_turn_messages(agent_result["messages"])})
+        save_usage_data(thread_id, usage_metadata)
+        background_tasks.add_task(prune_checkpoints, thread_id)
+        return result
+    except Exception as e:
+        print(f"Agent continuation failed with error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Agent execution failed: {str(e)}"
+        )
+
+
+def run_agent_job(job: AgentJob) -> Dict[str, Any]:
+    """Execute a queued agent job and record its usage. Used by the job queue workers."""
+    options = json.loads(job.payload or "{}")
+    budgets = {
+        "token_budget": options.get("token_budget"),
+        "cost_budget": options.get("cost_budget"),
+        "step_budget": options.get("step_budget")
+    }
+    if job.kind == "continue":
+        agent_result = get_science_agent().continue_conversation(job.query, job.thread_id, **budgets)
+        usage_messages = new_turn_messages(agent_result["messages"])
+    else:
+        agent_result = get_science_agent().run(job.query, job.thread_id, **budgets)
+        usage_messages = agent_result["messages"]
+    result = build_agent_response(agent_result, job.thread_id)
+    
+    save_usage_data(job.thread_id, extract_usage_metadata({**agent_result, "messages": usage_messages}))
+    prune_checkpoints(job.thread_id)
+    return result
+
+
+# Started and stopped with the application (see app.main)
+job_queue = JobQueue(SessionLocal, run_agent_job)
+
+
+def job_queue_samples():
+    """Job queue gauges and counters as /metrics rows (see src/telemetry/metrics.py)."""
+    snapshot = job_queue.metrics()
+    depth = {(("priority", priority),): count for priority, count in snapshot["queue_depth_by_priority"].items()}
+    yield "sciencebridge_job_queue_depth", "gauge", "Queued agent jobs by priority", depth or {(): 0}
+    yield "sciencebridge_jobs_running", "gauge", "Agent jobs running in this process", {(): snapshot["running"]}
+    yield "sciencebridge_jobs_finished_total", "counter", "Agent jobs finished in this process", {
+        (("status", "succeeded"),): snapshot["succeeded"],
+        (("status", "failed"),): snapshot["failed"]
+    }
+
+
+registry.register_collector(job_queue_samples)
+
+
+def job_response(db: Session, job: AgentJob) -> Dict[str, Any]:
+    response = JobResponse.model_validate(job).model_dump(mode="json")
+    response["queue_position"] = crud.get_queue_position(db, job)
+    return response
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def submit_agent_job(job_request: JobCreate, db: Session = Depends(get_db)):
+    """
+    Queue an agent run (or a continuation of an existing thread) and return immediately.
+    
+    Poll GET /jobs/{job_id} for status and GET /jobs/{job_id}/result for the agent response.
+    Jobs with a higher priority run first.
+    """
+    if job_request.kind not in ("run", "continue"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="kind must be 'run' or 'continue'"
+        )
+    if not job_request.query.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Query is required"
+        )
+    if job_request.kind == "continue":
+        if not job_request.thread_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="thread_id is required to continue a conversation"
+            )
+        if not get_science_agent().get_conversation_history(job_request.thread_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation thread not found"
+            )
+        thread_id = job_request.thread_id
+    else:
+        thread_id = f"science-session-{uuid.uuid4()}"
+    
+    job = job_queue.submit(
+        job_request.kind,
+        job_request.query,
+        thread_id,
+        priority=job_request.priority,
+        options={
+            "token_budget": job_request.token_budget,
+            "cost_budget": job_request.cost_budget,
+            "step_budget": job_request.step_budget
+        }
+    )
+    return job_response(db, job)
+
+
+@router.get("/jobs/metrics")
+def agent_job_metrics():
+    """Get job queue metrics: depth per priority, running jobs, and wait and run times."""
+    return job_queue.metrics()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_agent_job(job_id: str, db: Session = Depends(get_db)):
+    """Get the status of a queued agent job."""
+    job = crud.get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job_response(db, job)
+
+
+@router.get("/jobs/{job_id}/result", response_model=AgentResponse)
+def get_agent_job_result(job_id: str, db: Session = Depends(get_db)):
+    """
+    Get the agent response of a finished job.
+    
+    Returns 202 with the job status while the job is queued or running.
+    """
+    job = crud.get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    if job.status in ("queued", "running"):
+        return ORJSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job_response(db, job), headers={"Retry-After": "5"})
+    if job.status == "cancelled":
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Job was cancelled"
+        )
+    if job.status == "failed":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Agent execution failed: {job.error}"
+        )
+    return orjson.loads(job.result)
+
+
+@router.delete("/jobs/{job_id}")
+def cancel_agent_job(job_id: str, db: Session = Depends(get_db)):
+    """Cancel a job that has not started running yet."""
+    job = crud.get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    if not crud.cancel_job(db, job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is already {job.status}"
+        )
+    return {"status": "success", "message": "Job cancelled successfully"}
+
+
+@router.get("/threads/{thread_id}/history")
+def get_thread_history(thread_id: str):
+    """Get the saved message history of a conversation thread."""
+    messages = get_science_agent().get_conversation_history(thread_id)
+    if not messages:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation thread not found"
+        )
+    return {
+        "thread_id": thread_id,
+        "messages": [
+            {"type": message.type, "content": message.content}
+            for message in messages
+        ]
+    }
+
+
+@router.get("/provider/metrics")
+def provider_metrics():
+    """Get OpenAI provider metrics: retries, throttling and rate limiter wait time."""
+    return get_provider_metrics()
+
+
+# Seconds without agent progress before a keep-alive comment is sent
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+def dump_event_json(data: Any) -> str:
+    """Serialize event data with orjson; values it cannot encode are sent as strings."""
+    return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def format_stream_event(event: str, data: Dict[str, Any], ndjson: bool = False) -> str:
+    """Format one progress event as SSE or as an NDJSON line."""
+    if ndjson:
+        return dump_event_json({"event": event, "data": data}) + "\n"
+    return f"event: {event}\ndata: {dump_event_json(data)}\n\n"
+
+
+def agent_progress_events(agent_updates: Iterator, thread_id: str, final: Dict[str, Any]) -> Iterator[tuple]:
+    """
+    Turn LangGraph (mode, chunk) stream items into progress events.
+    
+    Args:
+        agent_updates: Iterator from ScienceAgent.stream_run with stream_mode=["updates", "values"]
+        thread_id: The conversation thread of the run
+        final: Dict that receives the final state under "state"
+    
+    Yields:
+        (event, data) tuples
+    """
+    node_started = time.perf_counter()
+    tool_started: Dict[str, float] = {}
+    plots_seen = 0
+    
+    for mode, chunk in agent_updates:
+        now = time.perf_counter()
+        
+        if mode == "values":
+            final["state"] = chunk
+            plot_paths = chunk.get("plot_paths") or []
+            for path in plot_paths[plots_seen:]:
+                yield "plot", {"path": path, "url": plot_web_path(path)}
+            plots_seen = len(plot_paths)
+            continue
+        
+        for node, update in chunk.items():
+            yield "node", {"node": node, "duration_ms": round((now - node_started) * 1000, 1)}
+            node_started = now
+            
+            for message in (update or {}).get("messages", []):
+                if node == "agent":
+                    yield "tokens", {
+                        "step": (message.usage_metadata or {}),
+                        "run": update.get("usage")
+                    }
+                    for tc in getattr(message, "tool_calls", None) or []:
+                        tool_started[tc["id"]] = now
+                        yield "tool_start", {"id": tc["id"], "name": tc["name"], "args": tc["args"]}
+                elif node in ("tools", "finalize"):
+                    started = tool_started.pop(message.tool_call_id, now)
+                    yield "tool_end", {
+                        "id": message.tool_call_id,
+                        "name": message.name,
+                        "status": getattr(message, "status", "success"),
+                        "duration_ms": round((now - started) * 1000, 1)
+                    }
+    
+    if final.get("state") is not None:
+        yield "result", build_agent_response(final["state"], thread_id)
+
+
+@router.post("/stream")
+async def stream_agent(
+    request_data: Dict[str, Any] = Body(...),
+    format: str = "sse"
+):
+    """
+    Run the science agent and stream progress as server-sent events (or NDJSON with format=ndjson).
+    
+    Events: start, node, tokens, tool_start, tool_end, plot, result, error, end.
+    The run stops at the next agent update when the client disconnects.
+    """
+    query = request_data.get("query")
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Query is required"
+        )
+    budgets = parse_budgets(request_data)
+    
+    ndjson = format == "ndjson"
+    thread_id = f"science-session-{uuid.uuid4()}"
+    final: Dict[str, Any] = {}
+    events: queue.Queue = queue.Queue()
+    # Set when the client goes away, so the run stops instead of spending tokens
+    stop = threading.Event()
+    
+    def produce():
+        # Run the agent in its own thread so keep-alives can be sent while it works
+        updates = None
+        try:
+            updates = get_science_agent().stream_run(
+                query,
+                thread_id,
+                **budgets,
+                stream_mode=["updates", "values"]
+            )
+            for event in agent_progress_events(updates, thread_id, final):
+                if stop.is_set():
+                    logger.info(f"Client disconnected, stopping streaming run {thread_id}")
+                    break
+                events.put(event)
+        except Exception as e:
+            logger.error(f"Streaming agent run failed: {str(e)}")
+            events.put(("error", {"detail": f"Agent execution failed: {str(e)}"}))
+        finally:
+            if updates is not None:
+                updates.close()
+            events.put(None)
+            # Recorded here rather than in a response background task, which runs
+            # before the run has finished (or not at all) when the client disconnects
+            if final.get("state") is not None:
+                save_usage_data(thread_id, extract_usage_metadata(final["state"]))
+                prune_checkpoints(thread_id)
+    
+    def event_stream() -> Iterator[str]:
+        yield format_stream_event("start", {"thread_id": thread_id}, ndjson)
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                try:
+                    item = events.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield "\n" if ndjson else ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    break
+                yield format_stream_event(item[0], item[1], ndjson)
+        except GeneratorExit:
+            # The response was abandoned (client disconnect)
+            stop.set()
+            raise
+        yield format_stream_event("end", {"thread_id": thread_id}, ndjson)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson" if ndjson else "text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,59 @@
+# app/api/endpoints/artifacts.py
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from typing import Optional
+import os
+
+from src.helpers.artifacts import THUMBNAIL_WIDTHS, artifact_path, thumbnail_path
+
+router = APIRouter()
+
+# Artifact URLs change whenever their content does, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak validators (W/"...") match too: If-None-Match uses weak comparison
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+@router.get("/{name}")
+def get_artifact(name: str, request: Request, w: Optional[int] = None):
+    """
+    Serve a content-addressed artifact (plot) by name ("<sha256>.png").
+
+    The ETag is the content hash, and responses are cacheable forever. Pass w (one of
+    THUMBNAIL_WIDTHS) for a thumbnail rendered on first request and kept on disk.
+    """
+    path = artifact_path(name)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Artifact not found"
+        )
+    if w is not None and w not in THUMBNAIL_WIDTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Thumbnail width must be one of {', '.join(map(str, THUMBNAIL_WIDTHS))}"
+        )
+
+    digest = name.split(".", 1)[0]
+    etag = f'"{digest}"' if w is None else f'"{digest}-w{w}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if w is not None:
+        path = thumbnail_path(name, w)
+        if path is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Thumbnails are only available for images"
+            )
+    return FileResponse(path, headers=headers)
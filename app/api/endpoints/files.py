@@ -1,16 +1,18 @@
 # app/api/endpoints/files.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File as FastAPIFile, Form, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File as FastAPIFile, Form, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 import os
 import shutil
 from pathlib import Path
 
 from app.db.base import get_db
 from app.db.models import File
-from app.db.schemas import FileCreate, FileResponse, FileUpdate
+from app.db.schemas import FileCreate, FileListItem, FileResponse, FileUpdate
 from app.db import crud
+from app.services.access_tracker import file_access_tracker
 
 router = APIRouter()
 
@@ -19,7 +21,7 @@ UPLOAD_DIR = "src/data/uploads"
 Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
 
 @router.post("/", response_model=FileResponse, status_code=status.HTTP_201_CREATED)
-async def upload_file(
+def upload_file(
     file: UploadFile = FastAPIFile(...),
     description: Optional[str] = Form(None),
     db: Session = Depends(get_db)
@@ -55,7 +57,8 @@ async def upload_file(
     
     try:
         db_file = crud.create_file(db, file_create, file, file_path)
-        return FileResponse.from_orm(db_file)
+        # Validated straight from the ORM object by the response model
+        return db_file
     except Exception as e:
         # Clean up file if database operation fails
         if os.path.exists(file_path):
@@ -65,14 +68,43 @@ async def upload_file(
             detail=f"Failed to record file: {str(e)}"
         )
 
-@router.get("/", response_model=List[FileResponse])
+@router.get("/", response_model=List[FileListItem])
 def get_files(
-    skip: int = 0, 
-    limit: int = 100, 
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    file_type: Optional[str] = None,
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
     db: Session = Depends(get_db)
 ):
-    """Get all files with pagination."""
-    files = crud.get_files(db, skip=skip, limit=limit)
+    """
+    List files, newest first.
+
+    Pass the X-Next-Cursor header of a page as cursor to get the next one (the
+    header is absent on the last page). X-Total-Count holds the number of files
+    (of file_type) unless a date filter is given.
+    """
+    try:
+        files, next_cursor = crud.list_files(
+            db,
+            limit=limit,
+            cursor=cursor,
+            file_type=file_type,
+            uploaded_after=uploaded_after,
+            uploaded_before=uploaded_before,
+            skip=skip
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if uploaded_after is None and uploaded_before is None:
+        response.headers["X-Total-Count"] = str(crud.count_files(db, file_type=file_type))
     return files
 
 @router.get("/{file_id}", response_model=FileResponse)
@@ -87,6 +119,7 @@ def get_file(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
+    file_access_tracker.record(file_id)
     return db_file
 
 @router.put("/{file_id}", response_model=FileResponse)
@@ -0,0 +1,73 @@
+# app/api/endpoints/usage.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+
+from app.db.base import get_db
+from app.db.schemas import RunUsageResponse, UsageResponse, UsageRollupResponse
+from app.db import crud
+from app.services.usage_recorder import usage_recorder
+
+router = APIRouter()
+
+
+@router.get("/summary")
+def get_usage_summary(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Usage totals per model, read from the daily rollups.
+
+    start and end select whole days (the day containing start up to the day before end).
+    """
+    return {
+        "models": crud.get_total_usage(db, start=start, end=end),
+        "recorder": usage_recorder.metrics()
+    }
+
+
+@router.get("/rollups", response_model=List[UsageRollupResponse])
+def get_usage_rollups(
+    granularity: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    model_name: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Hourly or daily usage buckets per model, oldest first."""
+    if granularity not in crud.USAGE_GRANULARITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"granularity must be one of {', '.join(crud.USAGE_GRANULARITIES)}"
+        )
+    rollups = crud.get_usage_rollups(db, granularity=granularity, start=start, end=end, model_name=model_name)
+    return [rollup.as_dict() for rollup in rollups]
+
+
+@router.get("/runs/{run_id}", response_model=RunUsageResponse)
+def get_run_usage(
+    run_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Usage recorded for a run (thread ID), summed over its turns, with the row of each turn.
+
+    Rows appear up to USAGE_FLUSH_SECONDS after a turn finishes.
+    """
+    usages = crud.get_usage_by_run_id(db, run_id)
+    if not usages:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usage not found"
+        )
+    totals = {name: sum(getattr(usage, name) or 0 for usage in usages) for name in crud.USAGE_ROLLUP_SUMS}
+    return {
+        "run_id": run_id,
+        "turns": len(usages),
+        **totals,
+        "budget_exhausted": any(usage.budget_exhausted for usage in usages),
+        "usages": usages
+    }
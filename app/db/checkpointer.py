@@ -0,0 +1,381 @@
+# app/db/checkpointer.py
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, sessionmaker
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    WRITES_IDX_MAP,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+from datetime import datetime, timedelta
+import os
+import random
+
+from app.db.models import AgentCheckpoint, AgentCheckpointBlob, AgentCheckpointWrite, AgentStoreItem
+from src.agent.compaction import TOOL_OUTPUT_NAMESPACE
+
+# Number of checkpoints kept per thread when pruning
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))
+# Threads whose latest checkpoint is older than this are deleted when pruning
+CHECKPOINT_TTL_DAYS = int(os.getenv("CHECKPOINT_TTL_DAYS", "30"))
+
+
+class SQLCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Durable LangGraph checkpointer stored in the application database.
+
+    Channel values are stored once per version in agent_checkpoint_blobs, so a
+    checkpoint only writes the channels that changed in its step. Values are
+    serialized with the LangGraph serializer (msgpack).
+    """
+
+    def __init__(self, session_factory: sessionmaker):
+        super().__init__()
+        self.session_factory = session_factory
+
+    # Reading
+
+    def _load_blobs(self, db: Session, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        if not versions:
+            return {}
+        rows = db.query(AgentCheckpointBlob).filter(
+            AgentCheckpointBlob.thread_id == thread_id,
+            AgentCheckpointBlob.checkpoint_ns == checkpoint_ns,
+            tuple_(AgentCheckpointBlob.channel, AgentCheckpointBlob.version).in_(
+                [(channel, str(version)) for channel, version in versions.items()]
+            )
+        ).all()
+        return {
+            row.channel: self.serde.loads_typed((row.blob_type, row.blob))
+            for row in rows
+            if row.blob_type != "empty"
+        }
+
+    def _load_writes(self, db: Session, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[AgentCheckpointWrite]:
+        return db.query(AgentCheckpointWrite).filter(
+            AgentCheckpointWrite.thread_id == thread_id,
+            AgentCheckpointWrite.checkpoint_ns == checkpoint_ns,
+            AgentCheckpointWrite.checkpoint_id == checkpoint_id
+        ).order_by(AgentCheckpointWrite.task_id, AgentCheckpointWrite.idx).all()
+
+    def _to_tuple(self, db: Session, row: AgentCheckpoint) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed((row.checkpoint_type, row.checkpoint))
+        writes = self._load_writes(db, row.thread_id, row.checkpoint_ns, row.checkpoint_id)
+
+        sends = []
+        if row.parent_checkpoint_id:
+            parent_writes = self._load_writes(db, row.thread_id, row.checkpoint_ns, row.parent_checkpoint_id)
+            sends = sorted(
+                (w for w in parent_writes if w.channel == TASKS),
+                key=lambda w: (w.task_path or "", w.task_id, w.idx)
+            )
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": row.checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(
+                    db, row.thread_id, row.checkpoint_ns, checkpoint["channel_versions"]
+                ),
+                "pending_sends": [self.serde.loads_typed((w.blob_type, w.blob)) for w in sends],
+            },
+            metadata=self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": row.thread_id,
+                        "checkpoint_ns": row.checkpoint_ns,
+                        "checkpoint_id": row.parent_checkpoint_id,
+                    }
+                }
+                if row.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (w.task_id, w.channel, self.serde.loads_typed((w.blob_type, w.blob))) for w in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the checkpoint for the config, or the latest checkpoint of the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        with self.session_factory() as db:
+            query = db.query(AgentCheckpoint).filter(
+                AgentCheckpoint.thread_id == thread_id,
+                AgentCheckpoint.checkpoint_ns == checkpoint_ns
+            )
+            if checkpoint_id := get_checkpoint_id(config):
+                query = query.filter(AgentCheckpoint.checkpoint_id == checkpoint_id)
+            else:
+                query = query.order_by(AgentCheckpoint.checkpoint_id.desc())
+
+            row = query.first()
+            return self._to_tuple(db, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first."""
+        with self.session_factory() as db:
+            query = db.query(AgentCheckpoint)
+            if config:
+                query = query.filter(AgentCheckpoint.thread_id == config["configurable"]["thread_id"])
+                if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                    query = query.filter(AgentCheckpoint.checkpoint_ns == checkpoint_ns)
+                if checkpoint_id := get_checkpoint_id(config):
+                    query = query.filter(AgentCheckpoint.checkpoint_id == checkpoint_id)
+            if before and (before_id := get_checkpoint_id(before)):
+                query = query.filter(AgentCheckpoint.checkpoint_id < before_id)
+            query = query.order_by(AgentCheckpoint.checkpoint_id.desc())
+
+            # Metadata filters need deserialization, so only push the limit down without them
+            if limit is not None and not filter:
+                query = query.limit(limit)
+
+            tuples = []
+            for row in query.all():
+                if filter:
+                    metadata = self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata))
+                    if not all(metadata.get(key) == value for key, value in filter.items()):
+                        continue
+                tuples.append(self._to_tuple(db, row))
+                if limit is not None and len(tuples) >= limit:
+                    break
+
+        yield from tuples
+
+    # Writing
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint and the channel values that changed in it."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)
+        values: Dict[str, Any] = c.pop("channel_values")
+
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(c)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self.session_factory() as db:
+            for channel, version in new_versions.items():
+                blob_type, blob = (
+                    self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+                )
+                db.merge(AgentCheckpointBlob(
+                    thread_id=thread_id,
+                    checkpoint_ns=checkpoint_ns,
+                    channel=channel,
+                    version=str(version),
+                    blob_type=blob_type,
+                    blob=blob
+                ))
+            db.merge(AgentCheckpoint(
+                thread_id=thread_id,
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint["id"],
+                parent_checkpoint_id=config["configurable"].get("checkpoint_id"),
+                checkpoint_type=checkpoint_type,
+                checkpoint=checkpoint_blob,
+                metadata_type=metadata_type,
+                checkpoint_metadata=metadata_blob
+            ))
+            db.commit()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save intermediate writes of a task linked to a checkpoint."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        with self.session_factory() as db:
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                key = (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx)
+                # Regular writes are saved once; special writes (errors, interrupts) are replaced
+                if write_idx >= 0 and db.get(AgentCheckpointWrite, key) is not None:
+                    continue
+                blob_type, blob = self.serde.dumps_typed(value)
+                db.merge(AgentCheckpointWrite(
+                    thread_id=thread_id,
+                    checkpoint_ns=checkpoint_ns,
+                    checkpoint_id=checkpoint_id,
+                    task_id=task_id,
+                    idx=write_idx,
+                    channel=channel,
+                    blob_type=blob_type,
+                    blob=blob,
+                    task_path=task_path
+                ))
+            db.commit()
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        """Monotonic string versions (sortable, unique across restarts)."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # Async variants (the database calls are synchronous)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    # Pruning
+
+    def prune(self, thread_id: str, keep_last: int = CHECKPOINT_KEEP_LAST) -> int:
+        """
+        Delete all but the latest checkpoints of a thread, with their writes and unused blobs.
+
+        Args:
+            thread_id: The conversation thread to prune
+            keep_last: Number of most recent checkpoints to keep
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        with self.session_factory() as db:
+            rows = db.query(AgentCheckpoint).filter(
+                AgentCheckpoint.thread_id == thread_id
+            ).order_by(AgentCheckpoint.checkpoint_id.desc()).all()
+
+            stale = rows[keep_last:]
+            if not stale:
+                return 0
+
+            stale_ids = [row.checkpoint_id for row in stale]
+            db.query(AgentCheckpointWrite).filter(
+                AgentCheckpointWrite.thread_id == thread_id,
+                AgentCheckpointWrite.checkpoint_id.in_(stale_ids)
+            ).delete(synchronize_session=False)
+            db.query(AgentCheckpoint).filter(
+                AgentCheckpoint.thread_id == thread_id,
+                AgentCheckpoint.checkpoint_id.in_(stale_ids)
+            ).delete(synchronize_session=False)
+
+            # Keep only blob versions still referenced by a remaining checkpoint
+            referenced = set()
+            for row in rows[:keep_last]:
+                checkpoint = self.serde.loads_typed((row.checkpoint_type, row.checkpoint))
+                for channel, version in checkpoint["channel_versions"].items():
+                    referenced.add((row.checkpoint_ns, channel, str(version)))
+
+            blobs = db.query(
+                AgentCheckpointBlob.checkpoint_ns, AgentCheckpointBlob.channel, AgentCheckpointBlob.version
+            ).filter(AgentCheckpointBlob.thread_id == thread_id).all()
+            unused = [tuple(blob) for blob in blobs if tuple(blob) not in referenced]
+            if unused:
+                db.query(AgentCheckpointBlob).filter(
+                    AgentCheckpointBlob.thread_id == thread_id,
+                    tuple_(
+                        AgentCheckpointBlob.checkpoint_ns,
+                        AgentCheckpointBlob.channel,
+                        AgentCheckpointBlob.version
+                    ).in_(unused)
+                ).delete(synchronize_session=False)
+
+            db.commit()
+            return len(stale)
+
+    def prune_expired(self, ttl_days: int = CHECKPOINT_TTL_DAYS) -> int:
+        """
+        Delete threads whose latest checkpoint is older than ttl_days, together
+        with the tool outputs compacted out of their histories (store items in
+        the ("tool_outputs", thread_id) namespace), in one transaction.
+
+        Returns:
+            Number of threads deleted
+        """
+        cutoff = datetime.utcnow() - timedelta(days=ttl_days)
+        with self.session_factory() as db:
+            recent = db.query(AgentCheckpoint.thread_id).filter(AgentCheckpoint.created_at >= cutoff)
+            expired = [
+                row.thread_id
+                for row in db.query(AgentCheckpoint.thread_id).filter(
+                    AgentCheckpoint.created_at < cutoff,
+                    ~AgentCheckpoint.thread_id.in_(recent)
+                ).distinct()
+            ]
+            if not expired:
+                return 0
+
+            for model in (AgentCheckpointWrite, AgentCheckpointBlob, AgentCheckpoint):
+                db.query(model).filter(model.thread_id.in_(expired)).delete(synchronize_session=False)
+            # Store namespaces are kept with their labels joined by "." (see app/db/store.py)
+            namespaces = [f"{TOOL_OUTPUT_NAMESPACE}.{thread_id}" for thread_id in expired]
+            db.query(AgentStoreItem).filter(AgentStoreItem.namespace.in_(namespaces)).delete(synchronize_session=False)
+            db.commit()
+            return len(expired)
@@ -1,11 +1,14 @@
 # app/db/crud.py
 from sqlalchemy.orm import Session
+from sqlalchemy import func as sa_func, bindparam, insert, or_, tuple_, update
+import base64
+import json
 import os
 import uuid
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Tuple
 
-from app.db.models import File, Analysis,Usage
+from app.db.models import File, FileCount, Analysis,Usage, UsageRollup, AgentJob
 from app.db.schemas import FileCreate, FileUpdate, AnalysisCreate,UsageCreate
 
 def create_file(db: Session, file_create: FileCreate, uploaded_file, file_path: str) -> File:
@@ -30,23 +33,144 @@ def create_file(db: Session, file_create: FileCreate, uploaded_file, file_path:
     )
     
     db.add(db_file)
+    _adjust_file_count(db, file_type, 1)
     db.commit()
     db.refresh(db_file)
     return db_file
 
 def get_file(db: Session, file_id: int) -> Optional[File]:
-    """Get a file by ID."""
-    file = db.query(File).filter(File.id == file_id).first()
-    if file:
-        file.last_accessed = datetime.utcnow()
-        db.commit()
-        db.refresh(file)
-    return file
+    """Get a file by ID (a pure read; accesses are recorded by app.services.access_tracker)."""
+    return db.query(File).filter(File.id == file_id).first()
+
+def record_file_accesses(db: Session, accesses: Dict[int, datetime]) -> int:
+    """
+    Set last_accessed for many files in one executemany UPDATE.
+
+    A timestamp never moves back, so flushes from several worker processes
+    can arrive in any order. Returns the number of rows updated.
+    """
+    if not accesses:
+        return 0
+    # A Core update on the table: an ORM update with a parameter list would be a bulk update by primary key
+    files = File.__table__
+    result = db.execute(
+        update(files)
+        .where(files.c.id == bindparam("file_id"))
+        .where(or_(files.c.last_accessed.is_(None), files.c.last_accessed < bindparam("accessed_at")))
+        .values(last_accessed=bindparam("accessed_at")),
+        [{"file_id": file_id, "accessed_at": accessed_at} for file_id, accessed_at in accesses.items()]
+    )
+    db.commit()
+    return result.rowcount
 
 def get_files(db: Session, skip: int = 0, limit: int = 100) -> List[File]:
     """Get all files with pagination."""
     return db.query(File).offset(skip).limit(limit).all()
 
+# Columns returned by list_files; file paths and access times are only needed for a single file
+FILE_LIST_COLUMNS = (
+    File.id,
+    File.original_filename,
+    File.description,
+    File.file_type,
+    File.file_size,
+    File.uploaded_at,
+    File.is_processed
+)
+
+def encode_file_cursor(uploaded_at: datetime, file_id: int) -> str:
+    """Opaque cursor pointing after the file (uploaded_at, id) in the listing order."""
+    raw = json.dumps([uploaded_at.isoformat(), file_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_file_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_file_cursor. Raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        uploaded_at, file_id = json.loads(raw)
+        return datetime.fromisoformat(uploaded_at), int(file_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def list_files(
+    db: Session,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    file_type: Optional[str] = None,
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    skip: int = 0
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    List files newest first with keyset pagination.
+
+    Pages continue from the (uploaded_at, id) of the last row of the previous
+    page, so every page is an index range scan on ix_files_uploaded_at_id (or
+    ix_files_type_uploaded_at_id when filtering by type), however deep it is.
+    Only FILE_LIST_COLUMNS are loaded. skip (an offset) is kept for older
+    clients and is ignored when a cursor is given.
+
+    Returns:
+        The rows and the cursor of the next page (None on the last page)
+    """
+    query = db.query(*FILE_LIST_COLUMNS)
+    if file_type is not None:
+        query = query.filter(File.file_type == file_type)
+    if uploaded_after is not None:
+        query = query.filter(File.uploaded_at >= uploaded_after)
+    if uploaded_before is not None:
+        query = query.filter(File.uploaded_at < uploaded_before)
+    if cursor is not None:
+        uploaded_at, file_id = decode_file_cursor(cursor)
+        # A row-value comparison is a single range on the composite index
+        query = query.filter(tuple_(File.uploaded_at, File.id) < tuple_(uploaded_at, file_id))
+    query = query.order_by(File.uploaded_at.desc(), File.id.desc())
+    if cursor is None and skip:
+        query = query.offset(skip)
+
+    # One extra row tells whether there is a next page without counting
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_file_cursor(rows[-1].uploaded_at, rows[-1].id)
+
+def count_files(db: Session, file_type: Optional[str] = None) -> int:
+    """Number of files (of a type), read from the file_counts table instead of counting files."""
+    query = db.query(sa_func.coalesce(sa_func.sum(FileCount.count), 0))
+    if file_type is not None:
+        query = query.filter(FileCount.file_type == file_type)
+    return int(query.scalar())
+
+def _adjust_file_count(db: Session, file_type: Optional[str], delta: int) -> None:
+    """Add delta to the count of a file type, in the caller's transaction."""
+    table = FileCount.__table__
+    # An upsert: concurrent first uploads of a new type from two workers must not both insert
+    _upsert(db, table, {"file_type": file_type or ""}, {"count": max(delta, 0)}, {"count": table.c.count + delta})
+
+def _upsert(db: Session, table, key: Dict[str, Any], values: Dict[str, Any], increments: Dict[str, Any]) -> None:
+    """
+    Insert a row with key and values, or apply increments to the existing row, in
+    the caller's transaction (an atomic upsert on SQLite and PostgreSQL).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        db.execute(
+            upsert(table)
+            .values(**key, **values)
+            .on_conflict_do_update(index_elements=list(key), set_=increments)
+        )
+        return
+    updated = db.execute(
+        update(table).where(*(table.c[name] == value for name, value in key.items())).values(**increments)
+    ).rowcount
+    if not updated:
+        db.execute(insert(table).values(**key, **values))
+
 def update_file(db: Session, file_id: int, file_update: FileUpdate) -> Optional[File]:
     """Update a file record."""
     db_file = db.query(File).filter(File.id == file_id).first()
@@ -68,6 +192,7 @@ def delete_file(db: Session, file_id: int) -> bool:
                 os.remove(db_file.file_path)
             # Delete the DB record
             db.delete(db_file)
+            _adjust_file_count(db, db_file.file_type, -1)
             db.commit()
             return True
         except Exception as e:
@@ -84,32 +209,251 @@ def create_usage(db: Session, usage: UsageCreate) -> Usage:
         input_tokens=usage.input_tokens,
         output_tokens=usage.output_tokens,
         total_tokens=usage.total_tokens,
-        model_name=usage.model_name
+        cached_tokens=usage.cached_tokens,
+        model_name=usage.model_name,
+        cost=usage.cost,
+        llm_latency_ms=usage.llm_latency_ms,
+        steps=usage.steps,
+        token_budget=usage.token_budget,
+        cost_budget=usage.cost_budget,
+        step_budget=usage.step_budget,
+        budget_exhausted=usage.budget_exhausted,
+        timestamp=usage.timestamp or datetime.utcnow()
     )
     db.add(db_usage)
+    _add_to_usage_rollups(db, [usage.model_dump() | {"timestamp": db_usage.timestamp}])
     db.commit()
     db.refresh(db_usage)
     return db_usage
 
-def get_usage_by_run_id(db: Session, run_id: str) -> Optional[Usage]:
-    return db.query(Usage).filter(Usage.run_id == run_id).first()
+def get_usage_by_run_id(db: Session, run_id: str) -> List[Usage]:
+    """Usage rows of a run, oldest first: one per turn, since continuations record under the same run_id."""
+    return db.query(Usage).filter(Usage.run_id == run_id).order_by(Usage.timestamp.asc(), Usage.id.asc()).all()
 
 def get_usage_by_analysis_id(db: Session, analysis_id: int) -> List[Usage]:
     return db.query(Usage).filter(Usage.analysis_id == analysis_id).all()
 
-def get_total_usage(db: Session) -> Dict[str, int]:
-    result = db.query(
-        Usage.model_name,
-        db.func.sum(Usage.input_tokens).label("total_input"),
-        db.func.sum(Usage.output_tokens).label("total_output"),
-        db.func.sum(Usage.total_tokens).label("total")
-    ).group_by(Usage.model_name).all()
-    
+# Rollup granularities and the columns summed into each bucket
+USAGE_GRANULARITIES = ("hour", "day")
+USAGE_ROLLUP_SUMS = ("input_tokens", "output_tokens", "total_tokens", "cached_tokens", "cost", "llm_latency_ms", "steps")
+
+def usage_bucket(timestamp: datetime, granularity: str) -> datetime:
+    """Start of the hour or day bucket containing timestamp."""
+    hour = timestamp.replace(minute=0, second=0, microsecond=0)
+    return hour if granularity == "hour" else hour.replace(hour=0)
+
+def create_usages(db: Session, usages: List[UsageCreate]) -> int:
+    """
+    Insert a batch of usage rows (one executemany INSERT) and add them to the
+    rollups, in one transaction. Returns the number of rows inserted.
+    """
+    if not usages:
+        return 0
+    now = datetime.utcnow()
+    rows = [usage.model_dump() for usage in usages]
+    for row in rows:
+        row["timestamp"] = row["timestamp"] or now
+    db.execute(insert(Usage.__table__), rows)
+    _add_to_usage_rollups(db, rows)
+    db.commit()
+    return len(rows)
+
+def _add_to_usage_rollups(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Add usage rows to the rollups, in the caller's transaction.
+
+    The rows are aggregated per (granularity, bucket, model) first, so each
+    rollup row is written once per batch however many turns it holds.
+    """
+    totals: Dict[Tuple[str, datetime, str], Dict[str, Any]] = {}
+    for row in rows:
+        for granularity in USAGE_GRANULARITIES:
+            key = (granularity, usage_bucket(row["timestamp"], granularity), row["model_name"] or "")
+            bucket = totals.setdefault(key, dict.fromkeys(USAGE_ROLLUP_SUMS + ("turns", "budget_exhausted_turns"), 0))
+            bucket["turns"] += 1
+            bucket["budget_exhausted_turns"] += int(bool(row["budget_exhausted"]))
+            for name in USAGE_ROLLUP_SUMS:
+                bucket[name] += row[name] or 0
+    for (granularity, bucket_start, model_name), sums in totals.items():
+        _add_to_usage_rollup(db, granularity, bucket_start, model_name, sums)
+
+def _add_to_usage_rollup(db: Session, granularity: str, bucket_start: datetime, model_name: str, sums: Dict[str, Any]) -> None:
+    """Add sums to a rollup row, creating it if needed (an atomic upsert on SQLite and PostgreSQL)."""
+    table = UsageRollup.__table__
+    key = {"granularity": granularity, "bucket_start": bucket_start, "model_name": model_name}
+    increments = {name: table.c[name] + value for name, value in sums.items()}
+    _upsert(db, table, key, sums, increments)
+
+def get_usage_rollups(
+    db: Session,
+    granularity: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    model_name: Optional[str] = None
+) -> List[UsageRollup]:
+    """Rollup buckets of a granularity in [start, end), oldest first."""
+    query = db.query(UsageRollup).filter(UsageRollup.granularity == granularity)
+    if start is not None:
+        query = query.filter(UsageRollup.bucket_start >= usage_bucket(start, granularity))
+    if end is not None:
+        query = query.filter(UsageRollup.bucket_start < end)
+    if model_name is not None:
+        query = query.filter(UsageRollup.model_name == model_name)
+    return query.order_by(UsageRollup.bucket_start.asc(), UsageRollup.model_name.asc()).all()
+
+def get_total_usage(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+    """Usage totals per model, summed from the daily rollups (whole days when start/end are given)."""
+    sums = USAGE_ROLLUP_SUMS + ("turns", "budget_exhausted_turns")
+    query = db.query(
+        UsageRollup.model_name,
+        *(sa_func.sum(getattr(UsageRollup, name)).label(name) for name in sums)
+    ).filter(UsageRollup.granularity == "day")
+    if start is not None:
+        query = query.filter(UsageRollup.bucket_start >= usage_bucket(start, "day"))
+    if end is not None:
+        query = query.filter(UsageRollup.bucket_start < end)
+    result = query.group_by(UsageRollup.model_name).all()
+
     return {
-        model: {
-            "input_tokens": input_tokens,
-            "output_tokens": output_tokens,
-            "total_tokens": total
-        }
-        for model, input_tokens, output_tokens, total in result
-    }
\ No newline at end of file
+        row.model_name or "unknown": {name: getattr(row, name) or 0 for name in sums}
+        for row in result
+    }
+
+# Agent jobs
+def create_job(db: Session, job_id: str, kind: str, query: str, thread_id: str, priority: int = 0, payload: Optional[str] = None) -> AgentJob:
+    db_job = AgentJob(
+        id=job_id,
+        kind=kind,
+        status="queued",
+        priority=priority,
+        query=query,
+        thread_id=thread_id,
+        payload=payload
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_job(db: Session, job_id: str) -> Optional[AgentJob]:
+    return db.query(AgentJob).filter(AgentJob.id == job_id).first()
+
+def claim_next_job(db: Session, worker_id: str, max_tries: int = 5) -> Optional[AgentJob]:
+    """
+    Mark the next queued job (highest priority, then oldest) as running and return it.
+    
+    The claim is a conditional UPDATE on the job's status, so when several
+    processes race for the same job exactly one of them gets it; the others
+    move on to the next candidate.
+    """
+    for _ in range(max_tries):
+        candidate = (
+            db.query(AgentJob.id)
+            .filter(AgentJob.status == "queued")
+            .order_by(AgentJob.priority.desc(), AgentJob.created_at.asc())
+            .first()
+        )
+        if candidate is None:
+            return None
+        now = datetime.utcnow()
+        claimed = (
+            db.query(AgentJob)
+            .filter(AgentJob.id == candidate.id, AgentJob.status == "queued")
+            .update(
+                {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "heartbeat_at": now,
+                    "attempts": AgentJob.attempts + 1
+                },
+                synchronize_session=False
+            )
+        )
+        db.commit()
+        if claimed:
+            return get_job(db, candidate.id)
+    return None
+
+def finish_job(db: Session, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None, worker_id: Optional[str] = None) -> bool:
+    """Record the outcome of a job; with worker_id, only if that worker still owns it."""
+    query = db.query(AgentJob).filter(AgentJob.id == job_id)
+    if worker_id is not None:
+        query = query.filter(AgentJob.worker_id == worker_id, AgentJob.status == "running")
+    updated = query.update(
+        {"status": status, "result": result, "error": error, "finished_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    return updated > 0
+
+def heartbeat_jobs(db: Session, job_ids: List[str], worker_id: str) -> None:
+    """Refresh the heartbeat of the running jobs owned by a worker."""
+    if not job_ids:
+        return
+    db.query(AgentJob).filter(
+        AgentJob.id.in_(job_ids), AgentJob.worker_id == worker_id, AgentJob.status == "running"
+    ).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+def cancel_job(db: Session, job_id: str) -> bool:
+    """Cancel a job that has not started yet."""
+    updated = (
+        db.query(AgentJob)
+        .filter(AgentJob.id == job_id, AgentJob.status == "queued")
+        .update({"status": "cancelled", "finished_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    return updated > 0
+
+def requeue_stale_jobs(db: Session, max_attempts: int, stale_before: datetime) -> Dict[str, int]:
+    """
+    Put running jobs whose worker stopped heartbeating (e.g. the process died)
+    back in the queue, failing those out of attempts.
+    """
+    stale = (AgentJob.status == "running") & (
+        AgentJob.heartbeat_at.is_(None) | (AgentJob.heartbeat_at < stale_before)
+    )
+    failed = (
+        db.query(AgentJob)
+        .filter(stale, AgentJob.attempts >= max_attempts)
+        .update(
+            {"status": "failed", "error": "Interrupted too many times", "finished_at": datetime.utcnow()},
+            synchronize_session=False
+        )
+    )
+    requeued = (
+        db.query(AgentJob)
+        .filter(stale)
+        .update({"status": "queued", "started_at": None, "worker_id": None}, synchronize_session=False)
+    )
+    db.commit()
+    return {"requeued": requeued, "failed": failed}
+
+def get_queue_position(db: Session, job: AgentJob) -> Optional[int]:
+    """1-based position of a queued job in the queue."""
+    if job.status != "queued":
+        return None
+    ahead = (
+        db.query(AgentJob)
+        .filter(
+            AgentJob.status == "queued",
+            (AgentJob.priority > job.priority)
+            | ((AgentJob.priority == job.priority) & (AgentJob.created_at < job.created_at))
+        )
+        .count()
+    )
+    return ahead + 1
+
+def count_jobs_by_status(db: Session) -> Dict[str, int]:
+    rows = db.query(AgentJob.status, sa_func.count(AgentJob.id)).group_by(AgentJob.status).all()
+    return {status: count for status, count in rows}
+
+def count_queued_by_priority(db: Session) -> Dict[int, int]:
+    rows = (
+        db.query(AgentJob.priority, sa_func.count(AgentJob.id))
+        .filter(AgentJob.status == "queued")
+        .group_by(AgentJob.priority)
+        .all()
+    )
+    return {priority: count for priority, count in rows}
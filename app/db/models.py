@@ -1,5 +1,5 @@
 # app/db/models.py
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, ForeignKey, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 import datetime
@@ -9,6 +9,11 @@ Base = declarative_base()
 
 class File(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        # Keyset pagination of the file list, newest first (optionally per type)
+        Index("ix_files_uploaded_at_id", "uploaded_at", "id"),
+        Index("ix_files_type_uploaded_at_id", "file_type", "uploaded_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, unique=True, index=True)
@@ -35,6 +40,13 @@ class File(Base):
             "is_processed": self.is_processed
         }
 
+class FileCount(Base):
+    """Number of files per type, maintained by crud so listings never count the files table."""
+    __tablename__ = "file_counts"
+
+    file_type = Column(String, primary_key=True)
+    count = Column(Integer, default=0)
+
 class Analysis(Base):
     __tablename__ = "analyses"
 
@@ -64,7 +76,15 @@ class Usage(Base):
     input_tokens = Column(Integer)
     output_tokens = Column(Integer)
     total_tokens = Column(Integer)
+    cached_tokens = Column(Integer, nullable=True)  # Input tokens served from the provider's prompt cache
     model_name = Column(String, nullable=True)
+    cost = Column(Float, nullable=True)  # Estimated USD cost
+    llm_latency_ms = Column(Float, nullable=True)  # Total time spent in LLM calls
+    steps = Column(Integer, nullable=True)  # Number of agent (LLM) steps
+    token_budget = Column(Integer, nullable=True)
+    cost_budget = Column(Float, nullable=True)
+    step_budget = Column(Integer, nullable=True)
+    budget_exhausted = Column(Boolean, default=False)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
     
     def as_dict(self):
@@ -75,6 +95,137 @@ class Usage(Base):
             "input_tokens": self.input_tokens,
             "output_tokens": self.output_tokens,
             "total_tokens": self.total_tokens,
+            "cached_tokens": self.cached_tokens,
             "model_name": self.model_name,
+            "cost": self.cost,
+            "llm_latency_ms": self.llm_latency_ms,
+            "steps": self.steps,
+            "token_budget": self.token_budget,
+            "cost_budget": self.cost_budget,
+            "step_budget": self.step_budget,
+            "budget_exhausted": self.budget_exhausted,
             "timestamp": self.timestamp.isoformat() if self.timestamp else None
-        }
\ No newline at end of file
+        }
+
+class UsageRollup(Base):
+    """
+    Usage totals per model and hour/day bucket, updated with every batch of usage rows
+    so reports never scan the usages table.
+    """
+    __tablename__ = "usage_rollups"
+
+    granularity = Column(String, primary_key=True)  # "hour" or "day"
+    bucket_start = Column(DateTime, primary_key=True)
+    model_name = Column(String, primary_key=True, default="")  # "" when the model is unknown
+    turns = Column(Integer, default=0)  # Usage rows: a run, or one turn of a continued thread
+    input_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+    cached_tokens = Column(Integer, default=0)
+    cost = Column(Float, default=0.0)
+    llm_latency_ms = Column(Float, default=0.0)
+    steps = Column(Integer, default=0)
+    budget_exhausted_turns = Column(Integer, default=0)
+
+    def as_dict(self):
+        return {
+            "granularity": self.granularity,
+            "bucket_start": self.bucket_start.isoformat() if self.bucket_start else None,
+            "model_name": self.model_name or None,
+            "turns": self.turns,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cost": self.cost,
+            "llm_latency_ms": self.llm_latency_ms,
+            "steps": self.steps,
+            "budget_exhausted_turns": self.budget_exhausted_turns
+        }
+
+# Agent conversation checkpoints (LangGraph state, see app/db/checkpointer.py)
+class AgentCheckpoint(Base):
+    __tablename__ = "agent_checkpoints"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)
+    parent_checkpoint_id = Column(String, nullable=True)
+    checkpoint_type = Column(String)
+    checkpoint = Column(LargeBinary)  # Serialized checkpoint without channel values
+    metadata_type = Column(String)
+    checkpoint_metadata = Column("metadata", LargeBinary)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+class AgentCheckpointBlob(Base):
+    __tablename__ = "agent_checkpoint_blobs"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    channel = Column(String, primary_key=True)
+    version = Column(String, primary_key=True)
+    blob_type = Column(String)
+    blob = Column(LargeBinary, nullable=True)
+
+class AgentStoreItem(Base):
+    """Long-term graph store items (see app/db/store.py)."""
+    __tablename__ = "agent_store_items"
+
+    namespace = Column(String, primary_key=True)  # Namespace labels joined with "."
+    key = Column(String, primary_key=True)
+    value = Column(Text)  # JSON
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class AgentCheckpointWrite(Base):
+    __tablename__ = "agent_checkpoint_writes"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)
+    task_id = Column(String, primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    channel = Column(String)
+    blob_type = Column(String)
+    blob = Column(LargeBinary, nullable=True)
+    task_path = Column(String, default="")
+
+# Background agent runs (see app/services/job_queue.py)
+class AgentJob(Base):
+    __tablename__ = "agent_jobs"
+    __table_args__ = (
+        # Queue order: highest priority first, then oldest
+        Index("ix_agent_jobs_queue", "status", "priority", "created_at"),
+    )
+
+    id = Column(String, primary_key=True)
+    kind = Column(String, default="run")  # run or continue
+    status = Column(String, default="queued")  # queued, running, succeeded, failed, cancelled
+    priority = Column(Integer, default=0)  # Higher runs first
+    query = Column(Text)
+    thread_id = Column(String, index=True)
+    payload = Column(Text, nullable=True)  # JSON request options (budgets, file_id)
+    result = Column(Text, nullable=True)  # JSON agent response
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    worker_id = Column(String, nullable=True)  # host:pid of the process running the job
+    heartbeat_at = Column(DateTime, nullable=True)  # Refreshed while the job runs
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "query": self.query,
+            "thread_id": self.thread_id,
+            "error": self.error,
+            "attempts": self.attempts,
+            "worker_id": self.worker_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -3,6 +3,9 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 import datetime
 
+# The agent's report schema is shared with the graph, which enforces it on the final step
+from src.agent.schemas import AgentReport, VisualizationInfo, ActionStep, DecisionJustification
+
 # Files
 class FileBase(BaseModel):
     original_filename: str
@@ -28,6 +31,19 @@ class FileResponse(FileBase):
     class Config:
         from_attributes = True
 
+class FileListItem(BaseModel):
+    """Row of the file listing (see crud.FILE_LIST_COLUMNS)."""
+    id: int
+    original_filename: str
+    description: Optional[str] = None
+    file_type: str
+    file_size: float
+    uploaded_at: datetime.datetime
+    is_processed: bool
+
+    class Config:
+        from_attributes = True
+
 # Analysis
 class AnalysisBase(BaseModel):
     title: str
@@ -51,10 +67,19 @@ class UsageBase(BaseModel):
     input_tokens: int
     output_tokens: int
     total_tokens: int
+    cached_tokens: Optional[int] = None
     model_name: Optional[str] = None
+    cost: Optional[float] = None
+    llm_latency_ms: Optional[float] = None
+    steps: Optional[int] = None
+    token_budget: Optional[int] = None
+    cost_budget: Optional[float] = None
+    step_budget: Optional[int] = None
+    budget_exhausted: bool = False
 
 class UsageCreate(UsageBase):
     analysis_id: Optional[int] = None
+    timestamp: Optional[datetime.datetime] = None  # When the run finished (defaults to the insert time)
 
 class UsageResponse(UsageBase):
     id: int
@@ -64,26 +89,78 @@ class UsageResponse(UsageBase):
     class Config:
         from_attributes = True
 
+class RunUsageResponse(BaseModel):
+    """Usage of a run summed over its turns (the run and each continuation)."""
+    run_id: str
+    turns: int
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    cached_tokens: int
+    cost: float
+    llm_latency_ms: float
+    steps: int
+    budget_exhausted: bool
+    usages: List[UsageResponse]  # One row per turn, oldest first
+
+class UsageRollupResponse(BaseModel):
+    granularity: str
+    bucket_start: datetime.datetime
+    model_name: Optional[str] = None
+    turns: int  # Agent invocations: a run, or one turn of a continued thread
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    cached_tokens: int
+    cost: float
+    llm_latency_ms: float
+    steps: int
+    budget_exhausted_turns: int
+
+    class Config:
+        from_attributes = True
+
 # Agent Response
-class VisualizationInfo(BaseModel):
-    path: str
-    description: str
-    key_insights: List[str]
-
-class ActionStep(BaseModel):
-    step: int
-    description: str
-
-class DecisionJustification(BaseModel):
-    decision: str
-    justification: str
-    tool_used: str
-
-class AgentResponse(BaseModel):
-    action_plan: List[ActionStep]
-    decisions_and_justifications: List[DecisionJustification]
-    observations: List[str]
-    visualizations: List[VisualizationInfo]
-    summary: str
-    next_steps: List[str]
-    conclusion: str
\ No newline at end of file
+class BudgetReport(BaseModel):
+    token_budget: Optional[int] = None
+    cost_budget: Optional[float] = None
+    step_budget: Optional[int] = None
+    tokens_used: int
+    cost_used: float
+    steps_used: int
+    exhausted: bool
+    exhausted_reason: Optional[str] = None
+
+class AgentResponse(AgentReport):
+    budget: Optional[BudgetReport] = None
+    thread_id: Optional[str] = None
+
+# Agent run limits (None means unlimited)
+class AgentBudgets(BaseModel):
+    token_budget: Optional[int] = Field(None, ge=0)
+    cost_budget: Optional[float] = Field(None, ge=0)
+    step_budget: Optional[int] = Field(None, ge=0)
+
+# Agent Jobs
+class JobCreate(AgentBudgets):
+    query: str
+    kind: str = "run"  # run, or continue an existing thread
+    thread_id: Optional[str] = None
+    priority: int = 0
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    priority: int
+    thread_id: str
+    error: Optional[str] = None
+    attempts: int
+    worker_id: Optional[str] = None
+    queue_position: Optional[int] = None
+    created_at: datetime.datetime
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+
+    class Config:
+        from_attributes = True
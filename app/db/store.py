@@ -0,0 +1,125 @@
+# app/db/store.py
+from sqlalchemy.orm import sessionmaker
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+from typing import Iterable, List, Tuple
+from datetime import datetime
+import json
+
+from app.db.models import AgentStoreItem
+
+
+def _join(namespace: Tuple[str, ...]) -> str:
+    return ".".join(namespace)
+
+
+def _split(namespace: str) -> Tuple[str, ...]:
+    return tuple(namespace.split(".")) if namespace else ()
+
+
+def _matches(namespace: Tuple[str, ...], op: ListNamespacesOp) -> bool:
+    for condition in op.match_conditions or ():
+        path = tuple(condition.path)
+        if len(namespace) < len(path):
+            return False
+        part = namespace[:len(path)] if condition.match_type == "prefix" else namespace[-len(path):]
+        if any(p != "*" and p != n for p, n in zip(path, part)):
+            return False
+    return True
+
+
+class SQLStore(BaseStore):
+    """
+    LangGraph store kept in the application database.
+
+    Unlike InMemoryStore, items are visible to every worker process and survive
+    restarts, so a thread continued on another worker still finds the tool
+    outputs compacted out of its history. Search supports namespace prefixes and
+    equality filters on top-level value fields; semantic search and TTLs are not
+    supported.
+    """
+
+    def __init__(self, session_factory: sessionmaker):
+        self.session_factory = session_factory
+
+    def _to_item(self, row: AgentStoreItem, cls=Item) -> Item:
+        return cls(
+            namespace=_split(row.namespace),
+            key=row.key,
+            value=json.loads(row.value),
+            created_at=row.created_at,
+            updated_at=row.updated_at
+        )
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        """Execute the operations in one session and transaction."""
+        results: List[Result] = []
+        with self.session_factory() as db:
+            for op in ops:
+                if isinstance(op, GetOp):
+                    row = db.get(AgentStoreItem, (_join(op.namespace), op.key))
+                    results.append(self._to_item(row) if row else None)
+
+                elif isinstance(op, PutOp):
+                    key = (_join(op.namespace), op.key)
+                    row = db.get(AgentStoreItem, key)
+                    if op.value is None:
+                        if row is not None:
+                            db.delete(row)
+                    elif row is None:
+                        now = datetime.utcnow()
+                        db.add(AgentStoreItem(
+                            namespace=key[0], key=op.key, value=json.dumps(op.value, default=str),
+                            created_at=now, updated_at=now
+                        ))
+                    else:
+                        row.value = json.dumps(op.value, default=str)
+                        row.updated_at = datetime.utcnow()
+                    db.flush()
+                    results.append(None)
+
+                elif isinstance(op, SearchOp):
+                    query = db.query(AgentStoreItem)
+                    if op.namespace_prefix:
+                        prefix = _join(op.namespace_prefix)
+                        query = query.filter(
+                            (AgentStoreItem.namespace == prefix)
+                            | AgentStoreItem.namespace.startswith(prefix + ".", autoescape=True)
+                        )
+                    query = query.order_by(AgentStoreItem.updated_at.desc())
+                    if not op.filter:
+                        query = query.offset(op.offset).limit(op.limit)
+                    items = [self._to_item(row, SearchItem) for row in query.all()]
+                    if op.filter:
+                        items = [
+                            item for item in items
+                            if all(item.value.get(field) == value for field, value in op.filter.items())
+                        ][op.offset:op.offset + op.limit]
+                    results.append(items)
+
+                elif isinstance(op, ListNamespacesOp):
+                    namespaces = sorted({
+                        _split(row.namespace) for row in db.query(AgentStoreItem.namespace).distinct()
+                    })
+                    namespaces = [ns for ns in namespaces if _matches(ns, op)]
+                    if op.max_depth is not None:
+                        namespaces = sorted({ns[:op.max_depth] for ns in namespaces})
+                    results.append(namespaces[op.offset:op.offset + op.limit])
+
+                else:
+                    raise ValueError(f"Unsupported store operation: {type(op).__name__}")
+            db.commit()
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        # The database calls are synchronous
+        return self.batch(ops)
@@ -3,23 +3,54 @@ from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from sqlalchemy import text
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from app.api.endpoints import agent, files
+from app.api.endpoints import agent, artifacts, files, usage
 from app.db.base import engine, Base
+from app.middleware.compression import COMPRESSION_ENABLED, CompressionMiddleware
+from app.services.access_tracker import file_access_tracker
+from app.services.usage_recorder import usage_recorder
+from app.services.warmup import warmup_service
+from src.helpers.log_sampling import configure_logging
+from src.telemetry import configure_tracing, registry
 
-# Create tables in the database
-Base.metadata.create_all(bind=engine)
-
-# Ensure data directories exist
+# Ensure data directories exist (StaticFiles below checks for src/data)
 for path in ["src/data/uploads", "src/data/graphs"]:
     Path(path).mkdir(parents=True, exist_ok=True)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Application log records at LOG_LEVEL (hot-path payloads are DEBUG and sampled)
+    configure_logging()
+    # Create tables in the database (at startup, so importing the app has no side effects)
+    Base.metadata.create_all(bind=engine)
+    # Export spans to OTEL_EXPORTER_OTLP_ENDPOINT when set (metrics are always recorded)
+    configure_tracing()
+    # Warm the executor, dataset catalog, model client and graph in the background; /readyz waits for it
+    warmup_service.start()
+    # Background agent jobs: resume interrupted jobs and start the worker pool
+    agent.job_queue.start()
+    # Flushes file access times recorded by reads
+    file_access_tracker.start()
+    # Writes queued usage in batches
+    usage_recorder.start()
+    yield
+    warmup_service.stop()
+    agent.job_queue.stop()
+    file_access_tracker.stop()
+    usage_recorder.stop()
+
 app = FastAPI(
     title="Science Agent API",
     description="API for scientific data analysis using LangGraph",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson serializes responses several times faster than the standard json module
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -31,6 +62,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress complete JSON/HTML responses with zstd or gzip, as the client accepts
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 # Mount static files
 app.mount("/data", StaticFiles(directory="src/data"), name="data_static")
 
@@ -40,6 +75,31 @@ templates = Jinja2Templates(directory="app/templates")
 # Include routers
 app.include_router(files.router, prefix="/api/files", tags=["files"])
 app.include_router(agent.router, prefix="/api/agent", tags=["agent"])
+app.include_router(artifacts.router, prefix="/artifacts", tags=["artifacts"])
+app.include_router(usage.router, prefix="/api/usage", tags=["usage"])
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process is up and its event loop responds."""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+def readyz():
+    """Readiness: 200 once the warm-up has run and the database answers, 503 before (and during shutdown)."""
+    status_body = warmup_service.status()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        status_body["database"] = "ok"
+    except Exception as e:
+        status_body["database"] = f"error: {str(e)}"
+        status_body["ready"] = False
+    return ORJSONResponse(status_code=200 if status_body["ready"] else 503, content=status_body)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics: span latency histograms and counters, provider and job queue metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/")
 async def home(request: Request):
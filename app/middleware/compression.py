@@ -0,0 +1,163 @@
+# app/middleware/compression.py
+"""
+Response compression negotiated from Accept-Encoding.
+
+Clients that accept zstd get zstd (when the zstandard package is installed),
+others gzip; a higher q-value from the client wins, ties go to zstd. Only
+complete 200 bodies (sent in one message) of text-like types and at least
+COMPRESSION_MIN_SIZE bytes are compressed. Streamed responses, such as the
+agent's SSE/NDJSON progress stream and static files, pass through unchanged,
+so events are never held back in a compressor's buffer, and so do partial
+(206, Content-Range) responses, whose range refers to the uncompressed
+bytes. A strong ETag of a compressed response is made weak, since the same
+validator now covers two different byte streams. Bodies above
+COMPRESSION_THREAD_MIN_SIZE are compressed in a worker thread to keep the
+event loop free.
+"""
+import gzip
+import os
+from typing import Callable, Dict, Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:  # gzip only
+    zstandard = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_THREAD_MIN_SIZE = int(os.getenv("COMPRESSION_THREAD_MIN_SIZE", str(256 * 1024)))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/xml", "image/svg+xml", "text/")
+
+
+def negotiate_encoding(accept_encoding: str, available) -> Optional[str]:
+    """
+    Pick the content coding for an Accept-Encoding header.
+
+    Args:
+        accept_encoding: The request's Accept-Encoding header
+        available: Supported codings in order of preference
+
+    Returns:
+        The coding to use, or None for an uncompressed response
+    """
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def gzip_encoder(level: int) -> Callable[[bytes], bytes]:
+    return lambda body: gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def zstd_encoder(level: int) -> Callable[[bytes], bytes]:
+    # A compressor per call: ZstdCompressor objects must not be shared between threads
+    return lambda body: zstandard.ZstdCompressor(level=level).compress(body)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete responses with zstd or gzip.
+
+    Args:
+        app: The ASGI application
+        minimum_size: Smallest body worth compressing, in bytes
+        gzip_level: gzip compression level (1-9)
+        zstd_level: zstd compression level (1-22)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        zstd_level: int = COMPRESSION_ZSTD_LEVEL
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders: Dict[str, Callable[[bytes], bytes]] = {}
+        if zstandard is not None:
+            self.encoders["zstd"] = zstd_encoder(zstd_level)
+        self.encoders["gzip"] = gzip_encoder(gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encoders)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether the body is complete
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=list(start["headers"]))
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._compressible(start["status"], headers, body):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) >= COMPRESSION_THREAD_MIN_SIZE:
+                body = await anyio.to_thread.run_sync(self.encoders[encoding], body)
+            else:
+                body = self.encoders[encoding](body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            # Ranges would refer to the compressed bytes, which are not served
+            if "accept-ranges" in headers:
+                del headers["Accept-Ranges"]
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            headers.add_vary_header("Accept-Encoding")
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, status: int, headers: MutableHeaders, body: bytes) -> bool:
+        if status != 200 or "content-range" in headers:
+            return False
+        if len(body) < self.minimum_size or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        # Never buffer event streams, even a short one sent in a single message
+        if content_type.startswith("text/event-stream"):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
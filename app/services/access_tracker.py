@@ -0,0 +1,109 @@
+# app/services/access_tracker.py
+"""
+Batched tracking of file access times.
+
+Reading a file record must not write to the database: on SQLite every write
+transaction serializes with all other writers. Accesses are recorded in
+memory instead and a background thread writes them in one batched UPDATE
+every FILE_ACCESS_FLUSH_SECONDS, so files.last_accessed lags reads by at most
+that long (plus one flush). A flush also happens early once
+FILE_ACCESS_MAX_PENDING files are pending, and when the tracker stops.
+"""
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict
+
+from app.db import crud
+from app.db.base import SessionLocal
+
+FILE_ACCESS_FLUSH_SECONDS = float(os.getenv("FILE_ACCESS_FLUSH_SECONDS", "30"))
+FILE_ACCESS_MAX_PENDING = int(os.getenv("FILE_ACCESS_MAX_PENDING", "10000"))
+
+
+class FileAccessTracker:
+    """
+    Accumulates file access times and flushes them periodically.
+
+    Args:
+        session_factory: Callable returning a new SQLAlchemy session
+        flush_seconds: Maximum time an access stays in memory
+        max_pending: Number of pending files that triggers an early flush
+    """
+
+    def __init__(self, session_factory: Callable, flush_seconds: float = FILE_ACCESS_FLUSH_SECONDS, max_pending: int = FILE_ACCESS_MAX_PENDING):
+        self.session_factory = session_factory
+        self.flush_seconds = flush_seconds
+        self.max_pending = max(1, max_pending)
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._stats = {"recorded": 0, "flushes": 0, "rows_updated": 0}
+
+    def record(self, file_id: int) -> None:
+        """Record an access to a file now; only the latest access per file is kept."""
+        with self._lock:
+            self._pending[file_id] = datetime.utcnow()
+            self._stats["recorded"] += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write the pending accesses. Returns the number of rows updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            db = self.session_factory()
+            try:
+                updated = crud.record_file_accesses(db, pending)
+            except Exception as e:
+                print(f"File access flush failed: {str(e)}")
+                # Put the accesses back unless newer ones were recorded meanwhile
+                with self._lock:
+                    for file_id, accessed_at in pending.items():
+                        if self._pending.get(file_id, accessed_at) <= accessed_at:
+                            self._pending[file_id] = accessed_at
+                return 0
+            finally:
+                db.close()
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["rows_updated"] += updated
+        return updated
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="file-access-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flush thread and write what is still pending."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def metrics(self) -> Dict[str, int]:
+        """Pending accesses and flush counters."""
+        with self._lock:
+            return {"pending": len(self._pending), **self._stats}
+
+
+file_access_tracker = FileAccessTracker(SessionLocal)
@@ -0,0 +1,231 @@
+# app/services/job_queue.py
+"""
+Persistent background queue for agent runs.
+
+Jobs are rows in the agent_jobs table, so they survive restarts and are
+shared by every worker process. Each process runs a fixed pool of worker
+threads that claim queued jobs in priority order with an atomic conditional
+update, which bounds the number of agent runs executing at once per process.
+Running jobs are heartbeated; jobs whose heartbeat is older than
+JOB_STALE_SECONDS (their process died) are put back in the queue, or failed
+once they have been attempted JOB_MAX_ATTEMPTS times.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.exc import OperationalError
+
+from app.db import crud
+from app.db.models import AgentJob
+
+AGENT_JOB_CONCURRENCY = int(os.getenv("AGENT_JOB_CONCURRENCY", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Seconds between queue polls when no submit wakes the workers
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+# Running jobs without a heartbeat for this long are considered abandoned
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "90"))
+
+
+class JobQueue:
+    """
+    Worker pool executing queued agent jobs.
+
+    Args:
+        session_factory: Callable returning a new SQLAlchemy session
+        runner: Callable taking an AgentJob and returning the JSON-serializable result
+        concurrency: Number of worker threads (maximum concurrent runs)
+    """
+
+    def __init__(self, session_factory: Callable, runner: Callable[[AgentJob], Dict[str, Any]], concurrency: int = AGENT_JOB_CONCURRENCY):
+        self.session_factory = session_factory
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._running = 0
+        self._active = set()  # IDs of the jobs running in this process
+        self._stats = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "wait_seconds_total": 0.0,
+            "run_seconds_total": 0.0,
+            "max_wait_seconds": 0.0
+        }
+
+    def start(self) -> Dict[str, int]:
+        """Recover abandoned jobs and start the workers and the heartbeat."""
+        if self._workers:
+            return {"requeued": 0, "failed": 0}
+        try:
+            recovered = self.recover_stale_jobs()
+        except OperationalError as e:
+            # Usually an unmigrated database; the workers pick up jobs once the tables exist
+            print(f"Job queue recovery failed, run `alembic upgrade head` if the agent_jobs table is missing: {str(e)}")
+            recovered = {"requeued": 0, "failed": 0}
+
+        self._stopping.clear()
+        for index in range(self.concurrency):
+            worker = threading.Thread(target=self._work, name=f"agent-job-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        heartbeat = threading.Thread(target=self._heartbeat, name="agent-job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._workers.append(heartbeat)
+        return recovered
+
+    def recover_stale_jobs(self, stale_seconds: float = JOB_STALE_SECONDS) -> Dict[str, int]:
+        """Requeue running jobs whose worker stopped heartbeating."""
+        db = self.session_factory()
+        try:
+            recovered = crud.requeue_stale_jobs(
+                db, JOB_MAX_ATTEMPTS, datetime.utcnow() - timedelta(seconds=stale_seconds)
+            )
+        finally:
+            db.close()
+        if recovered["requeued"] or recovered["failed"]:
+            print(f"Job queue recovered {recovered['requeued']} abandoned jobs ({recovered['failed']} failed)")
+            self._wake.set()
+        return recovered
+
+    def _heartbeat(self) -> None:
+        while not self._stopping.wait(JOB_HEARTBEAT_SECONDS):
+            with self._lock:
+                active = list(self._active)
+            try:
+                db = self.session_factory()
+                try:
+                    crud.heartbeat_jobs(db, active, self.worker_id)
+                finally:
+                    db.close()
+                self.recover_stale_jobs()
+            except Exception as e:
+                print(f"Job queue heartbeat failed: {str(e)}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the workers.
+
+        Workers finish the job they are running; a job still running after the
+        timeout stays "running" in the database and is requeued once its
+        heartbeat goes stale.
+        """
+        self._stopping.set()
+        self._wake.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def submit(self, kind: str, query: str, thread_id: str, priority: int = 0, options: Optional[Dict[str, Any]] = None) -> AgentJob:
+        """Persist a new job and wake a worker."""
+        db = self.session_factory()
+        try:
+            job = crud.create_job(
+                db,
+                job_id=str(uuid.uuid4()),
+                kind=kind,
+                query=query,
+                thread_id=thread_id,
+                priority=priority,
+                payload=json.dumps(options or {})
+            )
+        finally:
+            db.close()
+        with self._lock:
+            self._stats["submitted"] += 1
+        self._wake.set()
+        return job
+
+    def _work(self) -> None:
+        failing = False
+        while not self._stopping.is_set():
+            db = self.session_factory()
+            try:
+                job = crud.claim_next_job(db, self.worker_id)
+                failing = False
+            except Exception as e:
+                # Reported once per outage rather than on every poll
+                if not failing:
+                    print(f"Job queue claim failed: {str(e)}")
+                failing = True
+                job = None
+            finally:
+                db.close()
+
+            if job is None:
+                self._wake.wait(JOB_POLL_INTERVAL)
+                self._wake.clear()
+                continue
+
+            # Other workers may be idle while the queue still has jobs
+            self._wake.set()
+            self._execute(job)
+
+    def _execute(self, job: AgentJob) -> None:
+        wait_seconds = (job.started_at - job.created_at).total_seconds() if job.created_at else 0.0
+        with self._lock:
+            self._running += 1
+            self._active.add(job.id)
+            self._stats["wait_seconds_total"] += wait_seconds
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait_seconds)
+
+        started = time.perf_counter()
+        status, result, error = "succeeded", None, None
+        try:
+            result = json.dumps(self.runner(job), default=str)
+        except Exception as e:
+            print(f"Agent job {job.id} failed with error: {str(e)}")
+            status, error = "failed", str(e)
+
+        db = self.session_factory()
+        try:
+            if not crud.finish_job(db, job.id, status, result=result, error=error, worker_id=self.worker_id):
+                print(f"Agent job {job.id} was reassigned while running; result discarded")
+        finally:
+            db.close()
+
+        with self._lock:
+            self._running -= 1
+            self._active.discard(job.id)
+            self._stats[status] += 1
+            self._stats["run_seconds_total"] += time.perf_counter() - started
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth per priority, job counts by status, and wait/run times."""
+        db = self.session_factory()
+        try:
+            by_status = crud.count_jobs_by_status(db)
+            depth_by_priority = crud.count_queued_by_priority(db)
+        finally:
+            db.close()
+        with self._lock:
+            stats = dict(self._stats)
+            running = self._running
+        finished = stats["succeeded"] + stats["failed"]
+        started = finished + running
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "workers_alive": sum(worker.is_alive() for worker in self._workers[:self.concurrency]),
+            "running": running,
+            "queue_depth": by_status.get("queued", 0),
+            "queue_depth_by_priority": {str(priority): count for priority, count in sorted(depth_by_priority.items(), reverse=True)},
+            "jobs_by_status": by_status,
+            "submitted": stats["submitted"],
+            "succeeded": stats["succeeded"],
+            "failed": stats["failed"],
+            "avg_wait_seconds": round(stats["wait_seconds_total"] / started, 3) if started else 0.0,
+            "max_wait_seconds": round(stats["max_wait_seconds"], 3),
+            "avg_run_seconds": round(stats["run_seconds_total"] / finished, 3) if finished else 0.0,
+            "timestamp": datetime.utcnow().isoformat()
+        }
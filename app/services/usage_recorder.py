@@ -0,0 +1,171 @@
+# app/services/usage_recorder.py
+"""
+Batched recording of agent usage.
+
+Runs report their usage to the recorder, which queues it in memory. A
+background thread writes the queue every USAGE_FLUSH_SECONDS (or as soon as
+USAGE_BATCH_SIZE rows are waiting) with one batched insert, which also adds
+the rows to the hourly and daily usage_rollups. Batches that fail on a
+transient database error (lock timeout, lost connection) are retried on the
+next flush; beyond USAGE_MAX_PENDING queued rows the oldest are dropped, so a
+database outage cannot grow the queue without bound. A batch that fails for
+any other reason is written one row at a time and the rows that still fail
+are dropped, so one bad row cannot hold back every row queued behind it.
+"""
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy.exc import DisconnectionError, OperationalError, TimeoutError as PoolTimeoutError
+
+from app.db import crud
+from app.db.base import SessionLocal
+from app.db.schemas import UsageCreate
+
+USAGE_FLUSH_SECONDS = float(os.getenv("USAGE_FLUSH_SECONDS", "5"))
+USAGE_BATCH_SIZE = int(os.getenv("USAGE_BATCH_SIZE", "500"))
+USAGE_MAX_PENDING = int(os.getenv("USAGE_MAX_PENDING", "100000"))
+
+# Errors worth retrying the whole batch for: the database is busy or unreachable, not the rows wrong
+TRANSIENT_ERRORS = (OperationalError, DisconnectionError, PoolTimeoutError)
+
+
+class UsageRecorder:
+    """
+    Queue of usage rows written in batches by a background thread.
+
+    Args:
+        session_factory: Callable returning a new SQLAlchemy session
+        flush_seconds: Maximum time a row waits in the queue
+        batch_size: Rows written per insert (and queue length that triggers an early flush)
+        max_pending: Maximum number of queued rows
+    """
+
+    def __init__(self, session_factory: Callable, flush_seconds: float = USAGE_FLUSH_SECONDS, batch_size: int = USAGE_BATCH_SIZE, max_pending: int = USAGE_MAX_PENDING):
+        self.session_factory = session_factory
+        self.flush_seconds = flush_seconds
+        self.batch_size = max(1, batch_size)
+        self._pending = deque(maxlen=max(1, max_pending))
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._stats = {"recorded": 0, "written": 0, "dropped": 0, "rejected": 0, "batches": 0, "failed_batches": 0}
+
+    def record(self, usage: UsageCreate) -> None:
+        """Queue the usage of a run; its timestamp is the time of this call."""
+        if usage.timestamp is None:
+            usage = usage.model_copy(update={"timestamp": datetime.utcnow()})
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._stats["dropped"] += 1
+            self._pending.append(usage)
+            self._stats["recorded"] += 1
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write everything queued, in batches. Returns the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch: List[UsageCreate] = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch:
+                    break
+                db = self.session_factory()
+                try:
+                    crud.create_usages(db, batch)
+                    batch_written, usable = len(batch), True
+                except TRANSIENT_ERRORS as e:
+                    db.rollback()
+                    print(f"Usage flush failed ({len(batch)} rows kept for retry): {str(e)}")
+                    with self._lock:
+                        self._stats["failed_batches"] += 1
+                        self._requeue(batch)
+                    break
+                except Exception as e:
+                    db.rollback()
+                    print(f"Usage flush failed, writing {len(batch)} rows one at a time: {str(e)}")
+                    with self._lock:
+                        self._stats["failed_batches"] += 1
+                    batch_written, usable = self._write_rows(db, batch)
+                finally:
+                    db.close()
+                written += batch_written
+                with self._lock:
+                    self._stats["written"] += batch_written
+                    self._stats["batches"] += 1
+                if not usable:
+                    break
+        return written
+
+    def _write_rows(self, db, batch: List[UsageCreate]) -> Tuple[int, bool]:
+        """
+        Write a failed batch one row at a time, dropping the rows that fail.
+
+        Returns the number of rows written and whether the database is still
+        usable; on a transient error the unwritten rows are queued for retry.
+        """
+        written = 0
+        for index, usage in enumerate(batch):
+            try:
+                crud.create_usages(db, [usage])
+            except TRANSIENT_ERRORS as e:
+                db.rollback()
+                print(f"Usage flush failed ({len(batch) - index} rows kept for retry): {str(e)}")
+                with self._lock:
+                    self._requeue(batch[index:])
+                return written, False
+            except Exception as e:
+                db.rollback()
+                print(f"Dropping usage row of run {usage.run_id}: {str(e)}")
+                with self._lock:
+                    self._stats["rejected"] += 1
+                continue
+            written += 1
+        return written, True
+
+    def _requeue(self, batch: List[UsageCreate]) -> None:
+        """Put unwritten rows back at the front, keeping order (call with self._lock held)."""
+        # The oldest go first if the queue is full
+        for position, usage in enumerate(reversed(batch)):
+            if len(self._pending) == self._pending.maxlen:
+                self._stats["dropped"] += len(batch) - position
+                break
+            self._pending.appendleft(usage)
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="usage-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flush thread and write what is still queued."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def metrics(self) -> Dict[str, int]:
+        """Queued rows and write counters."""
+        with self._lock:
+            return {"pending": len(self._pending), **self._stats}
+
+
+usage_recorder = UsageRecorder(SessionLocal)
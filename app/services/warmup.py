@@ -0,0 +1,153 @@
+# app/services/warmup.py
+"""
+Startup warm-up and readiness.
+
+Since importing the app does no heavy work (see get_python_executor,
+get_dataset and get_science_agent), the first request would pay for all of
+it. The warm-up does that work in a background thread at startup, so
+/healthz answers at once while /readyz reports ready only once every step has
+run. The steps are:
+
+- executor: create the Python executor (venv check, package installation) and
+  run one snippet importing numpy, pandas and matplotlib, so the interpreter,
+  the packages and their byte code are in the page cache
+- dataset: scan the uploads directory for the dataset catalog
+- llm_pool: open a connection in the OpenAI client's pool (GET /models)
+- graph: compile the agent graph and build both model chains
+
+A failed step is reported on /readyz and does not block readiness; the work
+is retried on first use. WARMUP_ENABLED=false skips the warm-up (ready at
+once) and WARMUP_PRIME_LLM=false skips the model request.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.telemetry import span
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_PRIME_LLM = os.getenv("WARMUP_PRIME_LLM", "true").lower() in ("1", "true", "yes")
+
+EXECUTOR_WARMUP_CODE = """
+import numpy
+import pandas
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot
+print("warm")
+"""
+
+
+def warm_executor() -> None:
+    from src.agent.tools import get_python_executor
+
+    executor = get_python_executor()
+    result = executor.execute_code(EXECUTOR_WARMUP_CODE)
+    executor.clear_plots_directory(specific_exec_id=result["execution_id"])
+    if not result["success"]:
+        raise RuntimeError(result["stderr"][-500:])
+
+
+def warm_dataset() -> None:
+    from src.agent.agent import get_dataset
+
+    get_dataset()
+
+
+def warm_llm_pool() -> None:
+    from src.openai_tool.provider import get_openai_client
+
+    get_openai_client().models.list()
+
+
+def warm_graph() -> None:
+    from app.api.endpoints.agent import get_science_agent
+    from src.agent.agent import create_agent
+
+    get_science_agent()
+    create_agent()
+    create_agent(final_answer=True)
+
+
+def default_steps() -> List[Tuple[str, Callable[[], None]]]:
+    steps = [("executor", warm_executor), ("dataset", warm_dataset)]
+    if WARMUP_PRIME_LLM:
+        steps.append(("llm_pool", warm_llm_pool))
+    steps.append(("graph", warm_graph))
+    return steps
+
+
+class WarmupService:
+    """
+    Runs the warm-up steps in a background thread and tracks readiness.
+
+    Args:
+        steps: (name, function) pairs run in order; defaults to default_steps()
+        enabled: Whether to warm up at all (when False the service is ready at start)
+    """
+
+    def __init__(self, steps: Optional[List[Tuple[str, Callable[[], None]]]] = None, enabled: bool = WARMUP_ENABLED):
+        self.steps = steps
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._thread = None
+        self._state = "idle"  # idle, warming, ready, stopping
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._results: Dict[str, Dict[str, Any]] = {}
+
+    def start(self) -> None:
+        """Start warming up in the background (or become ready at once when disabled)."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            self._started_at = time.time()
+            if not self.enabled:
+                self._state, self._finished_at = "ready", self._started_at
+                return
+            self._state = "warming"
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Report not ready while the app shuts down."""
+        with self._lock:
+            self._state = "stopping"
+
+    def _run(self) -> None:
+        for name, step in self.steps or default_steps():
+            started = time.perf_counter()
+            try:
+                with span("warmup", name):
+                    step()
+                result = {"status": "ok"}
+            except Exception as e:
+                print(f"Warm-up step {name} failed: {str(e)}")
+                result = {"status": "error", "error": str(e)}
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            with self._lock:
+                self._results[name] = result
+        with self._lock:
+            self._finished_at = time.time()
+            if self._state == "warming":
+                self._state = "ready"
+        print(f"Warm-up finished in {self._finished_at - self._started_at:.1f}s")
+
+    @property
+    def ready(self) -> bool:
+        return self._state == "ready"
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness and the outcome and duration of every warm-up step."""
+        with self._lock:
+            finished = self._finished_at or time.time()
+            return {
+                "ready": self._state == "ready",
+                "state": self._state,
+                "warmup_seconds": round(finished - self._started_at, 3) if self._started_at else None,
+                "steps": dict(self._results)
+            }
+
+
+warmup_service = WarmupService()
@@ -0,0 +1,107 @@
+# benchmarks/bench_agent_e2e.py
+"""
+End-to-end latency of /api/agent/run against the OpenAI stub.
+
+Starts src.openai_tool.stub_server and the API (uvicorn, one worker, on a
+throwaway SQLite database migrated with alembic) and times sequential agent
+runs over HTTP. With the stub's latency at 0 this measures everything the app
+adds around the model: graph steps, tool calls, code execution, result
+extraction and persistence.
+Run from the repository root with:
+
+    python -m benchmarks.bench_agent_e2e --runs 10 --latency-ms 0
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_multiworker import start, stop, wait_ready
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(runs: int = 10, port: int = 8020, stub_port: int = 8021, latency_ms: int = 0, timeout: float = 120):
+    """Time sequential agent runs and return the latency summary in milliseconds."""
+    workdir = tempfile.mkdtemp(prefix="bench_agent_e2e_")
+    stub_url = f"http://127.0.0.1:{stub_port}/v1"
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": stub_url,
+        "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "EXPLAIN_CACHE_PATH": f"{workdir}/explain_cache.db"
+    }
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], env=env, check=True, capture_output=True)
+    stub = start(
+        [sys.executable, "-m", "src.openai_tool.stub_server", "--port", str(stub_port), "--latency-ms", str(latency_ms)],
+        env, "/tmp/bench_agent_e2e_stub.log"
+    )
+    server = None
+    try:
+        wait_ready(f"{stub_url}/models", 30)
+        server = start(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+            env, "/tmp/bench_agent_e2e.log"
+        )
+        base = f"http://127.0.0.1:{port}"
+        wait_ready(f"{base}/readyz", timeout)
+
+        latencies, errors = [], 0
+        with httpx.Client(base_url=base, timeout=timeout) as client:
+            for i in range(runs + 1):
+                started = time.perf_counter()
+                response = client.post("/api/agent/run", json={"query": f"analyze dataset {i}"})
+                elapsed = (time.perf_counter() - started) * 1000
+                # The first run shows what the warm-up left cold and is reported separately
+                if i == 0:
+                    first = elapsed
+                    continue
+                if response.status_code != 200:
+                    errors += 1
+                latencies.append(elapsed)
+        return {
+            "runs": runs,
+            "first_run_ms": round(first, 1),
+            "p50_ms": round(statistics.median(latencies), 1),
+            "p95_ms": round(percentile(latencies, 0.95), 1),
+            "mean_ms": round(statistics.mean(latencies), 1),
+            "errors": errors
+        }
+    finally:
+        if server is not None:
+            stop(server)
+        stop(stub)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def collect(quick: bool = True):
+    """Metrics for benchmarks.runner."""
+    row = run(runs=5 if quick else 20)
+    return {name: value for name, value in row.items() if name != "runs"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end agent run latency against the OpenAI stub")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8020)
+    parser.add_argument("--stub-port", type=int, default=8021)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Stub latency per LLM call")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.runs, args.port, args.stub_port, args.latency_ms, args.timeout)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bench_crud.py
+"""
+Benchmark the app.db.crud operations behind the file and usage endpoints.
+
+Runs each operation in a loop against a throwaway SQLite database created with
+app.db.base.make_engine (the same pragmas as the app) and reports the mean
+time per call. Run with:
+
+    python -m benchmarks.bench_crud --files 2000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy.orm import sessionmaker
+
+from app.db import crud
+from app.db.base import make_engine
+from app.db.models import Base
+from app.db.schemas import FileCreate, FileUpdate, UsageCreate
+
+
+def time_per_call(func, calls: int) -> float:
+    """Mean wall time per call in milliseconds."""
+    started = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - started) / calls * 1000
+
+
+def usage(i: int) -> UsageCreate:
+    return UsageCreate(
+        run_id=f"bench-{i}-{random.getrandbits(32):x}",
+        input_tokens=1200,
+        output_tokens=300,
+        total_tokens=1500,
+        model_name="gpt-4o",
+        cost=0.01,
+        steps=4,
+        timestamp=datetime(2024, 1, 1) + timedelta(minutes=i)
+    )
+
+
+def run(files: int = 2000, usage_batches: int = 20, batch_size: int = 500):
+    """Time each crud operation and return {operation: ms per call}."""
+    workdir = tempfile.mkdtemp(prefix="bench_crud_")
+    engine = make_engine(f"sqlite:///{workdir}/bench.db")
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    path = os.path.join(workdir, "data.csv")
+    with open(path, "w") as f:
+        f.write("a,b\n1,2\n")
+    upload = SimpleNamespace(filename="data.csv")
+
+    try:
+        results = {}
+        results["create_file_ms"] = time_per_call(
+            lambda i: crud.create_file(db, FileCreate(original_filename="data.csv"), upload, path), files
+        )
+        ids = list(range(1, files + 1))
+        results["get_file_ms"] = time_per_call(lambda i: crud.get_file(db, random.choice(ids)), files)
+        results["update_file_ms"] = time_per_call(
+            lambda i: crud.update_file(db, random.choice(ids), FileUpdate(is_processed=True)), files // 4
+        )
+
+        state = {"cursor": None}
+
+        def page(i):
+            _, state["cursor"] = crud.list_files(db, limit=50, cursor=state["cursor"])
+
+        results["list_files_page_ms"] = time_per_call(page, files // 50)
+        results["count_files_ms"] = time_per_call(lambda i: crud.count_files(db), 200)
+
+        results["create_usages_batch_ms"] = time_per_call(
+            lambda i: crud.create_usages(db, [usage(i * batch_size + j) for j in range(batch_size)]), usage_batches
+        )
+        results["create_usage_ms"] = time_per_call(lambda i: crud.create_usage(db, usage(10 ** 6 + i)), 200)
+        results["get_total_usage_ms"] = time_per_call(lambda i: crud.get_total_usage(db), 50)
+        results["usage_rows_per_s"] = batch_size / (results["create_usages_batch_ms"] / 1000)
+        return {name: round(value, 3) for name, value in results.items()}
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def collect(quick: bool = True):
+    """Metrics for benchmarks.runner."""
+    return run(files=500 if quick else 5000, usage_batches=5 if quick else 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark database crud operations")
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--usage-batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    for operation, value in run(args.files, args.usage_batches, args.batch_size).items():
+        print(json.dumps({"operation": operation, "value": value}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/bench_db_concurrency.py
+"""
+Concurrency benchmark for the database layer.
+
+Runs a mixed workload (reads of the file listing, usage inserts) from many
+threads against a throwaway SQLite database, once with SQLite's defaults
+(rollback journal, synchronous=FULL, as the app used before) and once with
+app.db.base.make_engine (WAL, synchronous=NORMAL, busy timeout, mmap). It
+reports throughput, latency percentiles and "database is locked" errors.
+Run with:
+
+    python -m benchmarks.bench_db_concurrency --threads 16 --seconds 5 --write-ratio 0.2
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db import crud
+from app.db.base import make_engine
+from app.db.models import Base, File, FileCount, Usage
+
+
+def seed(engine, files: int = 5000) -> None:
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(File), [{
+            "filename": f"{i}_data.csv",
+            "original_filename": f"data_{i}.csv",
+            "file_path": f"src/data/uploads/data_{i}.csv",
+            "file_size": 1.0,
+            "file_type": "csv",
+            "uploaded_at": datetime(2024, 1, 1, 0, i // 60 % 60, i % 60),
+            "is_processed": False
+        } for i in range(files)])
+        connection.execute(insert(FileCount), [{"file_type": "csv", "count": files}])
+
+
+def usage_row() -> dict:
+    return {"run_id": f"bench-{random.getrandbits(48):x}", "input_tokens": 1200, "output_tokens": 300, "total_tokens": 1500}
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 2)
+
+
+def summarize(name: str, reads, writes, errors: int, elapsed: float) -> dict:
+    return {
+        "config": name,
+        "ops_per_s": round((len(reads) + len(writes)) / elapsed, 1),
+        "read_p50_ms": percentile(reads, 0.5),
+        "read_p99_ms": percentile(reads, 0.99),
+        "write_p50_ms": percentile(writes, 0.5),
+        "write_p99_ms": percentile(writes, 0.99),
+        "locked_errors": errors
+    }
+
+
+def run_threads(name: str, engine, threads: int, seconds: float, write_ratio: float) -> dict:
+    session_factory = sessionmaker(bind=engine)
+    reads, writes, errors = [], [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        local_reads, local_writes, local_errors = [], [], 0
+        while time.perf_counter() < deadline:
+            is_write = random.random() < write_ratio
+            started = time.perf_counter()
+            db = session_factory()
+            try:
+                if is_write:
+                    db.execute(insert(Usage).values(**usage_row()))
+                    db.commit()
+                else:
+                    crud.list_files(db, limit=50)
+                    crud.count_files(db)
+            except OperationalError:
+                local_errors += 1
+                db.rollback()
+                continue
+            finally:
+                db.close()
+            (local_writes if is_write else local_reads).append(time.perf_counter() - started)
+        with lock:
+            reads.extend(local_reads)
+            writes.extend(local_writes)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return summarize(name, reads, writes, errors[0], time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database concurrency benchmark")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    configs = {
+        # The previous app/db/base.py settings (pysqlite's default 5 s lock timeout)
+        "sqlite defaults": lambda url: create_engine(url, connect_args={"check_same_thread": False}),
+        "tuned (make_engine)": make_engine
+    }
+    for index, (name, factory) in enumerate(configs.items()):
+        path = os.path.join(directory, f"bench_{index}.db")
+        engine = factory(f"sqlite:///{path}")
+        seed(engine)
+        print(json.dumps(run_threads(name, engine, args.threads, args.seconds, args.write_ratio)))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
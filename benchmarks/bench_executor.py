@@ -0,0 +1,97 @@
+# benchmarks/bench_executor.py
+"""
+Benchmark SimplePythonExecutor.execute_code, cold and warm.
+
+Cold is a new executor (as created at import by src/agent/tools.py, without
+package installation) plus its first execution; warm is the median of the
+executions that follow. Each is measured for a trivial snippet (process
+spawn and interpreter start) and for a typical pandas + matplotlib analysis
+with one saved plot. Run with:
+
+    python -m benchmarks.bench_executor --repeat 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from src.python_executor.simple_python_executor import SimplePythonExecutor
+
+SNIPPETS = {
+    "trivial": "print('ok')\n",
+    "pandas_plot": (
+        "import numpy as np\n"
+        "import pandas as pd\n"
+        "import matplotlib\n"
+        "matplotlib.use('Agg')\n"
+        "import matplotlib.pyplot as plt\n"
+        "df = pd.DataFrame({'x': np.arange(10000), 'y': np.random.default_rng(0).normal(size=10000)})\n"
+        "print(df.describe())\n"
+        "df.plot(x='x', y='y')\n"
+        "plt.savefig('{plot_dir}/bench_plot.png')\n"
+    )
+}
+
+
+def new_executor(plots_dir: str) -> SimplePythonExecutor:
+    return SimplePythonExecutor(
+        venv_path=os.path.join(os.getcwd(), "venvs"),
+        auto_install=False,
+        plots_dir=plots_dir
+    )
+
+
+def run(repeat: int = 5):
+    """Time cold and warm executions of each snippet and return the results."""
+    results = []
+    for name, snippet in SNIPPETS.items():
+        plots_dir = tempfile.mkdtemp(prefix="bench_executor_")
+        code = snippet.replace("{plot_dir}", plots_dir)
+        try:
+            started = time.perf_counter()
+            executor = new_executor(plots_dir)
+            result = executor.execute_code(code)
+            cold = time.perf_counter() - started
+            if not result["success"]:
+                raise RuntimeError(f"{name} failed: {result['stderr']}")
+
+            warm = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                executor.execute_code(code)
+                warm.append(time.perf_counter() - started)
+            executor.cleanup()
+        finally:
+            shutil.rmtree(plots_dir, ignore_errors=True)
+        results.append({
+            "snippet": name,
+            "cold_ms": round(cold * 1000, 1),
+            "warm_ms": round(statistics.median(warm) * 1000, 1),
+            "warm_min_ms": round(min(warm) * 1000, 1)
+        })
+    return results
+
+
+def collect(quick: bool = True):
+    """Metrics for benchmarks.runner."""
+    metrics = {}
+    for row in run(repeat=3 if quick else 10):
+        metrics[f"{row['snippet']}.cold_ms"] = row["cold_ms"]
+        metrics[f"{row['snippet']}.warm_ms"] = row["warm_ms"]
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold and warm code execution")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for row in run(args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
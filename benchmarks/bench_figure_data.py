@@ -0,0 +1,73 @@
+# benchmarks/bench_figure_data.py
+"""
+Benchmark figure-data extraction for the JSON sidecars written by the executor.
+
+Times extract_figure_data on common plot types and compares the sidecar size
+with the PNG payload a vision call would send. Run with:
+
+    python -m benchmarks.bench_figure_data
+"""
+import json
+import os
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from src.python_executor.figure_data import extract_figure_data
+
+
+def make_figures():
+    """Yield (name, figure) pairs for typical analysis plots."""
+    rng = np.random.default_rng(0)
+
+    fig, ax = plt.subplots()
+    xs = np.linspace(0, 10, 10_000)
+    for i in range(3):
+        ax.plot(xs, np.sin(xs * (i + 1)), label=f"series {i}")
+    ax.legend()
+    yield "line_3x10k", fig
+
+    fig, ax = plt.subplots()
+    ax.scatter(rng.normal(size=5000), rng.normal(size=5000), s=3)
+    yield "scatter_5k", fig
+
+    fig, ax = plt.subplots()
+    ax.hist(rng.normal(size=100_000), bins=50)
+    yield "histogram_50", fig
+
+    fig, ax = plt.subplots()
+    ax.bar([f"group {i}" for i in range(12)], rng.integers(1, 100, size=12))
+    yield "bar_12", fig
+
+
+def run():
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fig in make_figures():
+            path = os.path.join(tmp, f"{name}.png")
+            fig.savefig(path)
+            started = time.perf_counter()
+            data = extract_figure_data(fig)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            results.append({
+                "plot": name,
+                "extract_ms": round(elapsed_ms, 2),
+                "sidecar_bytes": len(json.dumps(data, separators=(",", ":"))),
+                "png_bytes": os.path.getsize(path),
+                "complete": data["complete"]
+            })
+            plt.close(fig)
+    return results
+
+
+def main():
+    for row in run():
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_file_listing.py
+"""
+Benchmark the /api/files listing queries on a large files table.
+
+Seeds a throwaway SQLite database with N file rows (schema from app.db.models,
+including the listing indexes) and times, at increasing page depths, the old
+OFFSET pagination against keyset pagination (crud.list_files), with and without
+a type filter, plus COUNT(*) against crud.count_files. Run with:
+
+    python -m benchmarks.bench_file_listing --rows 1000000 --page-size 100
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import crud
+from app.db.models import Base, File, FileCount
+
+FILE_TYPES = ("csv", "xlsx", "xls")
+
+
+def seed(session, rows: int, batch: int = 50000) -> None:
+    """Insert rows files, one second apart, and their per-type counts."""
+    start = datetime(2024, 1, 1)
+    counts = dict.fromkeys(FILE_TYPES, 0)
+    for offset in range(0, rows, batch):
+        values = []
+        for i in range(offset, min(rows, offset + batch)):
+            file_type = FILE_TYPES[i % len(FILE_TYPES)]
+            counts[file_type] += 1
+            values.append({
+                "filename": f"{i}_data.{file_type}",
+                "original_filename": f"data_{i}.{file_type}",
+                "file_path": f"src/data/uploads/data_{i}.{file_type}",
+                "file_size": 12.5,
+                "file_type": file_type,
+                "description": f"Dataset {i}",
+                "uploaded_at": start + timedelta(seconds=i),
+                "is_processed": False
+            })
+        session.execute(insert(File), values)
+    session.execute(insert(FileCount), [{"file_type": t, "count": c} for t, c in counts.items()])
+    session.commit()
+
+
+def timed(fn, repeat: int) -> float:
+    """Best of repeat runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 3)
+
+
+def keyset_page(session, depth: int, page_size: int, file_type=None) -> str:
+    """Cursor of the page starting at row depth (the row before it, in listing order)."""
+    query = session.query(File.uploaded_at, File.id)
+    if file_type:
+        query = query.filter(File.file_type == file_type)
+    row = query.order_by(File.uploaded_at.desc(), File.id.desc()).offset(depth - 1).limit(1).one()
+    return crud.encode_file_cursor(row.uploaded_at, row.id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="File listing pagination benchmark")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_files.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    started = time.perf_counter()
+    seed(session, args.rows)
+    print(json.dumps({"rows": args.rows, "seed_s": round(time.perf_counter() - started, 2)}))
+
+    depths = [d for d in (1, 1000, 10000, 100000, 500000, args.rows - args.page_size) if 0 < d <= args.rows - args.page_size]
+    for file_type in (None, "csv"):
+        for depth in sorted(set(depths)):
+            if file_type and depth > args.rows // len(FILE_TYPES) - args.page_size:
+                continue
+            cursor = keyset_page(session, depth, args.page_size, file_type) if depth > 1 else None
+
+            def offset_query():
+                query = session.query(File)
+                if file_type:
+                    query = query.filter(File.file_type == file_type)
+                query.order_by(File.uploaded_at.desc(), File.id.desc()).offset(depth).limit(args.page_size).all()
+
+            def keyset_query():
+                crud.list_files(session, limit=args.page_size, cursor=cursor, file_type=file_type)
+
+            print(json.dumps({
+                "file_type": file_type,
+                "depth": depth,
+                "offset_ms": timed(offset_query, args.repeat),
+                "keyset_ms": timed(keyset_query, args.repeat)
+            }))
+            session.expunge_all()
+
+    print(json.dumps({
+        "count_star_ms": timed(lambda: session.query(func.count(File.id)).scalar(), args.repeat),
+        "count_files_ms": timed(lambda: crud.count_files(session), args.repeat),
+        "count_files": crud.count_files(session)
+    }))
+    session.close()
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
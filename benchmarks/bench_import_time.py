@@ -0,0 +1,113 @@
+# benchmarks/bench_import_time.py
+"""
+Import-time budget check for app.main.
+
+Imports the app in fresh interpreters (without OPENAI_API_KEY, which importing
+must not need) and reports the median import time and the slowest modules
+from python -X importtime. It also checks that importing did none of the
+startup work that is deferred to first use: no Python executor (venv checks
+and package installation), no dataset scan, no compiled agent graph, no
+OpenAI client, and no pandas or matplotlib import. Exits with status 1 when
+the median exceeds the budget or a check fails. Run from the repository root
+with:
+
+    python -m benchmarks.bench_import_time --budget-ms 4000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+
+import app.api.endpoints.agent as endpoints
+import src.agent.agent as agent
+import src.agent.tools as tools
+import src.openai_tool.provider as provider
+
+side_effects = []
+if tools._python_executor is not None:
+    side_effects.append("python executor created")
+if agent._dataset is not None:
+    side_effects.append("dataset scanned")
+if endpoints._science_agent is not None:
+    side_effects.append("agent graph compiled")
+if provider._clients:
+    side_effects.append("OpenAI clients created: " + ", ".join(sorted(provider._clients)))
+for module in ("pandas", "matplotlib.pyplot"):
+    if module in sys.modules:
+        side_effects.append(module + " imported")
+print(json.dumps({"seconds": elapsed, "side_effects": side_effects}))
+"""
+
+
+def child_env():
+    env = {key: value for key, value in os.environ.items() if not key.startswith("OPENAI_")}
+    env["PYTHONPATH"] = os.getcwd()
+    return env
+
+
+def import_once():
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], env=child_env(), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_modules(top: int):
+    """The modules with the largest own import time, from -X importtime."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=child_env(), capture_output=True, text=True, check=True
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [field.strip() for field in line[len("import time:"):].split("|")]
+        modules.append({"module": name, "cumulative_ms": round(int(cumulative_us) / 1000, 1), "self_ms": round(int(self_us) / 1000, 1)})
+    return sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:top]
+
+
+def run(repeat: int = 5):
+    """Import the app repeat times and return the timings and side effects."""
+    runs = [import_once() for _ in range(repeat)]
+    seconds = [r["seconds"] for r in runs]
+    side_effects = sorted({effect for r in runs for effect in r["side_effects"]})
+    return {
+        "import_ms": round(statistics.median(seconds) * 1000, 1),
+        "import_min_ms": round(min(seconds) * 1000, 1),
+        "side_effects": side_effects
+    }
+
+
+def collect(quick: bool = True):
+    """Metrics for benchmarks.runner."""
+    row = run(repeat=3 if quick else 10)
+    return {"app_main.import_ms": row["import_ms"], "app_main.side_effects": len(row["side_effects"])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check for app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "4000")))
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list (by self time)")
+    args = parser.parse_args()
+
+    row = run(args.repeat)
+    row["budget_ms"] = args.budget_ms
+    row["within_budget"] = row["import_ms"] <= args.budget_ms
+    print(json.dumps(row))
+    for module in slowest_modules(args.top):
+        print(json.dumps(module))
+    sys.exit(0 if row["within_budget"] and not row["side_effects"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/bench_ingestion.py
+"""
+Benchmark dataset ingestion: the fetch_dataset_info tool and fetch_local_data.
+
+Writes synthetic CSV files of the requested sizes (and XLSX files when
+openpyxl is installed; XLSX is capped at Excel's 1,048,576 rows) to a temporary
+directory and times both readers on each. Every measurement runs in a child
+process, so a reader that runs out of memory on a large file is reported as
+failed (with its exit code) instead of killing the benchmark; the child's peak
+RSS is reported too. Run with:
+
+    python -m benchmarks.bench_ingestion --sizes-mb 10 1024 5120
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+# One synthetic row, about 100 bytes: mixed numeric, categorical and missing values
+ROW_TEMPLATE = "{i},{a:.6f},{b:.6f},{c},group_{g},2024-01-{d:02d},{e}\n"
+HEADER = "id,value_a,value_b,count,category,date,note\n"
+XLSX_MAX_ROWS = 1_048_575
+
+
+def write_csv(path: str, size_mb: float) -> int:
+    """Write a CSV of about size_mb megabytes; returns the number of rows."""
+    target = int(size_mb * 1024 * 1024)
+    chunk = "".join(
+        ROW_TEMPLATE.format(i=i, a=i * 0.37 % 101, b=i * 1.13 % 997, c=i % 50, g=i % 12, d=i % 28 + 1, e="" if i % 9 == 0 else "ok")
+        for i in range(10000)
+    )
+    rows = 0
+    with open(path, "w") as f:
+        f.write(HEADER)
+        written = len(HEADER)
+        while written < target:
+            f.write(chunk)
+            written += len(chunk)
+            rows += 10000
+    return rows
+
+
+def write_xlsx(path: str, csv_path: str) -> int:
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, nrows=XLSX_MAX_ROWS)
+    df.to_excel(path, index=False)
+    return len(df)
+
+
+def _measure(reader: str, directory: str, queue) -> None:
+    # Child process: import the readers here so their import cost is not part of the timing
+    import contextlib
+    import io
+
+    from src.agent.tools import fetch_dataset_info
+    from src.helpers.fetch_local_data import fetch_local_data
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if reader == "fetch_dataset_info":
+            output = fetch_dataset_info.invoke({"dataset_path": directory})
+            ok = not output.startswith("Error") and '"error"' not in output
+        else:
+            output = fetch_local_data(directory)
+            ok = all("error" not in entry for entry in output.values())
+    elapsed = time.perf_counter() - started
+    queue.put({"seconds": elapsed, "ok": ok, "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024})
+
+
+def measure(reader: str, directory: str, timeout: float):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(reader, directory, queue))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.kill()
+        process.join()
+        return {"error": f"timed out after {timeout}s"}
+    if process.exitcode != 0:
+        return {"error": f"exit code {process.exitcode}"}
+    return queue.get()
+
+
+def run(sizes_mb, readers=("fetch_dataset_info", "fetch_local_data"), timeout: float = 1800):
+    """Time each reader on CSV (and XLSX) files of each size and return the results."""
+    try:
+        import openpyxl  # noqa: F401
+        formats = ("csv", "xlsx")
+    except ImportError:
+        print(json.dumps({"xlsx": "skipped, openpyxl is not installed"}))
+        formats = ("csv",)
+
+    results = []
+    root = tempfile.mkdtemp(prefix="bench_ingestion_")
+    try:
+        for size_mb in sizes_mb:
+            csv_dir = os.path.join(root, f"csv_{size_mb}")
+            os.makedirs(csv_dir)
+            csv_path = os.path.join(csv_dir, "data.csv")
+            rows = write_csv(csv_path, size_mb)
+            for file_format in formats:
+                directory, file_rows = csv_dir, rows
+                if file_format == "xlsx":
+                    directory = os.path.join(root, f"xlsx_{size_mb}")
+                    os.makedirs(directory)
+                    file_rows = write_xlsx(os.path.join(directory, "data.xlsx"), csv_path)
+                file_mb = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory)) / 1024 / 1024
+                for reader in readers:
+                    # fetch_dataset_info only reads CSV files
+                    if reader == "fetch_dataset_info" and file_format != "csv":
+                        continue
+                    row = {"reader": reader, "format": file_format, "size_mb": round(file_mb, 1), "rows": file_rows}
+                    outcome = measure(reader, directory, timeout)
+                    if "error" in outcome:
+                        row["error"] = outcome["error"]
+                    else:
+                        row.update({
+                            "seconds": round(outcome["seconds"], 3),
+                            "mb_per_s": round(file_mb / outcome["seconds"], 1),
+                            "peak_rss_mb": round(outcome["peak_rss_mb"], 1),
+                            "ok": outcome["ok"]
+                        })
+                    results.append(row)
+            shutil.rmtree(csv_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def collect(quick: bool = True):
+    """Metrics for benchmarks.runner (10 MB, plus 1 GB and 5 GB in the full suite)."""
+    metrics = {}
+    for row in run([10] if quick else [10, 1024, 5120]):
+        name = f"{row['reader']}.{row['format']}_{int(row['size_mb'])}mb"
+        if "error" in row:
+            metrics[f"{name}.failed"] = 1
+            continue
+        metrics[f"{name}.mb_per_s"] = row["mb_per_s"]
+        metrics[f"{name}.peak_rss_mb"] = row["peak_rss_mb"]
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dataset ingestion")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[10])
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds per measurement")
+    args = parser.parse_args()
+
+    for row in run(args.sizes_mb, timeout=args.timeout):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
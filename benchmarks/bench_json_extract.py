@@ -0,0 +1,91 @@
+# benchmarks/bench_json_extract.py
+"""
+Benchmark the tolerant JSON extractor used as the fallback for the agent's final answer.
+
+Builds large synthetic model outputs (prose with many small brace groups and the
+report object at the end, fenced or inline) and times the extraction. Run with:
+
+    python -m benchmarks.bench_json_extract --sizes 10000 100000 1000000
+"""
+from langchain_core.messages import AIMessage
+import argparse
+import json
+import time
+
+from src.agent.schemas import REPORT_FIELDS
+from src.helpers.json_extract import extract_json_object
+
+REPORT = {
+    "action_plan": [{"step": 1, "description": "Load the data"}],
+    "decisions_and_justifications": [
+        {"decision": "Use a t-test", "justification": "p = 0.012", "tool_used": "execute_python"}
+    ],
+    "observations": ["Mean {x} = 4.2"],
+    "visualizations": [],
+    "summary": "Done.",
+    "next_steps": ["None"],
+    "conclusion": "Significant difference (p < 0.05)."
+}
+
+
+def make_message(size: int, fenced: bool = True) -> str:
+    """Build a message of roughly `size` characters that ends with the report, optionally in a code fence."""
+    filler = 'The fit {slope: 1.2, "r2": 0.98} was checked against {baseline}. '
+    body = filler * max(1, size // len(filler))
+    report = json.dumps(REPORT, indent=2)
+    if fenced:
+        return f"{body}\n```json\n{report}\n```\n"
+    return f"{body}\n{report}\n"
+
+
+def time_call(func, *args, repeat: int = 5) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(sizes, repeat: int = 5):
+    """Time extraction on each message size and return the results."""
+    from app.api.endpoints.agent import extract_final_result
+
+    results = []
+    for size in sizes:
+        for fenced in (True, False):
+            text = make_message(size, fenced)
+            state = {"messages": [AIMessage(content=text)]}
+            assert extract_json_object(text, REPORT_FIELDS) == REPORT
+            results.append({
+                "chars": len(text),
+                "fenced": fenced,
+                "extract_json_object_ms": round(time_call(extract_json_object, text, REPORT_FIELDS, repeat=repeat), 3),
+                "extract_final_result_ms": round(time_call(extract_final_result, state, repeat=repeat), 3)
+            })
+    return results
+
+
+def collect(quick: bool = True):
+    """Metrics for benchmarks.runner."""
+    metrics = {}
+    for row in run([100_000] if quick else [10_000, 100_000, 1_000_000], repeat=3 if quick else 5):
+        name = f"{row['chars'] // 1000}k_{'fenced' if row['fenced'] else 'inline'}"
+        metrics[f"{name}.extract_json_object_ms"] = row["extract_json_object_ms"]
+        metrics[f"{name}.extract_final_result_ms"] = row["extract_final_result_ms"]
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark final answer JSON extraction")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for row in run(args.sizes, args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
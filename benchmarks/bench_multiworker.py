@@ -0,0 +1,219 @@
+# benchmarks/bench_multiworker.py
+"""
+Multi-worker integration check and throughput benchmark for background jobs.
+
+Starts the OpenAI stub and the API with uvicorn --workers N, submits jobs to
+/api/agent/jobs and polls them to completion. For each worker count it checks
+that every job succeeded exactly once (no double claims), that jobs were spread
+over the worker processes and that every reported plot is served, then prints the
+throughput. Before that, it races several claimers for a single queued job,
+round after round, against a file-backed SQLite database with the app's engine
+settings (each claimer has its own connection, as worker processes do) and
+checks that every job was claimed exactly once. Exits non-zero if a check
+fails. Run from the repository root after `alembic upgrade head`:
+
+    python -m benchmarks.bench_multiworker --workers 1 4 --jobs 24
+    python -m benchmarks.bench_multiworker --claims-only    # the claim race alone, in seconds
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+
+def wait_ready(url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def start(cmd, env, log_path):
+    log = open(log_path, "w")
+    return subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def stop(process) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def claim_race(rounds: int = 50, claimers: int = 4):
+    """Race claimers for one queued job per round; every job must be claimed exactly once."""
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db import crud
+    from app.db.base import make_engine
+    from app.db.models import Base
+
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = make_engine(f"sqlite:///{workdir}/claims.db")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        started = time.perf_counter()
+        for round_number in range(rounds):
+            job_id = f"job-{round_number}"
+            db = session_factory()
+            try:
+                crud.create_job(db, job_id=job_id, kind="run", query="race", thread_id=f"thread-{round_number}")
+            finally:
+                db.close()
+
+            barrier = threading.Barrier(claimers)
+            claimed, errors = [], []
+
+            def claim(worker: int) -> None:
+                db = session_factory()
+                try:
+                    barrier.wait()
+                    job = crud.claim_next_job(db, f"claimer-{worker}")
+                    if job is not None:
+                        claimed.append(job.id)
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+                finally:
+                    db.close()
+
+            threads = [threading.Thread(target=claim, args=(worker,)) for worker in range(claimers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if claimed != [job_id] or errors:
+                failures.append(f"round {round_number}: claimed {claimed}, errors {errors}")
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+    return {
+        "rounds": rounds,
+        "claimers": claimers,
+        "rounds_per_s": round(rounds / elapsed, 1),
+        "failures": failures
+    }
+
+
+def collect(quick: bool = True):
+    """Metrics for benchmarks.runner: the claim race only (the multi-worker run needs servers)."""
+    row = claim_race(rounds=50 if quick else 500)
+    if row["failures"]:
+        raise RuntimeError(f"job claimed more or less than once: {row['failures'][:3]}")
+    return {"claim_race_rounds_per_s": row["rounds_per_s"]}
+
+
+def run(workers: int, jobs: int, port: int, stub_url: str, concurrency: int, timeout: float):
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": stub_url,
+        "WEB_CONCURRENCY": str(workers),
+        "AGENT_JOB_CONCURRENCY": str(concurrency),
+        "JOB_POLL_INTERVAL": "0.5"
+    }
+    base = f"http://127.0.0.1:{port}/api/agent"
+    server = start(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers)],
+        env, f"/tmp/bench_multiworker_{workers}.log"
+    )
+    try:
+        wait_ready(f"{base}/jobs/metrics", timeout)
+        started = time.perf_counter()
+        ids = [
+            httpx.post(f"{base}/jobs", json={"query": f"analyze {i}"}, timeout=30).json()["id"]
+            for i in range(jobs)
+        ]
+        pending, results = set(ids), {}
+        while pending and time.perf_counter() - started < timeout:
+            for job_id in list(pending):
+                job = httpx.get(f"{base}/jobs/{job_id}", timeout=30).json()
+                if job["status"] not in ("queued", "running"):
+                    pending.discard(job_id)
+                    results[job_id] = job
+            time.sleep(0.2)
+        elapsed = time.perf_counter() - started
+
+        failures = []
+        if pending:
+            failures.append(f"{len(pending)} jobs unfinished after {timeout}s")
+        failures += [f"{i}: {j['status']} {j['error']}" for i, j in results.items() if j["status"] != "succeeded"]
+        failures += [f"{i}: claimed {j['attempts']} times" for i, j in results.items() if j["attempts"] != 1]
+
+        missing_plots = 0
+        for job_id, job in results.items():
+            if job["status"] != "succeeded":
+                continue
+            result = httpx.get(f"{base}/jobs/{job_id}/result", timeout=30).json()
+            for visualization in result.get("visualizations") or []:
+                url = visualization.get("path") or ""
+                if url.startswith("/") and httpx.get(f"http://127.0.0.1:{port}{url}", timeout=30).status_code != 200:
+                    missing_plots += 1
+        if missing_plots:
+            failures.append(f"{missing_plots} reported plots missing")
+
+        worker_ids = {job["worker_id"] for job in results.values() if job.get("worker_id")}
+        if workers > 1 and jobs >= 2 * workers and len(worker_ids) < 2:
+            failures.append("all jobs ran in a single worker process")
+
+        return {
+            "workers": workers,
+            "jobs": jobs,
+            "elapsed_s": round(elapsed, 2),
+            "jobs_per_s": round(len(results) / elapsed, 2) if elapsed else 0.0,
+            "worker_processes_used": len(worker_ids),
+            "failures": failures
+        }
+    finally:
+        stop(server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker job queue integration benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--jobs", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=2, help="AGENT_JOB_CONCURRENCY per process")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--stub-port", type=int, default=8011)
+    parser.add_argument("--latency-ms", type=int, default=300, help="Stub latency per LLM call")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--claim-rounds", type=int, default=200, help="Rounds of the job claim race")
+    parser.add_argument("--claims-only", action="store_true", help="Only run the job claim race")
+    args = parser.parse_args()
+
+    row = claim_race(rounds=args.claim_rounds)
+    print(json.dumps(row))
+    if row["failures"] or args.claims_only:
+        sys.exit(1 if row["failures"] else 0)
+
+    stub = start(
+        [sys.executable, "-m", "src.openai_tool.stub_server", "--port", str(args.stub_port), "--latency-ms", str(args.latency_ms)],
+        os.environ.copy(), "/tmp/bench_multiworker_stub.log"
+    )
+    ok = True
+    try:
+        stub_url = f"http://127.0.0.1:{args.stub_port}/v1"
+        wait_ready(f"{stub_url}/models", 30)
+        for workers in args.workers:
+            row = run(workers, args.jobs, args.port, stub_url, args.concurrency, args.timeout)
+            ok = ok and not row["failures"]
+            print(json.dumps(row))
+    finally:
+        stop(stub)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
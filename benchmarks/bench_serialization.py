@@ -0,0 +1,109 @@
+# benchmarks/bench_serialization.py
+"""
+Benchmark response serialization and compression.
+
+Renders typical payloads (an agent response with a long report, a 1000-row
+file listing) with Starlette's JSONResponse and with ORJSONResponse, then
+compresses the JSON with gzip and zstd at the levels the compression
+middleware uses, reporting time per call and compressed size. Run with:
+
+    python -m benchmarks.bench_serialization --repeat 200
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.middleware.compression import COMPRESSION_GZIP_LEVEL, COMPRESSION_ZSTD_LEVEL, gzip_encoder, zstd_encoder, zstandard
+
+
+def agent_response():
+    return {
+        "action_plan": [{"step": i, "description": f"Step {i}: load, clean and summarise the measurements"} for i in range(1, 9)],
+        "decisions_and_justifications": [
+            {"decision": f"Use test {i}", "justification": "p = 0.012, n = 240, assumptions checked", "tool_used": "execute_python"}
+            for i in range(12)
+        ],
+        "observations": [f"Group {i} mean 4.{i} (sd 1.{i}), 95% CI [3.9, 4.{i + 1}]" for i in range(40)],
+        "visualizations": [
+            {"path": f"/artifacts/{i:064x}.png", "description": "Distribution by group", "key_insights": ["Right-skewed", "Two outliers"]}
+            for i in range(6)
+        ],
+        "summary": "The treatment groups differ significantly. " * 20,
+        "next_steps": ["Collect more samples", "Check the outliers"],
+        "conclusion": "Significant difference (p < 0.05).",
+        "budget": {"tokens": {"used": 48213, "limit": 100000}, "cost": {"used": 0.41, "limit": 2.0}},
+        "thread_id": "science-session-7d2f6a0e-2c4b-4a8e-9d1e-0b4c9b7f1a2e"
+    }
+
+
+def file_listing(rows: int = 1000):
+    now = datetime(2026, 1, 1)
+    return [{
+        "id": i,
+        "original_filename": f"measurements_{i}.csv",
+        "description": "Plate reader export",
+        "file_size": 120.5 + i,
+        "file_type": "csv",
+        "uploaded_at": (now - timedelta(minutes=i)).isoformat(),
+        "is_processed": i % 2 == 0
+    } for i in range(rows)]
+
+
+def time_per_call(func, repeat: int) -> float:
+    """Best-of-3 mean time per call in milliseconds."""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best * 1000
+
+
+def run(repeat: int = 200):
+    """Time rendering and compression of each payload and return the results."""
+    encoders = {"gzip": gzip_encoder(COMPRESSION_GZIP_LEVEL)}
+    if zstandard is not None:
+        encoders["zstd"] = zstd_encoder(COMPRESSION_ZSTD_LEVEL)
+
+    results = []
+    for name, payload in (("agent_response", agent_response()), ("file_listing_1000", file_listing())):
+        body = ORJSONResponse(payload).body
+        assert json.loads(body) == json.loads(JSONResponse(payload).body)
+        row = {
+            "payload": name,
+            "bytes": len(body),
+            "json_ms": round(time_per_call(lambda: JSONResponse(payload), repeat), 4),
+            "orjson_ms": round(time_per_call(lambda: ORJSONResponse(payload), repeat), 4)
+        }
+        for encoding, encode in encoders.items():
+            row[f"{encoding}_ms"] = round(time_per_call(lambda: encode(body), repeat), 4)
+            row[f"{encoding}_bytes"] = len(encode(body))
+        results.append(row)
+    return results
+
+
+def collect(quick: bool = True):
+    """Metrics for benchmarks.runner."""
+    metrics = {}
+    for row in run(repeat=50 if quick else 500):
+        for name, value in row.items():
+            if name.endswith("_ms"):
+                metrics[f"{row['payload']}.{name}"] = value
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization and compression")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for row in run(args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
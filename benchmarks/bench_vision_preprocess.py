@@ -0,0 +1,84 @@
+# benchmarks/bench_vision_preprocess.py
+"""
+Benchmark vision payload preprocessing on generated matplotlib plots.
+
+Compares the raw base64 payload with the downscaled/re-encoded one and times
+cold (encode) and warm (cache hit) preparation. Run with:
+
+    python -m benchmarks.bench_vision_preprocess --dpi 100 200 300
+"""
+import argparse
+import base64
+import json
+import os
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from src.openai_tool import image_preprocess
+
+
+def make_plot(path: str, dpi: int, kind: str) -> None:
+    """Save a representative line or scatter plot."""
+    rng = np.random.default_rng(0)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    if kind == "scatter":
+        ax.scatter(rng.normal(size=5000), rng.normal(size=5000), c=rng.random(5000), s=4, cmap="viridis")
+    else:
+        xs = np.linspace(0, 10, 500)
+        for i in range(4):
+            ax.plot(xs, np.sin(xs + i) * (i + 1), label=f"series {i}")
+        ax.legend()
+    ax.set_title(f"{kind} plot")
+    fig.savefig(path, dpi=dpi)
+    plt.close(fig)
+
+
+def run(dpis, kinds=("line", "scatter")):
+    """Measure payload size and preparation time per plot."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for dpi in dpis:
+            for kind in kinds:
+                path = os.path.join(tmp, f"{kind}_{dpi}.png")
+                make_plot(path, dpi, kind)
+                with open(path, "rb") as f:
+                    raw_payload = len(base64.b64encode(f.read()))
+
+                image_preprocess._payload_cache.clear()
+                image_preprocess._path_digests.clear()
+                started = time.perf_counter()
+                prepared = image_preprocess.prepare_image(path)
+                cold_ms = (time.perf_counter() - started) * 1000
+                started = time.perf_counter()
+                image_preprocess.prepare_image(path)
+                warm_ms = (time.perf_counter() - started) * 1000
+
+                results.append({
+                    "plot": kind,
+                    "dpi": dpi,
+                    "raw_payload_bytes": raw_payload,
+                    "payload_bytes": len(prepared.data_url),
+                    "mime_type": prepared.mime_type,
+                    "size": [prepared.width, prepared.height],
+                    "cold_ms": round(cold_ms, 2),
+                    "warm_ms": round(warm_ms, 3)
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vision image preprocessing")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[100, 200, 300])
+    args = parser.parse_args()
+
+    for row in run(args.dpi):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+# benchmarks/loadgen.py
+"""
+HTTP load generator for the files and agent APIs.
+
+Sends a weighted mix of requests (CSV uploads, file listings, file reads and
+agent runs) at a fixed arrival rate for each stage, for instance 1, 2 and 4
+requests per second for 60 seconds each. Arrivals are open-loop (Poisson): a
+slow server does not slow the generator down, so queueing shows up as latency
+instead of being hidden. Requests beyond --max-in-flight are dropped and
+counted.
+
+For every stage it prints throughput, p50/p95/p99 latency (overall and per
+operation), the error rate and the server's peak RSS, and it samples the RSS
+of the server and its child processes (executor runs included) every
+--sample-interval seconds. The summary names the highest rate that met the
+p99 and error rate targets.
+
+Without --url it starts the OpenAI stub and the API (uvicorn, --workers
+processes, on a throwaway SQLite database) itself. Run from the repository
+root with:
+
+    python -m benchmarks.loadgen --rates 0.5 1 2 4 --duration 60
+    python -m benchmarks.loadgen --url http://127.0.0.1:8000 --server-pid 1234 --mix list=5,get=3,upload=1
+
+Files uploaded during the run are deleted at the end.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from benchmarks.bench_multiworker import start, stop, wait_ready
+
+OPERATIONS = ("upload", "list", "get", "agent")
+DEFAULT_MIX = "upload=1,list=4,get=3,agent=2"
+
+
+def parse_mix(mix: str):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}, expected one of {sorted(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def process_tree_rss_mb(pid: int):
+    """RSS of a process and all its descendants in MB, from /proc (None where unavailable)."""
+    try:
+        children = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The command name may contain spaces; ppid is the second field after it
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+        total_kb, stack = 0, [pid]
+        while stack:
+            current = stack.pop()
+            stack.extend(children.get(current, []))
+            try:
+                with open(f"/proc/{current}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            total_kb += int(line.split()[1])
+                            break
+            except OSError:
+                continue
+        return round(total_kb / 1024, 1)
+    except OSError:
+        return None
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 1)
+
+
+def csv_payload(rows: int = 500) -> bytes:
+    lines = ["id,group,value,score"]
+    lines += [f"{i},g{i % 5},{random.random():.6f},{random.randint(0, 100)}" for i in range(rows)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+class LoadGenerator:
+    """Issues the operations and keeps the results of one stage at a time."""
+
+    def __init__(self, client: httpx.AsyncClient, weights, max_in_flight: int):
+        self.client = client
+        self.names = list(weights)
+        self.weights = list(weights.values())
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.file_ids = []
+        self.results = []
+        self.dropped = 0
+
+    async def upload(self):
+        response = await self.client.post(
+            "/api/files/",
+            files={"file": (f"loadgen_{uuid.uuid4().hex}.csv", csv_payload(), "text/csv")},
+            data={"description": "loadgen"}
+        )
+        if response.status_code == 201:
+            self.file_ids.append(response.json()["id"])
+        return response
+
+    async def list(self):
+        return await self.client.get("/api/files/", params={"limit": 50})
+
+    async def get(self):
+        if not self.file_ids:
+            return await self.list()
+        return await self.client.get(f"/api/files/{random.choice(self.file_ids)}")
+
+    async def agent(self):
+        return await self.client.post("/api/agent/run", json={"query": f"Summarize the data ({uuid.uuid4().hex[:8]})"})
+
+    async def issue(self, name: str) -> None:
+        self.in_flight += 1
+        started = time.perf_counter()
+        status, error = None, None
+        try:
+            response = await getattr(self, name)()
+            status = response.status_code
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        finally:
+            self.in_flight -= 1
+        self.results.append({
+            "op": name,
+            "latency": time.perf_counter() - started,
+            "ok": error is None and status is not None and status < 400,
+            "status": status if error is None else error
+        })
+
+    async def run_stage(self, rate: float, duration: float, drain_timeout: float):
+        """Send Poisson arrivals at rate requests/s for duration seconds, then wait for stragglers."""
+        self.results, self.dropped = [], 0
+        tasks = set()
+        started = time.perf_counter()
+        next_at = started
+        while True:
+            next_at += random.expovariate(rate)
+            if next_at - started >= duration:
+                break
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            if self.in_flight >= self.max_in_flight:
+                self.dropped += 1
+                continue
+            task = asyncio.create_task(self.issue(random.choices(self.names, self.weights)[0]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        sent_for = time.perf_counter() - started
+        if tasks:
+            await asyncio.wait(tasks, timeout=drain_timeout)
+        return self.results, self.dropped, sent_for, time.perf_counter() - started
+
+    async def cleanup(self) -> None:
+        for file_id in self.file_ids:
+            try:
+                await self.client.delete(f"/api/files/{file_id}")
+            except httpx.HTTPError:
+                pass
+
+
+def summarize(rate, results, dropped, sent_for, elapsed, rss_samples):
+    latencies = [r["latency"] for r in results]
+    errors = [r for r in results if not r["ok"]]
+    statuses = {}
+    for r in errors:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+    ops = {}
+    for name in OPERATIONS:
+        op_results = [r for r in results if r["op"] == name]
+        if op_results:
+            ops[name] = {
+                "count": len(op_results),
+                "errors": sum(1 for r in op_results if not r["ok"]),
+                "p50_ms": percentile([r["latency"] for r in op_results], 0.50),
+                "p95_ms": percentile([r["latency"] for r in op_results], 0.95),
+                "p99_ms": percentile([r["latency"] for r in op_results], 0.99)
+            }
+    rss = [sample for sample in rss_samples if sample is not None]
+    return {
+        "type": "stage",
+        "rate": rate,
+        "duration_s": round(sent_for, 1),
+        "completed": len(results),
+        "dropped": dropped,
+        "throughput_rps": round(sum(1 for r in results if r["ok"]) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(len(errors) / len(results), 4) if results else 0.0,
+        "errors": statuses,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "rss_mb_max": max(rss) if rss else None,
+        "ops": ops
+    }
+
+
+async def sample(generator: LoadGenerator, pid, interval: float, began: float, samples) -> None:
+    """Print the server RSS and the requests in flight every interval seconds."""
+    while True:
+        rss = process_tree_rss_mb(pid) if pid else None
+        samples.append(rss)
+        print(json.dumps({
+            "type": "sample",
+            "t": round(time.perf_counter() - began, 1),
+            "rss_mb": rss,
+            "in_flight": generator.in_flight,
+            "completed": len(generator.results)
+        }), flush=True)
+        await asyncio.sleep(interval)
+
+
+async def run(url, pid, rates, duration, weights, max_in_flight, sample_interval, drain_timeout, slo_p99_ms, slo_error_rate):
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    timeout = httpx.Timeout(drain_timeout, connect=10)
+    stages = []
+    began = time.perf_counter()
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        generator = LoadGenerator(client, weights, max_in_flight)
+        # A few files up front so reads have something to hit
+        if "get" in weights:
+            for _ in range(5):
+                await generator.upload()
+        try:
+            for rate in rates:
+                rss_samples = []
+                sampler = asyncio.create_task(sample(generator, pid, sample_interval, began, rss_samples))
+                try:
+                    results, dropped, sent_for, elapsed = await generator.run_stage(rate, duration, drain_timeout)
+                finally:
+                    sampler.cancel()
+                stage = summarize(rate, results, dropped, sent_for, elapsed, rss_samples)
+                stages.append(stage)
+                print(json.dumps(stage), flush=True)
+        finally:
+            await generator.cleanup()
+
+    sustained = [
+        stage["rate"] for stage in stages
+        if stage["p99_ms"] <= slo_p99_ms and stage["error_rate"] <= slo_error_rate and not stage["dropped"]
+    ]
+    summary = {
+        "type": "summary",
+        "mix": weights,
+        "slo": {"p99_ms": slo_p99_ms, "error_rate": slo_error_rate},
+        "max_sustained_rate": max(sustained) if sustained else None,
+        "stages": [
+            {name: stage[name] for name in ("rate", "throughput_rps", "p99_ms", "error_rate", "rss_mb_max")}
+            for stage in stages
+        ]
+    }
+    print(json.dumps(summary), flush=True)
+    return summary
+
+
+def start_local_server(args, workdir):
+    """Start the OpenAI stub and the API on a migrated throwaway database; returns (url, processes)."""
+    stub_url = f"http://127.0.0.1:{args.stub_port}/v1"
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": stub_url,
+        "DATABASE_URL": f"sqlite:///{workdir}/loadgen.db",
+        "EXPLAIN_CACHE_PATH": f"{workdir}/explain_cache.db",
+        "WEB_CONCURRENCY": str(args.workers)
+    }
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], env=env, check=True, capture_output=True)
+    stub = start(
+        [sys.executable, "-m", "src.openai_tool.stub_server", "--port", str(args.stub_port), "--latency-ms", str(args.latency_ms)],
+        env, "/tmp/loadgen_stub.log"
+    )
+    wait_ready(f"{stub_url}/models", 30)
+    server = start(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--workers", str(args.workers)],
+        env, "/tmp/loadgen_server.log"
+    )
+    url = f"http://127.0.0.1:{args.port}"
+    wait_ready(f"{url}/readyz", 120)
+    return url, [server, stub]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load generator for the files and agent APIs")
+    parser.add_argument("--url", help="Target an already running API instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID of the --url server, for RSS sampling")
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.5, 1, 2], help="Arrival rates (requests/s), one stage each")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per stage")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. upload=1,list=4,get=3,agent=2")
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--drain-timeout", type=float, default=300, help="Request timeout and wait for stragglers per stage")
+    parser.add_argument("--slo-p99-ms", type=float, default=30000)
+    parser.add_argument("--slo-error-rate", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the local server")
+    parser.add_argument("--port", type=int, default=8030)
+    parser.add_argument("--stub-port", type=int, default=8031)
+    parser.add_argument("--latency-ms", type=int, default=300, help="Stub latency per LLM call")
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    workdir, processes = None, []
+    try:
+        if args.url:
+            url, pid = args.url, args.server_pid
+        else:
+            workdir = tempfile.mkdtemp(prefix="loadgen_")
+            url, processes = start_local_server(args, workdir)
+            pid = processes[0].pid
+        asyncio.run(run(
+            url, pid, args.rates, args.duration, weights, args.max_in_flight,
+            args.sample_interval, args.drain_timeout, args.slo_p99_ms, args.slo_error_rate
+        ))
+    finally:
+        for process in processes:
+            stop(process)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
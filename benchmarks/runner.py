@@ -0,0 +1,152 @@
+# benchmarks/runner.py
+"""
+Run the benchmark suites, save the results as JSON and compare them with a baseline.
+
+Every suite exposes collect(quick), returning flat {metric: value} numbers; the
+runner prefixes them with the suite name ("executor.trivial.cold_ms") and
+writes them with the git commit, Python version and platform. Given a
+baseline file from an earlier run it compares each metric and exits with
+status 1 when one got worse by more than the threshold. Whether lower or
+higher is better follows the metric's name: throughput (*_per_s) is higher
+is better, everything else (times, memory, error and failure counts) lower.
+Run from the repository root with:
+
+    python -m benchmarks.runner --output results.json
+    python -m benchmarks.runner --baseline results.json --threshold 0.2
+    python -m benchmarks.runner --full --only executor ingestion
+"""
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Importing the agent builds the OpenAI client; no suite calls the real API
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+# Suite name -> module exposing collect(quick)
+SUITES = {
+    "import_time": "benchmarks.bench_import_time",
+    "executor": "benchmarks.bench_executor",
+    "ingestion": "benchmarks.bench_ingestion",
+    "json_extract": "benchmarks.bench_json_extract",
+    "serialization": "benchmarks.bench_serialization",
+    "crud": "benchmarks.bench_crud",
+    "multiworker": "benchmarks.bench_multiworker",
+    "agent_e2e": "benchmarks.bench_agent_e2e"
+}
+
+HIGHER_IS_BETTER_SUFFIXES = ("_per_s",)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suites(names, quick: bool):
+    """Run the named suites and return the results document."""
+    metrics, errors = {}, {}
+    for name in names:
+        started = time.perf_counter()
+        try:
+            suite_metrics = importlib.import_module(SUITES[name]).collect(quick=quick)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+            print(f"{name}: failed: {errors[name]}", file=sys.stderr)
+            continue
+        for metric, value in suite_metrics.items():
+            metrics[f"{name}.{metric}"] = value
+        print(f"{name}: {len(suite_metrics)} metrics in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "mode": "quick" if quick else "full",
+            "suites": list(names)
+        },
+        "metrics": metrics,
+        "errors": errors
+    }
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith(HIGHER_IS_BETTER_SUFFIXES)
+
+
+def compare(current, baseline, threshold: float):
+    """
+    Compare the metrics found in both documents.
+
+    Returns:
+        One row per metric with the relative change (positive is worse) and
+        whether it is a regression beyond the threshold
+    """
+    rows = []
+    for metric, value in sorted(current["metrics"].items()):
+        before = baseline["metrics"].get(metric)
+        if before is None:
+            continue
+        if before == 0:
+            # Counts such as errors: any increase from zero is a regression
+            change = float(value > 0) if not higher_is_better(metric) else 0.0
+        else:
+            change = (value - before) / abs(before)
+            if higher_is_better(metric):
+                change = -change
+        rows.append({
+            "metric": metric,
+            "baseline": before,
+            "current": value,
+            "change": round(change, 4),
+            "regression": change > threshold
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suites and check for regressions")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), help="Suites to run (default: all)")
+    parser.add_argument("--full", action="store_true", help="Full sizes (1 GB and 5 GB datasets, more repeats)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    results = run_suites(args.only or list(SUITES), quick=not args.full)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if not args.baseline:
+        print(json.dumps(results, indent=2, sort_keys=True))
+        sys.exit(1 if results["errors"] else 0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    for row in rows:
+        print(json.dumps(row))
+    regressions = [row["metric"] for row in rows if row["regression"]]
+    print(json.dumps({
+        "baseline_commit": baseline["meta"].get("commit"),
+        "commit": results["meta"]["commit"],
+        "compared": len(rows),
+        "regressions": regressions,
+        "errors": results["errors"]
+    }))
+    sys.exit(1 if regressions or results["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
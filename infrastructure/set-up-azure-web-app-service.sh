@@ -192,11 +192,13 @@ az webapp config container set \
     --docker-custom-image-name "$ACR_REGISTRY_URL/$IMAGE_NAME:latest" \
     --docker-registry-server-url "https://$ACR_REGISTRY_URL"
 
-# Clear any custom startup command to use Docker's ENTRYPOINT
+# Clear any custom startup command to use Docker's ENTRYPOINT, and only route
+# traffic to instances whose warm-up has finished (/readyz returns 200)
 az webapp config set \
     --resource-group "$RESOURCE_GROUP" \
     --name "$APP_NAME" \
-    --startup-file ""
+    --startup-file "" \
+    --generic-configurations '{"healthCheckPath": "/readyz"}'
 
 print_success "Container configuration updated"
 
@@ -1,6 +1,9 @@
-from typing import Literal, Dict, Any
+from typing import Literal, Dict, Any, Optional
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from src.openai_tool.provider import get_chat_model
+from pydantic import ValidationError
 from src.agent.state import State
 from src.agent.tools import (
     fetch_dataset_info, 
@@ -9,12 +12,22 @@ from src.agent.tools import (
     install_python_packages, 
     ask_ai,
     explain_graph,
+    retrieve_tool_output,
     print_tool_execution
 )
 from src.helpers.fetch_local_data import fetch_local_data
-from src.agent.prompts import SYSTEM_PROMPT
+from src.agent.prompts import SYSTEM_PROMPT, DATASET_CONTEXT_PROMPT
+from src.agent.schemas import AgentReport, REPORT_TOOL_NAME, repair_report
+from src.agent.budget import (
+    FINAL_ANSWER_INSTRUCTION,
+    add_message_usage,
+    budget_exhaustion_reason
+)
 import os
 import json
+import threading
+import time
+from functools import lru_cache
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -23,31 +36,47 @@ load_dotenv()
 path = os.path.abspath('src/data/uploads')
 
 image_path = 'src/data/graphs'
-# Load dataset from the path
-dataset = fetch_local_data(path)
 
-print(f"Dataset loaded from {path}: {dataset}")
+_dataset: Optional[Dict[str, Any]] = None
+_dataset_lock = threading.Lock()
+
+def get_dataset() -> Dict[str, Any]:
+    """The dataset catalog of the uploads directory, scanned on first use rather than at import."""
+    global _dataset
+    if _dataset is None:
+        with _dataset_lock:
+            if _dataset is None:
+                _dataset = fetch_local_data(path)
+                print(f"Dataset loaded from {path}: {_dataset}")
+    return _dataset
 
-# OpenAI API Configuration
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+def dataset_context() -> str:
+    """The dataset catalog serialized deterministically, so unchanged data gives identical prompts."""
+    return json.dumps(get_dataset(), sort_keys=True, default=str)
 
 model = "gpt-4o-2024-08-06" #"gpt-4o"
 
-def create_agent():
-    """Create the agent with tools."""
-    # Initialize the language model
-    llm = ChatOpenAI(
+@lru_cache(maxsize=None)
+def create_agent(final_answer: bool = False):
+    """
+    Create the agent with tools. The two variants are built once and reused.
+    
+    Args:
+        final_answer: If True, only the AgentReport tool is offered and the model must call it
+    """
+    # Initialize the language model on the shared, rate-limited provider clients
+    llm = get_chat_model(
         model=model,
         temperature=0,
-        openai_api_key=OPENAI_API_KEY,
-        max_tokens=2000,
-        
+        max_tokens=2000
     )
     
-    # Create prompt template with enhanced system message
+    # Static instructions first so the prompt prefix is byte-identical across runs and
+    # can be served from the provider's prompt cache; the dataset catalog comes after
     prompt = ChatPromptTemplate.from_messages([
         ("system", SYSTEM_PROMPT),
+        ("system", DATASET_CONTEXT_PROMPT),
         ("placeholder", "{messages}")
     ])
     
@@ -58,47 +87,135 @@ def create_agent():
         db_query_tool, 
         install_python_packages, 
         ask_ai, 
-        explain_graph
+        explain_graph,
+        retrieve_tool_output
     ]
     
-    # Chain prompt with language model and bind tools
-    agent = prompt | llm.bind_tools(tools, tool_choice="auto")
+    # Forced tool call: the model can only submit the final report
+    if final_answer:
+        return prompt | llm.bind_tools([AgentReport], tool_choice=REPORT_TOOL_NAME)
+    
+    # Chain prompt with language model and bind tools. Every response must be a tool call,
+    # so the final answer always arrives as AgentReport arguments instead of free text
+    agent = prompt | llm.bind_tools(tools + [AgentReport], tool_choice="required")
     
     return agent
 
-def run_agent(state: State) -> Dict[str, Any]:
+def run_agent(state: State, config: RunnableConfig) -> Dict[str, Any]:
     """Run the agent on the current state."""
-    agent = create_agent()
+    messages = state["messages"]
+    cassette = config.get("configurable", {}).get("cassette")
+    
+    # Force a final answer once a budget is nearly exhausted
+    exhausted_reason = budget_exhaustion_reason(state.get("budget"), state.get("usage"))
+    if exhausted_reason:
+        print_tool_execution("BUDGET", "ERROR", f"Nearly exhausted {exhausted_reason}, forcing final answer")
+        agent = create_agent(final_answer=True)
+        messages = messages + [SystemMessage(content=FINAL_ANSWER_INSTRUCTION)]
+    else:
+        agent = create_agent()
     
     print_tool_execution("LLM-AGENT", "RUNNING", "Generating response or tool calls...")
     
-    # Pass the dataset and path variables to the agent invocation
-    response = agent.invoke({
-        "messages": state["messages"],
-        "dataset": dataset,
-        "path": path,
-        "image_path": image_path
-    })
+    started = time.perf_counter()
+    if cassette is not None and cassette.replays_llm:
+        # Serve the response from the recorded run
+        response = cassette.replay_llm(messages)
+    else:
+        # Pass the dataset and path variables to the agent invocation
+        response = agent.invoke({
+            "messages": messages,
+            "dataset": dataset_context(),
+            "path": path,
+            "image_path": image_path
+        })
+        if cassette is not None:
+            cassette.record_llm(messages, response, (time.perf_counter() - started) * 1000)
+    elapsed_ms = (time.perf_counter() - started) * 1000
     
     # Check if the agent is making a tool call or providing a final answer
-    has_tool_calls = hasattr(response, "tool_calls") and response.tool_calls
-    if has_tool_calls:
+    if report_tool_call(response):
+        print_tool_execution("LLM-AGENT", "SUCCESS", "Final report submitted")
+    elif hasattr(response, "tool_calls") and response.tool_calls:
         print_tool_execution("LLM-AGENT", "SUCCESS", "Tool calls generated")
     else:
         print_tool_execution("LLM-AGENT", "SUCCESS", "Final response generated")
     
-    # Return the AI's response
-    return {"messages": [response]}
+    # Return the AI's response along with the updated live usage
+    update = {
+        "messages": [response],
+        "usage": add_message_usage(state.get("usage"), response, elapsed_ms)
+    }
+    if exhausted_reason:
+        update["budget_exhausted"] = exhausted_reason
+    return update
+
+def report_tool_call(message) -> Optional[Dict[str, Any]]:
+    """Return the AgentReport tool call of an AI message, if it has one."""
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        if tool_call["name"] == REPORT_TOOL_NAME:
+            return tool_call
+    return None
+
+def finalize_report(state: State) -> Dict[str, Any]:
+    """
+    Validate the submitted AgentReport against the schema and store it as the final report.
+    
+    Every tool call of the final message gets a ToolMessage so the history stays valid
+    for later turns. If validation fails the errors go back to the agent to fix, unless
+    the budget is exhausted, in which case the report is repaired field by field
+    (see repair_report), so the final report always matches the schema.
+    """
+    last_message = state["messages"][-1]
+    report_call = report_tool_call(last_message)
+    
+    try:
+        report = AgentReport.model_validate(report_call["args"]).model_dump()
+        error = None
+    except ValidationError as e:
+        report = repair_report(report_call["args"]) if state.get("budget_exhausted") else None
+        error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    
+    messages = []
+    for tool_call in last_message.tool_calls:
+        if tool_call["id"] != report_call["id"]:
+            content = "Skipped: the final report was submitted in the same step."
+        elif error:
+            content = f"Error: the report does not match the schema.\n{error}\nPlease call AgentReport again with every field filled in."
+        else:
+            content = "Final report received."
+        messages.append(ToolMessage(content=content, tool_call_id=tool_call["id"], name=tool_call["name"]))
+    
+    if error:
+        print_tool_execution("FINAL-REPORT", "ERROR", f"Report failed validation: {error}")
+    else:
+        print_tool_execution("FINAL-REPORT", "SUCCESS", "Report validated against the schema")
+    
+    return {"messages": messages, "final_report": report}
 
-def should_continue(state: State) -> Literal["tools", "end"]:
-    """Determine if the agent should continue with tools or end."""
+def should_continue(state: State) -> Literal["tools", "finalize", "end"]:
+    """Determine if the agent should continue with tools, finalize its report or end."""
     # Get the last message
     last_message = state["messages"][-1]
     
+    # The final report is validated before the run ends
+    if report_tool_call(last_message):
+        return "finalize"
+    
+    # Stop cleanly once the forced final answer has been produced
+    if state.get("budget_exhausted"):
+        return "end"
+    
     # Check if the last message has tool calls
     has_tool_calls = hasattr(last_message, "tool_calls") and last_message.tool_calls
     
     if has_tool_calls:
         return "tools"
     else:
-        return "end"
\ No newline at end of file
+        return "end"
+
+def should_end(state: State) -> Literal["compact", "end"]:
+    """End once a final report is stored, otherwise let the agent fix its report."""
+    if state.get("final_report") is not None or state.get("budget_exhausted"):
+        return "end"
+    return "compact"
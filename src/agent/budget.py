@@ -0,0 +1,137 @@
+#src/agent/budget.py
+from typing import Dict, Any, Optional
+
+# USD per 1M tokens (cached_input: input tokens served from the provider's prompt cache)
+MODEL_PRICING = {
+    "gpt-4o-2024-08-06": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+}
+DEFAULT_PRICING = MODEL_PRICING["gpt-4o"]
+
+# Instruction appended when a budget is about to run out
+FINAL_ANSWER_INSTRUCTION = (
+    "The resource budget for this analysis is nearly exhausted. Do not call any more tools. "
+    "Using only the results gathered so far, submit your final answer now with the AgentReport tool."
+)
+
+
+def new_usage() -> Dict[str, Any]:
+    """Return an empty usage record for a run."""
+    return {
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "cached_tokens": 0,
+        "cost": 0.0,
+        "steps": 0,
+        "llm_ms": 0.0,
+        "last_step_tokens": 0,
+        "last_step_cost": 0.0,
+        "model_name": None
+    }
+
+
+def new_budget(
+    token_budget: Optional[int] = None,
+    cost_budget: Optional[float] = None,
+    step_budget: Optional[int] = None
+) -> Dict[str, Any]:
+    """Return the budget limits for a run (None means unlimited)."""
+    return {
+        "token_budget": token_budget,
+        "cost_budget": cost_budget,
+        "step_budget": step_budget
+    }
+
+
+def estimate_cost(model_name: Optional[str], input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimate the USD cost of a model call from its token counts (cached_tokens is part of input_tokens)."""
+    pricing = MODEL_PRICING.get(model_name or "", DEFAULT_PRICING)
+    return (
+        (input_tokens - cached_tokens) * pricing["input"]
+        + cached_tokens * pricing["cached_input"]
+        + output_tokens * pricing["output"]
+    ) / 1_000_000
+
+
+def add_message_usage(usage: Dict[str, Any], message, elapsed_ms: float = 0.0) -> Dict[str, Any]:
+    """
+    Add the usage of one AI message to a run's usage record.
+
+    Args:
+        usage: The usage record so far
+        message: The AIMessage returned by the model
+        elapsed_ms: Time the model call took
+
+    Returns:
+        A new usage record including the message
+    """
+    usage = {**new_usage(), **(usage or {})}
+    metadata = getattr(message, "usage_metadata", None) or {}
+    response_metadata = getattr(message, "response_metadata", None) or {}
+
+    model_name = response_metadata.get("model_name") or usage["model_name"]
+    input_tokens = metadata.get("input_tokens", 0)
+    output_tokens = metadata.get("output_tokens", 0)
+    total_tokens = metadata.get("total_tokens", input_tokens + output_tokens)
+    cached_tokens = (metadata.get("input_token_details") or {}).get("cache_read") or 0
+    cost = estimate_cost(model_name, input_tokens, output_tokens, cached_tokens)
+
+    usage["input_tokens"] += input_tokens
+    usage["output_tokens"] += output_tokens
+    usage["total_tokens"] += total_tokens
+    usage["cached_tokens"] += cached_tokens
+    usage["cost"] += cost
+    usage["steps"] += 1
+    usage["llm_ms"] += elapsed_ms
+    usage["last_step_tokens"] = total_tokens
+    usage["last_step_cost"] = cost
+    usage["model_name"] = model_name
+    return usage
+
+
+def budget_exhaustion_reason(budget: Dict[str, Any], usage: Dict[str, Any]) -> Optional[str]:
+    """
+    Check whether the next agent step must be the final one.
+
+    A budget counts as nearly exhausted when another tool step plus a final answer,
+    each about the size of the last step, would reach it. Forcing the final answer
+    at that point keeps the run inside the budget.
+
+    Returns:
+        A short reason if a budget is nearly exhausted, otherwise None
+    """
+    if not budget:
+        return None
+    usage = {**new_usage(), **(usage or {})}
+
+    step_budget = budget.get("step_budget")
+    if step_budget is not None and usage["steps"] + 1 >= step_budget:
+        return f"step budget ({usage['steps']}/{step_budget} steps used)"
+
+    token_budget = budget.get("token_budget")
+    if token_budget is not None and usage["total_tokens"] + 2 * usage["last_step_tokens"] >= token_budget:
+        return f"token budget ({usage['total_tokens']}/{token_budget} tokens used)"
+
+    cost_budget = budget.get("cost_budget")
+    if cost_budget is not None and usage["cost"] + 2 * usage["last_step_cost"] >= cost_budget:
+        return f"cost budget (${usage['cost']:.4f}/${cost_budget:.4f} used)"
+
+    return None
+
+
+def budget_report(budget: Dict[str, Any], usage: Dict[str, Any], exhausted_reason: Optional[str] = None) -> Dict[str, Any]:
+    """Summarize budget limits and consumption for API responses."""
+    budget = budget or new_budget()
+    usage = {**new_usage(), **(usage or {})}
+    return {
+        "token_budget": budget.get("token_budget"),
+        "cost_budget": budget.get("cost_budget"),
+        "step_budget": budget.get("step_budget"),
+        "tokens_used": usage["total_tokens"],
+        "cost_used": round(usage["cost"], 6),
+        "steps_used": usage["steps"],
+        "exhausted": exhausted_reason is not None,
+        "exhausted_reason": exhausted_reason
+    }
@@ -0,0 +1,166 @@
+#src/agent/cassette.py
+from typing import List, Dict, Any
+from langchain_core.messages import BaseMessage, ToolMessage, message_to_dict, messages_from_dict
+import gzip
+import hashlib
+import json
+import os
+
+CASSETTE_MODES = ("record", "replay", "replay_all")
+
+
+class CassetteMismatchError(RuntimeError):
+    """Raised when a replayed run asks for more than the cassette recorded."""
+
+
+class Cassette:
+    """
+    Records or replays the LLM and tool side of a single agent run.
+
+    Modes:
+        record: Call the LLM and tools for real and persist every exchange
+        replay: Serve LLM responses from the cassette, execute tools for real
+        replay_all: Serve both LLM responses and tool outputs from the cassette
+
+    The cassette is a gzip-compressed JSON-lines file. LLM requests are stored as a
+    delta against the previous request (the history only grows), plus a digest of
+    the full request so replays can detect a diverging trajectory.
+    """
+
+    def __init__(self, path: str, mode: str = "record"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}. Expected one of {CASSETTE_MODES}")
+        self.path = path
+        self.mode = mode
+        self.entries: List[Dict[str, Any]] = []
+        self._previous_request: List[Dict[str, Any]] = []
+        self._llm_cursor = 0
+        self._tool_outputs: Dict[str, Dict[str, Any]] = {}
+
+        if mode != "record":
+            self.load()
+
+    @property
+    def replays_llm(self) -> bool:
+        return self.mode in ("replay", "replay_all")
+
+    @property
+    def replays_tools(self) -> bool:
+        return self.mode == "replay_all"
+
+    @staticmethod
+    def _digest(request: List[BaseMessage]) -> str:
+        """Digest of the request content, ignoring per-run message IDs and metadata."""
+        fingerprint = [
+            [
+                msg.type,
+                msg.content,
+                [[tc["name"], tc["args"], tc["id"]] for tc in getattr(msg, "tool_calls", None) or []],
+                getattr(msg, "tool_call_id", None)
+            ]
+            for msg in request
+        ]
+        payload = json.dumps(fingerprint, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def record_llm(self, request: List[BaseMessage], response: BaseMessage, elapsed_ms: float) -> None:
+        """Record one LLM call (request messages and the AI response)."""
+        serialized = [message_to_dict(msg) for msg in request]
+
+        # Store only the part of the request that differs from the previous one
+        prefix_len = 0
+        for previous, current in zip(self._previous_request, serialized):
+            if previous != current:
+                break
+            prefix_len += 1
+        self._previous_request = serialized
+
+        self.entries.append({
+            "kind": "llm",
+            "request_prefix": prefix_len,
+            "request_delta": serialized[prefix_len:],
+            "request_digest": self._digest(request),
+            "response": message_to_dict(response),
+            "elapsed_ms": round(elapsed_ms, 3)
+        })
+
+    def replay_llm(self, request: List[BaseMessage]) -> BaseMessage:
+        """Return the next recorded AI response, warning if the request diverged."""
+        llm_entries = [entry for entry in self.entries if entry["kind"] == "llm"]
+        if self._llm_cursor >= len(llm_entries):
+            raise CassetteMismatchError(
+                f"Cassette {self.path} has only {len(llm_entries)} recorded LLM calls"
+            )
+        entry = llm_entries[self._llm_cursor]
+        self._llm_cursor += 1
+
+        if self._digest(request) != entry["request_digest"]:
+            print(f"Warning: LLM request {self._llm_cursor} differs from the recording in {self.path}")
+
+        return messages_from_dict([entry["response"]])[0]
+
+    def record_tools(self, tool_calls: List[Dict[str, Any]], outputs: List[BaseMessage], elapsed_ms: float) -> None:
+        """Record the tool calls of one step with their outputs."""
+        calls_by_id = {tc["id"]: tc for tc in tool_calls}
+        calls = []
+        for output in outputs:
+            tool_call_id = getattr(output, "tool_call_id", None)
+            call = calls_by_id.get(tool_call_id, {})
+            calls.append({
+                "tool_call_id": tool_call_id,
+                "name": call.get("name"),
+                "args": call.get("args"),
+                "output": message_to_dict(output)
+            })
+        entry = {"kind": "tools", "calls": calls, "elapsed_ms": round(elapsed_ms, 3)}
+        self.entries.append(entry)
+        self._index_tool_outputs(entry)
+
+    def _index_tool_outputs(self, entry: Dict[str, Any]) -> None:
+        for call in entry["calls"]:
+            self._tool_outputs[call["tool_call_id"]] = call
+
+    def replay_tools(self, tool_calls: List[Dict[str, Any]]) -> List[BaseMessage]:
+        """Return the recorded outputs for the given tool calls."""
+        outputs = []
+        for tc in tool_calls:
+            call = self._tool_outputs.get(tc["id"])
+            if call is None:
+                outputs.append(ToolMessage(
+                    content=f"Error: no recorded output for tool call {tc['id']} ({tc['name']})",
+                    tool_call_id=tc["id"],
+                    name=tc["name"]
+                ))
+            else:
+                outputs.append(messages_from_dict([call["output"]])[0])
+        return outputs
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals of recorded LLM and tool time, to separate model latency from our own overhead."""
+        llm = [entry["elapsed_ms"] for entry in self.entries if entry["kind"] == "llm"]
+        tools = [entry for entry in self.entries if entry["kind"] == "tools"]
+        return {
+            "llm_calls": len(llm),
+            "llm_ms": round(sum(llm), 3),
+            "tool_calls": sum(len(entry["calls"]) for entry in tools),
+            "tool_ms": round(sum(entry["elapsed_ms"] for entry in tools), 3)
+        }
+
+    def save(self) -> None:
+        """Write the recording to disk."""
+        if self.mode != "record":
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, default=str, separators=(",", ":")) + "\n")
+
+    def load(self) -> None:
+        """Read a recording from disk."""
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            self.entries = [json.loads(line) for line in f if line.strip()]
+        self._tool_outputs = {}
+        for entry in self.entries:
+            if entry["kind"] == "tools":
+                self._index_tool_outputs(entry)
+        self._llm_cursor = 0
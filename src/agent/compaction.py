@@ -0,0 +1,107 @@
+#src/agent/compaction.py
+from typing import Dict, Any, List, Optional
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.store.base import BaseStore
+import os
+
+from src.agent.tools import print_tool_execution
+
+# Total (estimated) tokens of tool output allowed in the history before older
+# outputs get compacted
+COMPACTION_TOKEN_THRESHOLD = int(os.getenv("COMPACTION_TOKEN_THRESHOLD", "6000"))
+# Number of most recent tool results that are always kept verbatim
+COMPACTION_KEEP_LAST = int(os.getenv("COMPACTION_KEEP_LAST", "3"))
+# Characters kept from the head and tail of a compacted output
+COMPACTION_PREVIEW_CHARS = int(os.getenv("COMPACTION_PREVIEW_CHARS", "400"))
+
+# Store namespace prefix holding the original tool outputs
+TOOL_OUTPUT_NAMESPACE = "tool_outputs"
+COMPACTED_MARKER = "[compacted tool output"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for compaction decisions."""
+    return len(text) // 4 + 1
+
+
+def tool_output_namespace(config: Optional[RunnableConfig]) -> tuple:
+    """Namespace in the store under which original tool outputs of a thread are kept."""
+    thread_id = "default"
+    if config:
+        thread_id = config.get("configurable", {}).get("thread_id", "default")
+    return (TOOL_OUTPUT_NAMESPACE, thread_id)
+
+
+def _summarize_output(content: str, ref: str) -> str:
+    """Keep the head and tail of a tool output and point to the full text by reference."""
+    head = content[:COMPACTION_PREVIEW_CHARS]
+    tail = content[-COMPACTION_PREVIEW_CHARS:]
+    omitted = len(content) - len(head) - len(tail)
+    return (
+        f"{COMPACTED_MARKER}: {omitted} of {len(content)} characters omitted. "
+        f"Call retrieve_tool_output with ref='{ref}' to read the full text]\n"
+        f"{head}\n...\n{tail}"
+    )
+
+
+def compact_history(state: Dict[str, Any], config: RunnableConfig, store: BaseStore) -> Dict[str, Any]:
+    """
+    Compact old tool outputs before the agent runs so the prompt stays roughly flat in size.
+
+    The latest COMPACTION_KEEP_LAST tool results are kept in full. Older outputs are
+    replaced, oldest first, by a head/tail preview until the estimated tool output size
+    is under COMPACTION_TOKEN_THRESHOLD. The original content is saved in the store and
+    can be read back with the retrieve_tool_output tool.
+
+    Args:
+        state: The current graph state
+        config: The run configuration (used for the thread ID)
+        store: The graph store used as side storage for original outputs
+
+    Returns:
+        State update replacing the compacted messages (matched by message ID)
+    """
+    tool_messages: List[ToolMessage] = [
+        msg for msg in state["messages"] if isinstance(msg, ToolMessage)
+    ]
+    total_tokens = sum(estimate_tokens(str(msg.content)) for msg in tool_messages)
+
+    if total_tokens <= COMPACTION_TOKEN_THRESHOLD:
+        return {}
+
+    namespace = tool_output_namespace(config)
+    min_compactable = estimate_tokens("x" * (4 * COMPACTION_PREVIEW_CHARS))
+    older = tool_messages[:max(0, len(tool_messages) - COMPACTION_KEEP_LAST)]
+
+    compacted = []
+    for msg in older:
+        if total_tokens <= COMPACTION_TOKEN_THRESHOLD:
+            break
+
+        content = str(msg.content)
+        if content.startswith(COMPACTED_MARKER) or estimate_tokens(content) <= min_compactable:
+            continue
+
+        ref = msg.tool_call_id
+        store.put(namespace, ref, {"content": content, "name": msg.name})
+
+        summary = _summarize_output(content, ref)
+        compacted.append(
+            ToolMessage(
+                content=summary,
+                tool_call_id=msg.tool_call_id,
+                name=msg.name,
+                id=msg.id,
+            )
+        )
+        total_tokens -= estimate_tokens(content) - estimate_tokens(summary)
+
+    if not compacted:
+        return {}
+
+    print_tool_execution(
+        "COMPACTION", "SUCCESS",
+        f"Compacted {len(compacted)} tool outputs (~{total_tokens} tool tokens remain in history)"
+    )
+    return {"messages": compacted}
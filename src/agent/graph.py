@@ -1,12 +1,13 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langgraph.graph import StateGraph, START, END
+from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 from langgraph.prebuilt import ToolNode
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langchain_core.messages import HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableLambda, RunnableWithFallbacks, RunnableConfig
 from src.agent.state import State
-from src.agent.agent import run_agent, should_continue
+from src.agent.agent import run_agent, should_continue, should_end, finalize_report
 from src.agent.tools import (
     fetch_dataset_info, 
     execute_python, 
@@ -14,8 +15,26 @@ from src.agent.tools import (
     install_python_packages, 
     ask_ai,
     db_query_tool,
+    retrieve_tool_output,
     print_tool_execution
 )
+from src.agent.compaction import compact_history
+from src.agent.budget import new_budget, new_usage
+from src.agent.cassette import Cassette
+from src.telemetry import span, traced
+from src.telemetry.callbacks import tool_span_handler
+import os
+import time
+
+# Each agent step runs the compact, agent and tools nodes
+DEFAULT_RECURSION_LIMIT = 75
+
+
+def recursion_limit_for(step_budget: Optional[int]) -> int:
+    """Recursion limit that leaves room for the allowed number of agent steps."""
+    if step_budget is None:
+        return DEFAULT_RECURSION_LIMIT
+    return max(DEFAULT_RECURSION_LIMIT, 3 * step_budget + 3)
 
 def handle_tool_error(state) -> Dict:
     """Handle errors from tool execution and surface them to the agent."""
@@ -42,8 +61,57 @@ def create_tool_node_with_fallback(tools: List) -> RunnableWithFallbacks:
         exception_key="error"
     )
 
+def create_cassette_tool_node(tools_node: RunnableWithFallbacks):
+    """Wrap the tools node so tool calls are recorded to or replayed from the run's cassette."""
+    def run_tools(state: Dict, config: RunnableConfig) -> Dict:
+        cassette = config.get("configurable", {}).get("cassette")
+        if cassette is None:
+            return tools_node.invoke(state, config)
+        
+        tool_calls = state["messages"][-1].tool_calls
+        if cassette.replays_tools:
+            print_tool_execution("CASSETTE", "SUCCESS", f"Replaying {len(tool_calls)} tool outputs")
+            return {"messages": cassette.replay_tools(tool_calls)}
+        
+        started = time.perf_counter()
+        result = tools_node.invoke(state, config)
+        if cassette.mode == "record":
+            cassette.record_tools(tool_calls, result["messages"], (time.perf_counter() - started) * 1000)
+        return result
+    
+    return run_tools
+
+def create_traced_tool_node(tools_node):
+    """Wrap the tools node (a runnable or a function) in a "node" span."""
+    def run_tools(state: Dict, config: RunnableConfig) -> Dict:
+        with span("node", "tools"):
+            if callable(getattr(tools_node, "invoke", None)):
+                return tools_node.invoke(state, config)
+            return tools_node(state, config)
+    
+    return run_tools
+
 class ScienceAgent:
-    def __init__(self):
+    def __init__(
+        self,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
+        store: Optional[BaseStore] = None,
+        cassette_mode: Optional[str] = None,
+        cassette_dir: str = "cassettes"
+    ):
+        """
+        Args:
+            checkpointer: Checkpoint saver used to persist conversation state between turns
+            store: Store for compacted tool outputs (an in-memory store when None)
+            cassette_mode: None, "record", "replay" (LLM from cassette, real tools)
+                or "replay_all" (LLM and tools from cassette)
+            cassette_dir: Directory for cassette files when no explicit path is given
+        """
+        self.checkpointer = checkpointer
+        self.store = store if store is not None else InMemoryStore()
+        self.cassette_mode = cassette_mode
+        self.cassette_dir = cassette_dir
+        
         # Create the graph
         self.graph = self._build_graph()
     
@@ -52,8 +120,12 @@ class ScienceAgent:
         # Initialize the state graph
         graph_builder = StateGraph(State)
         
+        # Every node is timed as a "node" span (see src/telemetry)
+        # Add history compaction node (runs before every agent step)
+        graph_builder.add_node("compact", traced("node", "compact")(compact_history))
+        
         # Add agent node
-        graph_builder.add_node("agent", run_agent)
+        graph_builder.add_node("agent", traced("node", "agent")(run_agent))
         
         # Define tools explicitly to ensure they are properly serializable
         tools = [
@@ -62,41 +134,81 @@ class ScienceAgent:
             explain_graph,
             install_python_packages,
             ask_ai,
-            db_query_tool
+            db_query_tool,
+            retrieve_tool_output
         ]
         
         # Add tools node with proper error handling
         tools_node = create_tool_node_with_fallback(tools)
-        graph_builder.add_node("tools", tools_node)
+        if self.cassette_mode:
+            tools_node = create_cassette_tool_node(tools_node)
+        graph_builder.add_node("tools", create_traced_tool_node(tools_node))
+        
+        # Add final report validation node
+        graph_builder.add_node("finalize", traced("node", "finalize")(finalize_report))
         
         # Add edges
-        graph_builder.add_edge(START, "agent")
+        graph_builder.add_edge(START, "compact")
+        graph_builder.add_edge("compact", "agent")
         graph_builder.add_conditional_edges(
             "agent", 
             should_continue, 
             {
                 "tools": "tools",
+                "finalize": "finalize",
+                "end": END
+            }
+        )
+        graph_builder.add_edge("tools", "compact")
+        graph_builder.add_conditional_edges(
+            "finalize",
+            should_end,
+            {
+                "compact": "compact",
                 "end": END
             }
         )
-        graph_builder.add_edge("tools", "agent")
-        
-        # # Add memory persistence
-        # memory = MemorySaver() 
-        
-        # Create a store for tool annotations
-        store = InMemoryStore()
         
-        # Compile the graph with the store
-        return graph_builder.compile(checkpointer=None, store=store) #checkpointer=memory)
+        # Compile the graph with the store and the (optional) durable checkpointer
+        return graph_builder.compile(checkpointer=self.checkpointer, store=self.store)
     
-    def run(self, user_input: str, thread_id: str = "default") -> Dict[str, Any]:
+    def _open_cassette(self, thread_id: str, cassette_path: Optional[str]) -> Optional[Cassette]:
+        """Open the cassette for a run when a cassette mode is configured."""
+        if not self.cassette_mode:
+            return None
+        path = cassette_path or os.path.join(self.cassette_dir, f"{thread_id}.jsonl.gz")
+        return Cassette(path, mode=self.cassette_mode)
+    
+    def _make_config(self, thread_id: str, step_budget: Optional[int], cassette: Optional[Cassette]) -> RunnableConfig:
+        """Build the run configuration (thread ID, recursion limit, cassette and tool spans)."""
+        configurable = {"thread_id": thread_id}
+        if cassette is not None:
+            configurable["cassette"] = cassette
+        return RunnableConfig(
+            configurable=configurable,
+            recursion_limit=recursion_limit_for(step_budget),
+            callbacks=[tool_span_handler]
+        )
+    
+    def run(
+        self,
+        user_input: str,
+        thread_id: str = "default",
+        token_budget: Optional[int] = None,
+        cost_budget: Optional[float] = None,
+        step_budget: Optional[int] = None,
+        cassette_path: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Run the agent with the given user input.
         
         Args:
             user_input: The user's input message
             thread_id: A unique identifier for the conversation thread
+            token_budget: Maximum total tokens for the run (None for unlimited)
+            cost_budget: Maximum estimated cost in USD for the run (None for unlimited)
+            step_budget: Maximum number of agent (LLM) steps for the run (None for unlimited)
+            cassette_path: Cassette file to record to or replay from (when a cassette mode is set)
         
         Returns:
             The final state of the graph execution
@@ -106,19 +218,25 @@ class ScienceAgent:
         print("="*50)
         
         # Configure the thread ID for memory persistence and set recursion limit
-        config = RunnableConfig(
-            configurable={"thread_id": thread_id},
-            recursion_limit=50  # Set your desired recursion limit here
-        )
+        cassette = self._open_cassette(thread_id, cassette_path)
+        config = self._make_config(thread_id, step_budget, cassette)
         
         # Create the initial state with the user's message
         initial_state = {
             "messages": [HumanMessage(content=user_input)],
-            "plot_paths": []  # Initialize empty plot paths for storing visualization results
+            "plot_paths": [],  # Initialize empty plot paths for storing visualization results
+            "budget": new_budget(token_budget, cost_budget, step_budget),
+            "usage": new_usage(),
+            "budget_exhausted": None,
+            "final_report": None
         }
         
         # Execute the graph
-        result = self.graph.invoke(initial_state, config)
+        try:
+            result = self.graph.invoke(initial_state, config)
+        finally:
+            if cassette is not None:
+                cassette.save()
         
         print("\n" + "="*50)
         print("Agent run completed")
@@ -126,13 +244,25 @@ class ScienceAgent:
         
         return result
     
-    def continue_conversation(self, user_input: str, thread_id: str = "default") -> Dict[str, Any]:
+    def continue_conversation(
+        self,
+        user_input: str,
+        thread_id: str = "default",
+        token_budget: Optional[int] = None,
+        cost_budget: Optional[float] = None,
+        step_budget: Optional[int] = None,
+        cassette_path: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Continue an existing conversation with new user input.
         
         Args:
             user_input: The user's new input message
             thread_id: The identifier for the existing conversation thread
+            token_budget: Maximum total tokens for this turn (None for unlimited)
+            cost_budget: Maximum estimated cost in USD for this turn (None for unlimited)
+            step_budget: Maximum number of agent (LLM) steps for this turn (None for unlimited)
+            cassette_path: Cassette file to record to or replay from (when a cassette mode is set)
         
         Returns:
             The final state of the graph execution
@@ -142,18 +272,24 @@ class ScienceAgent:
         print("="*50)
         
         # Configure the thread ID for memory persistence
-        config = RunnableConfig(
-            configurable={"thread_id": thread_id},
-            recursion_limit=50
-        )
+        cassette = self._open_cassette(thread_id, cassette_path)
+        config = self._make_config(thread_id, step_budget, cassette)
         
-        # Create a state with only the new user message
+        # Create a state with only the new user message; budgets apply per turn
         new_state = {
-            "messages": [HumanMessage(content=user_input)]
+            "messages": [HumanMessage(content=user_input)],
+            "budget": new_budget(token_budget, cost_budget, step_budget),
+            "usage": new_usage(),
+            "budget_exhausted": None,
+            "final_report": None
         }
         
         # Execute the graph, which will automatically load the previous state
-        result = self.graph.invoke(new_state, config)
+        try:
+            result = self.graph.invoke(new_state, config)
+        finally:
+            if cassette is not None:
+                cassette.save()
         
         print("\n" + "="*50)
         print("Conversation continuation completed")
@@ -176,36 +312,56 @@ class ScienceAgent:
         
         return state.values.get("messages", [])
     
-    def stream_run(self, user_input: str, thread_id: str = "default"):
+    def stream_run(
+        self,
+        user_input: str,
+        thread_id: str = "default",
+        token_budget: Optional[int] = None,
+        cost_budget: Optional[float] = None,
+        step_budget: Optional[int] = None,
+        cassette_path: Optional[str] = None,
+        stream_mode: Any = "values"
+    ):
         """
         Stream the agent execution with the given user input.
         
         Args:
             user_input: The user's input message
             thread_id: A unique identifier for the conversation thread
+            token_budget: Maximum total tokens for the run (None for unlimited)
+            cost_budget: Maximum estimated cost in USD for the run (None for unlimited)
+            step_budget: Maximum number of agent (LLM) steps for the run (None for unlimited)
+            cassette_path: Cassette file to record to or replay from (when a cassette mode is set)
+            stream_mode: LangGraph stream mode, or a list of modes to get (mode, chunk) tuples
             
         Yields:
-            Intermediate states as the agent runs
+            Intermediate states (or updates) as the agent runs
         """
         print("\n" + "="*50)
         print(f"Starting streaming agent run for thread: {thread_id}")
         print("="*50)
         
         # Configure the thread ID for memory persistence
-        config = RunnableConfig(
-            configurable={"thread_id": thread_id},
-            recursion_limit=50
-        )
+        cassette = self._open_cassette(thread_id, cassette_path)
+        config = self._make_config(thread_id, step_budget, cassette)
         
         # Create the initial state with the user's message
         initial_state = {
             "messages": [HumanMessage(content=user_input)],
-            "plot_paths": []  # Initialize empty plot paths
+            "plot_paths": [],  # Initialize empty plot paths
+            "budget": new_budget(token_budget, cost_budget, step_budget),
+            "usage": new_usage(),
+            "budget_exhausted": None,
+            "final_report": None
         }
         
         # Stream the graph execution
-        for chunk in self.graph.stream(initial_state, config, stream_mode="values"):
-            yield chunk
+        try:
+            for chunk in self.graph.stream(initial_state, config, stream_mode=stream_mode):
+                yield chunk
+        finally:
+            if cassette is not None:
+                cassette.save()
         
         print("\n" + "="*50)
         print("Streaming agent run completed")
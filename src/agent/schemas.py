@@ -0,0 +1,68 @@
+#src/agent/schemas.py
+from copy import deepcopy
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing import Any, Dict, List
+
+# Structured final answer of the agent. The model submits it by calling the
+# AgentReport tool, and the arguments are validated against this schema.
+
+class VisualizationInfo(BaseModel):
+    path: str = Field(description="Full path to the visualization")
+    description: str = Field(description="Description of what the visualization shows")
+    key_insights: List[str] = Field(description="Statistical insights with exact numerical values")
+
+class ActionStep(BaseModel):
+    step: int
+    description: str
+
+class DecisionJustification(BaseModel):
+    decision: str
+    justification: str
+    tool_used: str = Field(description="Name of the tool used for this decision")
+
+class AgentReport(BaseModel):
+    """Submit the final structured analysis report. Call this once, when the analysis is complete."""
+    action_plan: List[ActionStep]
+    decisions_and_justifications: List[DecisionJustification]
+    observations: List[str]
+    visualizations: List[VisualizationInfo]
+    summary: str
+    next_steps: List[str]
+    conclusion: str
+
+REPORT_TOOL_NAME = AgentReport.__name__
+REPORT_FIELDS = list(AgentReport.model_fields)
+
+# Stands in for every report field that is missing or does not match the schema
+REPORT_TEMPLATE = {
+    "action_plan": [
+        {"step": 1, "description": "Process didnt complete"},
+    ],
+    "decisions_and_justifications": [
+        {"decision": "None", "justification": "None", "tool_used": "None"}
+    ],
+    "observations": ["Analysis Failed"],
+    "visualizations": [],
+    "summary": "Analysis wasnt completed.",
+    "next_steps": ["None"],
+    "conclusion": "Agent run failed or didnt complete."
+}
+
+_REPORT_FIELD_ADAPTERS = {name: TypeAdapter(field.annotation) for name, field in AgentReport.model_fields.items()}
+
+def repair_report(args: Any) -> Dict[str, Any]:
+    """
+    Build a schema-valid report from possibly invalid report arguments.
+
+    Each field is validated on its own, and a field that is missing or fails
+    validation gets its REPORT_TEMPLATE value, so the valid parts of a forced or
+    extracted report are kept.
+    """
+    args = args if isinstance(args, dict) else {}
+    report = {}
+    for name, adapter in _REPORT_FIELD_ADAPTERS.items():
+        try:
+            report[name] = adapter.dump_python(adapter.validate_python(args[name]))
+        except (KeyError, ValidationError):
+            report[name] = deepcopy(REPORT_TEMPLATE[name])
+    return report
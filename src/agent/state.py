@@ -6,7 +6,7 @@ from langgraph.graph.message import add_messages
 #     """State for the scientific agent graph."""
 #     messages: Annotated[List[BaseMessage], add_messages]
 
-from typing import List, Dict, Any, Annotated
+from typing import List, Dict, Any, Annotated, Optional
 from typing_extensions import TypedDict
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import AnyMessage, add_messages
@@ -16,6 +16,13 @@ class State(TypedDict):
     messages: Annotated[List[AnyMessage], add_messages]
     plot_paths: List[str]  # For storing paths to generated plots
     
+    # Per-run budgets and live consumption (see src/agent/budget.py)
+    budget: Dict[str, Any]  # token_budget, cost_budget, step_budget limits
+    usage: Dict[str, Any]  # Tokens, cost and steps used so far
+    budget_exhausted: Optional[str]  # Reason the final answer was forced, if any
+    
+    final_report: Optional[Dict[str, Any]]  # Validated AgentReport (see src/agent/schemas.py)
+    
     # Optional additional fields for future use
     dataset_info: Dict[str, Any] = {}  # For caching dataset information
     analysis_results: Dict[str, Any] = {}  # For storing analysis results
\ No newline at end of file
@@ -4,21 +4,42 @@ from langchain_core.tools import tool
 from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import InjectedState, InjectedStore
 # Remove BaseStore import since we're not using it anymore
-import pandas as pd
 import os
 import json
+import threading
 import traceback
 from src.python_executor.simple_python_executor import SimplePythonExecutor
+from src.helpers.artifacts import store_artifact
+from src.telemetry import span
 from src.openai_tool.client import OpenAIClient
-from src.openai_tool.OpenAIVisionClient import OpenAIVisionClient
+from src.openai_tool.OpenAIVisionClient import OpenAIVisionClient, OpenAIFigureDataClient
 
-# Initialize the Python executor once for global use
-# The executor will automatically detect Docker environment and adapt
-python_executor = SimplePythonExecutor(
-    venv_path=os.path.join(os.getcwd(), "venvs"),
-    auto_install=True,
-    use_system_python=False  # Let it auto-detect Docker
-)
+# Plot folders are per execution and never cleared globally (other runs may still
+# need them); folders older than PLOT_RETENTION_HOURS are pruned instead
+PLOT_RETENTION_HOURS = float(os.getenv("PLOT_RETENTION_HOURS", "24"))
+
+_python_executor: Optional[SimplePythonExecutor] = None
+_python_executor_lock = threading.Lock()
+
+def get_python_executor() -> SimplePythonExecutor:
+    """
+    The Python executor shared by the tools, created on first use.
+
+    Creating it checks (and may create) the virtual environment and installs
+    missing packages, so it is not done at import time.
+    """
+    global _python_executor
+    if _python_executor is None:
+        with _python_executor_lock:
+            if _python_executor is None:
+                # The executor will automatically detect Docker environment and adapt
+                _python_executor = SimplePythonExecutor(
+                    venv_path=os.path.join(os.getcwd(), "venvs"),
+                    auto_install=True,
+                    use_system_python=False,  # Let it auto-detect Docker
+                    plot_retention_hours=PLOT_RETENTION_HOURS or None
+                )
+    return _python_executor
 
 # Status printing utility
 def print_tool_execution(tool_name: str, status: str = "RUNNING", details: str = None):
@@ -57,6 +78,8 @@ def fetch_dataset_info(
     print_tool_execution("fetch_dataset_info", "RUNNING", f"Fetching dataset info from {dataset_path}")
     
     try:
+        import pandas as pd
+        
         datasets = {}
         
         # Check if dataset_path exists
@@ -127,7 +150,14 @@ def execute_python(
     print_tool_execution("execute_python", "RUNNING", f"Executing Python code...")
     
     try:
-        result = python_executor.execute_code(code)
+        result = get_python_executor().execute_code(code)
+        
+        # Publish plots as content-addressed artifacts (identical figures are stored once)
+        with span("executor", "plot_save"):
+            result["plot_paths"] = list(dict.fromkeys(
+                store_artifact(path) if os.path.isfile(path) else path
+                for path in result["plot_paths"]
+            ))
         
         response_parts = []
         
@@ -186,7 +216,7 @@ def install_python_packages(
             print_tool_execution("install_python_packages", "ERROR", "No packages specified")
             return "No packages specified for installation."
         
-        result = python_executor.install_packages(package_list)
+        result = get_python_executor().install_packages(package_list)
         
         if result["success"]:
             success_msg = f"Successfully installed packages: {', '.join(package_list)}"
@@ -258,12 +288,22 @@ def explain_graph(
             print_tool_execution("explain_graph", "ERROR", "No image paths provided or found in state")
             return "Error: No images to explain. Please generate plots first using execute_python."
         
-        # Use your existing OpenAIVisionClient implementation
-        explanation = OpenAIVisionClient(
-            query=query,
-            image_paths=image_paths,
-            system_prompt="You are a helpful visual analysis assistant. Describe what you observe in the images with scientific precision. Analyze trends, patterns, outliers, and relationships between variables. Explain what scientific insights can be drawn from these visualizations."
-        )
+        # Answer from the plotted data when every figure has a complete data sidecar
+        try:
+            explanation = OpenAIFigureDataClient(query=query, image_paths=image_paths)
+        except Exception as e:
+            print_tool_execution("explain_graph", "ERROR", f"Figure data explanation failed, using vision: {str(e)}")
+            explanation = None
+        
+        if explanation is not None:
+            print_tool_execution("explain_graph", "RUNNING", "Explained from extracted figure data")
+        else:
+            # Fall back to the vision model
+            explanation = OpenAIVisionClient(
+                query=query,
+                image_paths=image_paths,
+                system_prompt="You are a helpful visual analysis assistant. Describe what you observe in the images with scientific precision. Analyze trends, patterns, outliers, and relationships between variables. Explain what scientific insights can be drawn from these visualizations."
+            )
         
         if not explanation:
             print_tool_execution("explain_graph", "ERROR", "No explanation provided")
@@ -304,4 +344,51 @@ def db_query_tool(
     except Exception as e:
         error_trace = traceback.format_exc()
         print_tool_execution("db_query_tool", "ERROR", error_trace)
-        return f"Error executing query: {str(e)}\n{error_trace}"
\ No newline at end of file
+        return f"Error executing query: {str(e)}\n{error_trace}"
+
+
+@tool
+def retrieve_tool_output(
+    ref: str,
+    offset: int = 0,
+    length: int = 8000,
+    store: Annotated[Any, InjectedStore()] = None,
+    config: RunnableConfig = None
+) -> str:
+    """
+    Retrieve the full text of an earlier tool output that was compacted in the history.
+    
+    Args:
+        ref: The reference shown in the compacted tool output
+        offset: Character offset to start reading from
+        length: Maximum number of characters to return
+        
+    Returns:
+        The requested slice of the original tool output
+    """
+    from src.agent.compaction import tool_output_namespace
+    
+    print_tool_execution("retrieve_tool_output", "RUNNING", f"Retrieving output for ref: {ref}")
+    
+    try:
+        if store is None:
+            print_tool_execution("retrieve_tool_output", "ERROR", "No store available")
+            return "Error: No store available to retrieve tool outputs from."
+        
+        item = store.get(tool_output_namespace(config), ref)
+        if item is None:
+            print_tool_execution("retrieve_tool_output", "ERROR", f"Unknown ref: {ref}")
+            return f"Error: No stored tool output found for ref '{ref}'."
+        
+        content = item.value["content"]
+        chunk = content[offset:offset + length]
+        remaining = max(0, len(content) - offset - len(chunk))
+        
+        print_tool_execution("retrieve_tool_output", "SUCCESS")
+        if remaining:
+            return f"{chunk}\n\n[{remaining} more characters; call again with offset={offset + len(chunk)}]"
+        return chunk
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print_tool_execution("retrieve_tool_output", "ERROR", error_trace)
+        return f"Error retrieving tool output: {str(e)}\n{error_trace}"
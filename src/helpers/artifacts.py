@@ -0,0 +1,158 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from typing import Optional
+
+from src.python_executor.figure_data import sidecar_path
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "src/data/artifacts")
+ARTIFACT_URL_PREFIX = "/artifacts/"
+# Thumbnail widths served with ?w=; other widths are rejected so the variant cache stays bounded
+THUMBNAIL_WIDTHS = (160, 320, 640, 1024)
+# Files that publish_plot turns into artifacts
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg")
+
+# Artifact names are <sha256>.<ext>; thumbnails are stored next to them as <sha256>.w<width>.<ext>
+_ARTIFACT_NAME = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]{1,5})$")
+
+
+def _digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_copy(source: str, target: str) -> None:
+    """Copy source to target through a temporary file, so readers never see a partial file."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as out, open(source, "rb") as src:
+            shutil.copyfileobj(src, out)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def artifact_path(name: str, root: Optional[str] = None) -> Optional[str]:
+    """
+    Local path of an artifact name ("<sha256>.png"), or None if the name is invalid.
+
+    Artifacts are sharded by the first two hex characters of their hash.
+    """
+    if not _ARTIFACT_NAME.match(name):
+        return None
+    return os.path.join(root or ARTIFACT_DIR, name[:2], name)
+
+
+def store_artifact(path: str, root: Optional[str] = None) -> str:
+    """
+    Store a file under its content hash, once.
+
+    Identical files (e.g. the same figure produced by two runs) map to the same
+    artifact. The figure-data sidecar of a plot is stored next to the artifact
+    so graphs can still be explained from their data.
+
+    Args:
+        path: The file to store
+        root: Artifact directory (defaults to ARTIFACT_DIR)
+
+    Returns:
+        The artifact path (<root>/<h[:2]>/<sha256>.<ext>)
+    """
+    ext = os.path.splitext(path)[1].lower().lstrip(".") or "bin"
+    name = f"{_digest(path)}.{ext}"
+    target = artifact_path(name, root)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if not os.path.exists(target):
+        _atomic_copy(path, target)
+
+    # Skip sidecars older than their image (the image was overwritten without one)
+    sidecar = sidecar_path(path)
+    if (
+        os.path.exists(sidecar)
+        and os.path.getmtime(sidecar) >= os.path.getmtime(path)
+        and not os.path.exists(sidecar_path(target))
+    ):
+        _atomic_copy(sidecar, sidecar_path(target))
+    return target
+
+
+def is_artifact_path(path: str, root: Optional[str] = None) -> bool:
+    """Whether path is a file stored by store_artifact."""
+    root = os.path.normpath(root or ARTIFACT_DIR)
+    return os.path.normpath(os.path.dirname(os.path.dirname(path))) == root and bool(
+        _ARTIFACT_NAME.match(os.path.basename(path))
+    )
+
+
+def publish_plot(path: str) -> Optional[str]:
+    """
+    Store a plot referenced by the agent (e.g. in its report) as an artifact.
+
+    Only image files inside the working directory are published, so a path
+    in model output cannot expose arbitrary files.
+
+    Returns:
+        The artifact path, or None if path is not a publishable image
+    """
+    if is_artifact_path(path):
+        return path
+    if not path.lower().endswith(IMAGE_EXTENSIONS) or not os.path.isfile(path):
+        return None
+    if os.path.commonpath([os.path.realpath(path), os.getcwd()]) != os.getcwd():
+        return None
+    return store_artifact(path)
+
+
+def artifact_url(path: str) -> str:
+    """URL an artifact is served under (see app/api/endpoints/artifacts.py)."""
+    return f"{ARTIFACT_URL_PREFIX}{os.path.basename(path)}"
+
+
+def thumbnail_path(name: str, width: int, root: Optional[str] = None) -> Optional[str]:
+    """
+    Path of a thumbnail variant of an image artifact, rendered on first request.
+
+    Args:
+        name: The artifact name ("<sha256>.png")
+        width: One of THUMBNAIL_WIDTHS
+        root: Artifact directory (defaults to ARTIFACT_DIR)
+
+    Returns:
+        The thumbnail path, or None if the artifact does not exist or is not an image
+    """
+    from PIL import Image
+
+    source = artifact_path(name, root)
+    if source is None or not os.path.exists(source):
+        return None
+    digest, ext = _ARTIFACT_NAME.match(name).groups()
+    target = os.path.join(os.path.dirname(source), f"{digest}.w{width}.{ext}")
+    if os.path.exists(target):
+        return target
+
+    try:
+        with Image.open(source) as image:
+            image.load()
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS, reducing_gap=2.0)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-", suffix=f".{ext}")
+            os.close(fd)
+            try:
+                image.save(tmp, optimize=True)
+                os.replace(tmp, target)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+    except OSError:
+        return None
+    return target
@@ -1,5 +1,4 @@
 import os
-import pandas as pd
 
 
 def fetch_local_data(directory_path: str) -> dict:
@@ -10,6 +9,9 @@ def fetch_local_data(directory_path: str) -> dict:
     
     Creates the directory if it doesn't exist.
     """
+    # pandas is only imported when data is actually read
+    import pandas as pd
+
     # Create directory if it doesn't exist
     if not os.path.exists(directory_path):
         os.makedirs(directory_path, exist_ok=True)
@@ -0,0 +1,123 @@
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Characters that change the scanner state; everything else is skipped by the regex engine
+_STRUCTURAL = re.compile(r'[{}"\\]')
+_TRAILING_COMMA = re.compile(r',(\s*[\]}])')
+
+
+def iter_object_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the (start, end) spans of the balanced top-level {...} blocks in text.
+
+    A single left-to-right pass that tracks brace depth and JSON string state, so
+    braces inside string values do not count. Quotes outside an object (prose) are
+    ignored. Runs in linear time however many candidate objects the text contains.
+    """
+    depth = 0
+    start = 0
+    in_string = False
+    skip_until = -1
+
+    for match in _STRUCTURAL.finditer(text):
+        index = match.start()
+        if index < skip_until:
+            continue
+        char = match.group()
+
+        if in_string:
+            if char == "\\":
+                skip_until = index + 2  # Skip the escaped character
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = depth > 0
+        elif char == "{":
+            if depth == 0:
+                start = index
+            depth += 1
+        elif char == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield start, index + 1
+
+
+def _loads(candidate: str) -> Optional[Any]:
+    """Parse a candidate, retrying once with trailing commas removed."""
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", candidate))
+    except json.JSONDecodeError:
+        return None
+
+
+def _unwrap(parsed: Dict[str, Any], required_fields: List[str]) -> Dict[str, Any]:
+    """Unwrap a single-key envelope such as {"result": {...}} around the expected object."""
+    if required_fields and not any(field in parsed for field in required_fields) and len(parsed) == 1:
+        inner = next(iter(parsed.values()))
+        if isinstance(inner, dict):
+            return inner
+    return parsed
+
+
+def extract_json_object(text: str, required_fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Extract the best JSON object from free-form model output.
+
+    Tolerates surrounding prose, markdown code fences and trailing commas. Each
+    top-level object is parsed at most once. The first object with every required
+    field is returned; otherwise the one with the most required fields, preferring
+    later objects on ties (the answer usually comes last).
+
+    Args:
+        text: The message content to search
+        required_fields: Keys the expected object should contain
+
+    Returns:
+        The parsed object, or None if the text contains no JSON object
+    """
+    if not text:
+        return None
+    required_fields = required_fields or []
+
+    keys = [f'"{field}"' for field in required_fields]
+
+    best = None
+    best_score = -1
+    first_span = None
+    for start, end in iter_object_spans(text):
+        candidate = text[start:end]
+        if keys and not any(key in candidate for key in keys):
+            # Cannot hold the expected object; parsed only if nothing better turns up
+            first_span = first_span or (start, end)
+            continue
+        parsed = _loads(candidate)
+        if not isinstance(parsed, dict):
+            continue
+        parsed = _unwrap(parsed, required_fields)
+        score = sum(1 for field in required_fields if field in parsed)
+        if score >= best_score:
+            best, best_score = parsed, score
+        if required_fields and score == len(required_fields):
+            break
+
+    if best is None and first_span is not None:
+        parsed = _loads(text[first_span[0]:first_span[1]])
+        if isinstance(parsed, dict):
+            best = _unwrap(parsed, required_fields)
+
+    if best is None:
+        # Unbalanced output (e.g. a stray quote): try the widest brace span once
+        first, last = text.find("{"), text.rfind("}")
+        if first != -1 and last > first:
+            parsed = _loads(text[first:last + 1])
+            if isinstance(parsed, dict):
+                best = _unwrap(parsed, required_fields)
+
+    return best
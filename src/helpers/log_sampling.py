@@ -0,0 +1,65 @@
+import logging
+import os
+import random
+from typing import Any
+
+# Root log level, applied at startup by configure_logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction of hot-path debug records that are emitted when DEBUG is enabled
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+# Sampled messages are cut to this many characters (agent states can be megabytes)
+LOG_MAX_CHARS = int(os.getenv("LOG_MAX_CHARS", "2000"))
+# HTTP client libraries that log every request (each model call) at INFO
+QUIET_LOGGERS = ("httpx", "httpcore")
+
+
+def configure_logging(level: str = LOG_LEVEL) -> None:
+    """
+    Send application log records to stderr at the given level (no-op if logging
+    is already configured). The HTTP client loggers stay at WARNING unless the
+    level is DEBUG.
+    """
+    logging.basicConfig(level=level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    quiet_level = logging.DEBUG if logging.getLogger().isEnabledFor(logging.DEBUG) else logging.WARNING
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(quiet_level)
+
+
+class SampledLogger:
+    """
+    Level-gated, sampled logging for per-request payloads.
+
+    The level and the sample are checked before the message is formatted, so
+    a disabled or unsampled record costs neither the repr of its arguments
+    nor any I/O. Emitted messages are truncated to max_chars.
+
+    Args:
+        logger: The logger to emit to
+        sample_rate: Fraction of records emitted (1.0 emits every record)
+        max_chars: Maximum length of an emitted message
+    """
+
+    def __init__(self, logger: logging.Logger, sample_rate: float = LOG_SAMPLE_RATE, max_chars: int = LOG_MAX_CHARS):
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+
+    def enabled(self, level: int) -> bool:
+        """Whether a record at this level would be emitted this time."""
+        if not self.logger.isEnabledFor(level):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def log(self, level: int, msg: str, *args: Any) -> None:
+        if not self.enabled(level):
+            return
+        message = msg % args if args else msg
+        if len(message) > self.max_chars:
+            message = f"{message[:self.max_chars]}... ({len(message) - self.max_chars} more characters)"
+        self.logger.log(level, message)
+
+    def debug(self, msg: str, *args: Any) -> None:
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg: str, *args: Any) -> None:
+        self.log(logging.INFO, msg, *args)
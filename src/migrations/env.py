@@ -1,4 +1,5 @@
 # src/migrations/env.py
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -14,6 +15,10 @@ config = context.config
 # This line sets up loggers basically.
 fileConfig(config.config_file_name)
 
+# DATABASE_URL (as used by app/db/base.py) overrides the URL in alembic.ini
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"])
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 from app.db.models import Base
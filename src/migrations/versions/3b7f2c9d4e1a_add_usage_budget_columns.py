@@ -0,0 +1,35 @@
+"""add_usage_budget_columns
+
+Revision ID: 3b7f2c9d4e1a
+Revises: 918d821a0a9c
+Create Date: 2026-10-19 09:12:41.208113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7f2c9d4e1a'
+down_revision = '918d821a0a9c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('usages', sa.Column('cost', sa.Float(), nullable=True))
+    op.add_column('usages', sa.Column('steps', sa.Integer(), nullable=True))
+    op.add_column('usages', sa.Column('token_budget', sa.Integer(), nullable=True))
+    op.add_column('usages', sa.Column('cost_budget', sa.Float(), nullable=True))
+    op.add_column('usages', sa.Column('step_budget', sa.Integer(), nullable=True))
+    op.add_column('usages', sa.Column('budget_exhausted', sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('usages') as batch_op:
+        batch_op.drop_column('budget_exhausted')
+        batch_op.drop_column('step_budget')
+        batch_op.drop_column('cost_budget')
+        batch_op.drop_column('token_budget')
+        batch_op.drop_column('steps')
+        batch_op.drop_column('cost')
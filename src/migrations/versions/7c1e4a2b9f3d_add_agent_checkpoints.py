@@ -0,0 +1,60 @@
+"""add_agent_checkpoints
+
+Revision ID: 7c1e4a2b9f3d
+Revises: 3b7f2c9d4e1a
+Create Date: 2026-10-19 10:02:17.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4a2b9f3d'
+down_revision = '3b7f2c9d4e1a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('agent_checkpoints',
+    sa.Column('thread_id', sa.String(), nullable=False),
+    sa.Column('checkpoint_ns', sa.String(), nullable=False),
+    sa.Column('checkpoint_id', sa.String(), nullable=False),
+    sa.Column('parent_checkpoint_id', sa.String(), nullable=True),
+    sa.Column('checkpoint_type', sa.String(), nullable=True),
+    sa.Column('checkpoint', sa.LargeBinary(), nullable=True),
+    sa.Column('metadata_type', sa.String(), nullable=True),
+    sa.Column('metadata', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id')
+    )
+    op.create_index(op.f('ix_agent_checkpoints_created_at'), 'agent_checkpoints', ['created_at'], unique=False)
+    op.create_table('agent_checkpoint_blobs',
+    sa.Column('thread_id', sa.String(), nullable=False),
+    sa.Column('checkpoint_ns', sa.String(), nullable=False),
+    sa.Column('channel', sa.String(), nullable=False),
+    sa.Column('version', sa.String(), nullable=False),
+    sa.Column('blob_type', sa.String(), nullable=True),
+    sa.Column('blob', sa.LargeBinary(), nullable=True),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'channel', 'version')
+    )
+    op.create_table('agent_checkpoint_writes',
+    sa.Column('thread_id', sa.String(), nullable=False),
+    sa.Column('checkpoint_ns', sa.String(), nullable=False),
+    sa.Column('checkpoint_id', sa.String(), nullable=False),
+    sa.Column('task_id', sa.String(), nullable=False),
+    sa.Column('idx', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.String(), nullable=True),
+    sa.Column('blob_type', sa.String(), nullable=True),
+    sa.Column('blob', sa.LargeBinary(), nullable=True),
+    sa.Column('task_path', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx')
+    )
+
+
+def downgrade():
+    op.drop_table('agent_checkpoint_writes')
+    op.drop_table('agent_checkpoint_blobs')
+    op.drop_index(op.f('ix_agent_checkpoints_created_at'), table_name='agent_checkpoints')
+    op.drop_table('agent_checkpoints')
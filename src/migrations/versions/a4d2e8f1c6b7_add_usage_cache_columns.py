@@ -0,0 +1,27 @@
+"""add_usage_cache_columns
+
+Revision ID: a4d2e8f1c6b7
+Revises: 7c1e4a2b9f3d
+Create Date: 2026-10-19 11:24:05.613402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d2e8f1c6b7'
+down_revision = '7c1e4a2b9f3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('usages', sa.Column('cached_tokens', sa.Integer(), nullable=True))
+    op.add_column('usages', sa.Column('llm_latency_ms', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('usages') as batch_op:
+        batch_op.drop_column('llm_latency_ms')
+        batch_op.drop_column('cached_tokens')
@@ -0,0 +1,60 @@
+"""add_usage_rollups
+
+Revision ID: b7e3f1a9c2d6
+Revises: f2a6c9e4b8d1
+Create Date: 2026-10-19 16:48:03.912751
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f1a9c2d6'
+down_revision = 'f2a6c9e4b8d1'
+branch_labels = None
+depends_on = None
+
+ROLLUP_SUMS = ('input_tokens', 'output_tokens', 'total_tokens', 'cached_tokens', 'cost', 'llm_latency_ms', 'steps')
+
+
+def upgrade():
+    rollups = op.create_table('usage_rollups',
+    sa.Column('granularity', sa.String(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('model_name', sa.String(), nullable=False),
+    sa.Column('runs', sa.Integer(), nullable=True),
+    sa.Column('input_tokens', sa.Integer(), nullable=True),
+    sa.Column('output_tokens', sa.Integer(), nullable=True),
+    sa.Column('total_tokens', sa.Integer(), nullable=True),
+    sa.Column('cached_tokens', sa.Integer(), nullable=True),
+    sa.Column('cost', sa.Float(), nullable=True),
+    sa.Column('llm_latency_ms', sa.Float(), nullable=True),
+    sa.Column('steps', sa.Integer(), nullable=True),
+    sa.Column('budget_exhausted_runs', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'model_name')
+    )
+
+    # Backfill the rollups from the existing usage rows
+    usages = sa.table('usages', sa.column('timestamp', sa.DateTime()), sa.column('model_name', sa.String()),
+                      sa.column('budget_exhausted', sa.Boolean()), *(sa.column(name) for name in ROLLUP_SUMS))
+    totals = {}
+    for row in op.get_bind().execute(sa.select(usages)).mappings():
+        if row['timestamp'] is None:
+            continue
+        hour = row['timestamp'].replace(minute=0, second=0, microsecond=0)
+        for granularity, bucket_start in (('hour', hour), ('day', hour.replace(hour=0))):
+            bucket = totals.setdefault((granularity, bucket_start, row['model_name'] or ''), dict.fromkeys(ROLLUP_SUMS + ('runs', 'budget_exhausted_runs'), 0))
+            bucket['runs'] += 1
+            bucket['budget_exhausted_runs'] += int(bool(row['budget_exhausted']))
+            for name in ROLLUP_SUMS:
+                bucket[name] += row[name] or 0
+    if totals:
+        op.bulk_insert(rollups, [
+            {'granularity': granularity, 'bucket_start': bucket_start, 'model_name': model_name, **sums}
+            for (granularity, bucket_start, model_name), sums in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('usage_rollups')
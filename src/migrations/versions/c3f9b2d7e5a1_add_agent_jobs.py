@@ -0,0 +1,43 @@
+"""add_agent_jobs
+
+Revision ID: c3f9b2d7e5a1
+Revises: a4d2e8f1c6b7
+Create Date: 2026-10-19 12:40:51.092716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f9b2d7e5a1'
+down_revision = 'a4d2e8f1c6b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('agent_jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=True),
+    sa.Column('query', sa.Text(), nullable=True),
+    sa.Column('thread_id', sa.String(), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_agent_jobs_queue', 'agent_jobs', ['status', 'priority', 'created_at'], unique=False)
+    op.create_index(op.f('ix_agent_jobs_thread_id'), 'agent_jobs', ['thread_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_agent_jobs_thread_id'), table_name='agent_jobs')
+    op.drop_index('ix_agent_jobs_queue', table_name='agent_jobs')
+    op.drop_table('agent_jobs')
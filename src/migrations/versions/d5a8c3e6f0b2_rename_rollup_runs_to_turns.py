@@ -0,0 +1,29 @@
+"""rename_rollup_runs_to_turns
+
+Revision ID: d5a8c3e6f0b2
+Revises: b7e3f1a9c2d6
+Create Date: 2026-10-19 21:07:42.318095
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c3e6f0b2'
+down_revision = 'b7e3f1a9c2d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rollups count usage rows, and a continued thread records one row per turn
+    with op.batch_alter_table('usage_rollups') as batch_op:
+        batch_op.alter_column('runs', new_column_name='turns', existing_type=sa.Integer())
+        batch_op.alter_column('budget_exhausted_runs', new_column_name='budget_exhausted_turns', existing_type=sa.Integer())
+
+
+def downgrade():
+    with op.batch_alter_table('usage_rollups') as batch_op:
+        batch_op.alter_column('budget_exhausted_turns', new_column_name='budget_exhausted_runs', existing_type=sa.Integer())
+        batch_op.alter_column('turns', new_column_name='runs', existing_type=sa.Integer())
@@ -0,0 +1,36 @@
+"""add_store_items_and_job_workers
+
+Revision ID: e8b1d5c2a9f4
+Revises: c3f9b2d7e5a1
+Create Date: 2026-10-19 14:05:12.318409
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b1d5c2a9f4'
+down_revision = 'c3f9b2d7e5a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('agent_store_items',
+    sa.Column('namespace', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('value', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('namespace', 'key')
+    )
+    op.add_column('agent_jobs', sa.Column('worker_id', sa.String(), nullable=True))
+    op.add_column('agent_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('agent_jobs') as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('worker_id')
+    op.drop_table('agent_store_items')
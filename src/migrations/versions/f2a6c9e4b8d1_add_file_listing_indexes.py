@@ -0,0 +1,37 @@
+"""add_file_listing_indexes
+
+Revision ID: f2a6c9e4b8d1
+Revises: e8b1d5c2a9f4
+Create Date: 2026-10-19 15:22:47.604183
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6c9e4b8d1'
+down_revision = 'e8b1d5c2a9f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_files_uploaded_at_id', 'files', ['uploaded_at', 'id'], unique=False)
+    op.create_index('ix_files_type_uploaded_at_id', 'files', ['file_type', 'uploaded_at', 'id'], unique=False)
+    op.create_table('file_counts',
+    sa.Column('file_type', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('file_type')
+    )
+    # Seed the counts from the existing files (the only full count of the table)
+    op.execute(
+        "INSERT INTO file_counts (file_type, count) "
+        "SELECT COALESCE(file_type, ''), COUNT(*) FROM files GROUP BY COALESCE(file_type, '')"
+    )
+
+
+def downgrade():
+    op.drop_table('file_counts')
+    op.drop_index('ix_files_type_uploaded_at_id', table_name='files')
+    op.drop_index('ix_files_uploaded_at_id', table_name='files')
@@ -1,27 +1,36 @@
-from openai import OpenAI
 import os
 import base64
-from dotenv import load_dotenv
 from typing import List, Dict, Union
+from src.openai_tool.provider import get_openai_client
+from src.openai_tool.image_preprocess import select_images, prepare_image_content
+from src.openai_tool.explain_cache import cache_key, get_explanation, put_explanation
+from src.python_executor.figure_data import load_figure_data
+import json
 
-load_dotenv()
+# Text model used to explain figures from their extracted data
+FIGURE_DATA_MODEL = os.getenv("FIGURE_DATA_MODEL", "gpt-4o-mini")
+# Larger figure data is left to the vision model
+FIGURE_DATA_MAX_CHARS = int(os.getenv("FIGURE_DATA_MAX_CHARS", "40000"))
 
-# OpenAI API Configuration
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+FIGURE_DATA_SYSTEM_PROMPT = (
+    "You are given the data behind one or more matplotlib figures as JSON: for each axes the "
+    "title, labels, axis ranges and scales, and every series (lines, scatter points, bars, "
+    "histogram bin edges and counts) with exact summary statistics. Long series are evenly "
+    "downsampled. Answer the question as if you were looking at the figures, citing exact values."
+)
 
-# Initialize the OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-def OpenAIClient(query: str, system_prompt: str = "You are a helpful scientific assistant.") -> str:
+def OpenAIClient(query: str, system_prompt: str = "You are a helpful scientific assistant.", model: str = "gpt-4o") -> str:
     """
-    Sends a query to OpenAI's GPT-4o model and returns the response.
+    Sends a query to an OpenAI chat model (GPT-4o by default) and returns the response.
     
     :param query: The user query string.
     :param system_prompt: The system message to guide the assistant behavior.
+    :param model: The model to use.
     :return: The assistant's reply as a string.
     """
-    completion = client.chat.completions.create(
-        model="gpt-4o",
+    completion = get_openai_client().chat.completions.create(
+        model=model,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f"Here is the user question: {query}"},
@@ -42,7 +51,8 @@ def encode_image(image_path: str) -> str:
 def OpenAIVisionClient(
     query: str, 
     image_paths: List[str],
-    system_prompt: str = "You are a helpful visual analysis assistant. Describe what you observe in the images."
+    system_prompt: str = "You are a helpful visual analysis assistant. Describe what you observe in the images.",
+    use_cache: bool = True
 ) -> str:
     """
     Analyzes images and answers queries using OpenAI's vision model.
@@ -50,28 +60,31 @@ def OpenAIVisionClient(
     :param query: The user query about the images.
     :param image_paths: List of image file paths (local paths or URLs).
     :param system_prompt: The system message to guide the assistant behavior.
+    :param use_cache: Serve repeated questions about the same images from the explanation cache.
     :return: The assistant's analysis as a string.
     """
+    model = "gpt-4o"  # Using gpt-4o which has vision capabilities
+    
+    # Deduplicate and cap the images (see image_preprocess.py)
+    selected = select_images(image_paths)
+    
+    # Same images, query and prompt give the same explanation (see explain_cache.py)
+    key = cache_key([image_key for image_key, _ in selected], query, system_prompt, model)
+    if use_cache:
+        cached = get_explanation(key)
+        if cached is not None:
+            print("Vision explanation served from cache")
+            return cached
+    
     # Prepare the content array with the user query
     content = [{"type": "text", "text": query}]
     
-    # Add each image to the content array
-    for path in image_paths:
-        if path.startswith(("http://", "https://")):  # If it's a URL
-            content.append({
-                "type": "image_url",
-                "image_url": {"url": path}
-            })
-        else:  # For local files
-            base64_image = encode_image(path)
-            content.append({
-                "type": "image_url",
-                "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
-            })
+    # Add the images, downscaled and re-encoded
+    content.extend(prepare_image_content(selected))
     
     # Make the API call
-    completion = client.chat.completions.create(
-        model="gpt-4o",  # Using gpt-4o which has vision capabilities
+    completion = get_openai_client().chat.completions.create(
+        model=model,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": content}
@@ -79,4 +92,53 @@ def OpenAIVisionClient(
         max_tokens=1000
     )
     
-    return completion.choices[0].message.content
\ No newline at end of file
+    explanation = completion.choices[0].message.content
+    if use_cache:
+        put_explanation(key, explanation)
+    return explanation
+
+def OpenAIFigureDataClient(
+    query: str,
+    image_paths: List[str],
+    system_prompt: str = FIGURE_DATA_SYSTEM_PROMPT,
+    use_cache: bool = True
+) -> Union[str, None]:
+    """
+    Answers a query about figures from their extracted data with a text model.
+    
+    Uses the JSON sidecars the executor writes next to saved figures
+    (see src/python_executor/figure_data.py).
+    
+    :param query: The user query about the figures.
+    :param image_paths: List of image file paths.
+    :param system_prompt: The system message to guide the assistant behavior.
+    :param use_cache: Serve repeated questions about the same figures from the explanation cache.
+    :return: The answer, or None if any figure lacks complete data (use the vision model instead).
+    """
+    selected = select_images(image_paths)
+    figures = []
+    for image_key, local_path in selected:
+        data = load_figure_data(local_path) if local_path else None
+        if not data or not data.get("complete"):
+            return None
+        figures.append({"figure": os.path.basename(local_path), **data})
+    
+    figure_json = json.dumps(figures, separators=(",", ":"))
+    if not figures or len(figure_json) > FIGURE_DATA_MAX_CHARS:
+        return None
+    
+    key = cache_key([image_key for image_key, _ in selected], query, system_prompt, FIGURE_DATA_MODEL)
+    if use_cache:
+        cached = get_explanation(key)
+        if cached is not None:
+            print("Figure data explanation served from cache")
+            return cached
+    
+    explanation = OpenAIClient(
+        query=f"{query}\n\nFigure data:\n{figure_json}",
+        system_prompt=system_prompt,
+        model=FIGURE_DATA_MODEL
+    )
+    if use_cache:
+        put_explanation(key, explanation)
+    return explanation
@@ -1,15 +1,5 @@
 # src/openai_tool/client.py
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# OpenAI API Configuration
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-# Initialize the OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+from src.openai_tool.provider import get_openai_client
 
 def OpenAIClient(query: str, system_prompt: str = "You are a helpful scientific assistant.") -> str:
     """
@@ -19,7 +9,7 @@ def OpenAIClient(query: str, system_prompt: str = "You are a helpful scientific
     :param system_prompt: The system message to guide the assistant behavior.
     :return: The assistant's reply as a string.
     """
-    completion = client.chat.completions.create(
+    completion = get_openai_client().chat.completions.create(
         model="gpt-4o",
         messages=[
             {"role": "system", "content": system_prompt},
@@ -0,0 +1,138 @@
+"""
+Persistent cache of vision explanations.
+
+Explanations are keyed on the content hashes of the images sent, the normalized
+query, the system prompt and the model, and stored in a small SQLite file so
+they survive restarts. Least recently used entries are evicted beyond
+EXPLAIN_CACHE_MAX_ENTRIES, and entries older than EXPLAIN_CACHE_TTL_DAYS expire.
+"""
+from contextlib import closing
+from typing import List, Optional
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+EXPLAIN_CACHE_PATH = os.getenv("EXPLAIN_CACHE_PATH", "src/data/cache/explain_cache.db")
+EXPLAIN_CACHE_MAX_ENTRIES = int(os.getenv("EXPLAIN_CACHE_MAX_ENTRIES", "1000"))
+EXPLAIN_CACHE_TTL_DAYS = float(os.getenv("EXPLAIN_CACHE_TTL_DAYS", "30"))
+EXPLAIN_CACHE_ENABLED = os.getenv("EXPLAIN_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS explain_cache (
+    key TEXT PRIMARY KEY,
+    explanation TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_explain_cache_last_used ON explain_cache (last_used);
+"""
+
+_initialized = set()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivially different phrasings share a cache entry.
+
+    :param query: The user query.
+    :return: The query lowercased, with whitespace collapsed and trailing punctuation removed.
+    """
+    return re.sub(r"\s+", " ", query).strip().lower().rstrip("?.! ")
+
+
+def cache_key(image_keys: List[str], query: str, system_prompt: str, model: str) -> str:
+    """
+    Build the cache key of a vision request.
+
+    :param image_keys: Content hashes (or URLs) of the images, in request order.
+    :param query: The user query.
+    :param system_prompt: The system message of the request.
+    :param model: The vision model name.
+    :return: sha256 hex digest identifying the request.
+    """
+    payload = json.dumps([image_keys, normalize_query(query), system_prompt, model])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """
+    Open the cache database, creating it on first use.
+
+    Use as closing(_connect(path)): the connection's own context manager only
+    commits or rolls back, it does not close.
+    """
+    if path not in _initialized:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    connection = sqlite3.connect(path, timeout=5)
+    if path not in _initialized:
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+        except sqlite3.Error:
+            connection.close()
+            raise
+        _initialized.add(path)
+    return connection
+
+
+def get_explanation(key: str, path: Optional[str] = None) -> Optional[str]:
+    """
+    Look up a cached explanation and mark it as recently used.
+
+    :param key: Cache key from cache_key().
+    :param path: Cache database path (defaults to EXPLAIN_CACHE_PATH).
+    :return: The cached explanation, or None on a miss.
+    """
+    if not EXPLAIN_CACHE_ENABLED:
+        return None
+    path = path or EXPLAIN_CACHE_PATH
+    now = time.time()
+    try:
+        with closing(_connect(path)) as connection, connection:
+            row = connection.execute(
+                "SELECT explanation, created_at FROM explain_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > EXPLAIN_CACHE_TTL_DAYS * 86400:
+                connection.execute("DELETE FROM explain_cache WHERE key = ?", (key,))
+                return None
+            connection.execute(
+                "UPDATE explain_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            return row[0]
+    except sqlite3.Error as e:
+        print(f"Explanation cache lookup failed: {str(e)}")
+        return None
+
+
+def put_explanation(key: str, explanation: str, path: Optional[str] = None) -> None:
+    """
+    Store an explanation, evicting the least recently used entries beyond the limit.
+
+    :param key: Cache key from cache_key().
+    :param explanation: The explanation returned by the vision model.
+    :param path: Cache database path (defaults to EXPLAIN_CACHE_PATH).
+    """
+    if not EXPLAIN_CACHE_ENABLED or not explanation:
+        return
+    path = path or EXPLAIN_CACHE_PATH
+    now = time.time()
+    try:
+        with closing(_connect(path)) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO explain_cache (key, explanation, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, 0)",
+                (key, explanation, now, now)
+            )
+            connection.execute(
+                "DELETE FROM explain_cache WHERE key IN ("
+                "SELECT key FROM explain_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (EXPLAIN_CACHE_MAX_ENTRIES,)
+            )
+    except sqlite3.Error as e:
+        print(f"Explanation cache write failed: {str(e)}")
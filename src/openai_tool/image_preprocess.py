@@ -0,0 +1,200 @@
+"""
+Image preprocessing for vision requests.
+
+Local images are downscaled to the resolution the vision model actually uses,
+re-encoded compactly, deduplicated by content hash and cached, so repeated
+explain_graph calls neither re-upload nor re-encode the same plots.
+"""
+from PIL import Image
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+import base64
+import hashlib
+import io
+import os
+import threading
+
+# High-detail vision inputs are scaled to fit 2048x2048, then to 768px on the short side
+VISION_MAX_LONG_SIDE = int(os.getenv("VISION_MAX_LONG_SIDE", "2048"))
+VISION_MAX_SHORT_SIDE = int(os.getenv("VISION_MAX_SHORT_SIDE", "768"))
+VISION_JPEG_QUALITY = int(os.getenv("VISION_JPEG_QUALITY", "85"))
+VISION_MAX_IMAGES = int(os.getenv("VISION_MAX_IMAGES", "4"))
+VISION_CACHE_SIZE = int(os.getenv("VISION_CACHE_SIZE", "64"))
+
+# Images with at most this many colors (most plots) are stored as lossless palette PNGs
+PALETTE_MAX_COLORS = 256
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    digest: str  # sha256 of the original file content
+    mime_type: str
+    data: bytes
+    width: int
+    height: int
+    original_bytes: int
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('utf-8')}"
+
+
+# digest -> PreparedImage, and (path, mtime, size) -> digest so unchanged files are not re-hashed
+_payload_cache: "OrderedDict[str, PreparedImage]" = OrderedDict()
+_path_digests: "OrderedDict[tuple, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _target_size(width: int, height: int) -> tuple:
+    """
+    Size the image is scaled to by the vision model.
+
+    :param width: Original width in pixels.
+    :param height: Original height in pixels.
+    :return: (width, height) after fitting the long and short side limits (never upscaled).
+    """
+    scale = min(1.0, VISION_MAX_LONG_SIDE / max(width, height))
+    scale = min(scale, VISION_MAX_SHORT_SIDE / max(1, min(width, height)))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _encode(raw: bytes) -> tuple:
+    """
+    Downscale and re-encode an image.
+
+    :param raw: Original file content.
+    :return: (mime_type, data, width, height) of the smallest suitable encoding.
+    """
+    with Image.open(io.BytesIO(raw)) as image:
+        original_format = (image.format or "").upper()
+        image.load()
+
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            # Flatten transparency onto white, which is how plots are displayed
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        size = _target_size(*image.size)
+        resized = size != image.size
+        if resized:
+            image = image.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+        buffer = io.BytesIO()
+        colors = image.getcolors(PALETTE_MAX_COLORS)
+        if colors is not None:
+            image.quantize(colors=len(colors)).save(buffer, format="PNG", optimize=True)
+            mime_type = "image/png"
+        else:
+            image.save(buffer, format="JPEG", quality=VISION_JPEG_QUALITY, optimize=True)
+            mime_type = "image/jpeg"
+        data = buffer.getvalue()
+
+    # Keep the original when it is already small enough and smaller than the re-encoding
+    if not resized and len(raw) <= len(data) and original_format in ("PNG", "JPEG", "GIF", "WEBP"):
+        return f"image/{original_format.lower()}", raw, size[0], size[1]
+    return mime_type, data, size[0], size[1]
+
+
+def _remember(cache: OrderedDict, key, value) -> None:
+    """Insert into an LRU cache, evicting the least recently used entries."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > VISION_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def image_digest(path: str) -> str:
+    """
+    Content hash of a local image, cached by path, modification time and size.
+
+    :param path: Path to the image file.
+    :return: sha256 hex digest of the file content.
+    """
+    stat = os.stat(path)
+    path_key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        digest = _path_digests.get(path_key)
+        if digest is not None:
+            _path_digests.move_to_end(path_key)
+            return digest
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as image_file:
+        for chunk in iter(lambda: image_file.read(1 << 20), b""):
+            digest.update(chunk)
+    digest = digest.hexdigest()
+
+    with _cache_lock:
+        _remember(_path_digests, path_key, digest)
+    return digest
+
+
+def prepare_image(path: str, digest: Optional[str] = None) -> PreparedImage:
+    """
+    Load, downscale and encode a local image, using the payload cache.
+
+    :param path: Path to the image file.
+    :param digest: Content hash of the file, if already known.
+    :return: The prepared image.
+    """
+    digest = digest or image_digest(path)
+    with _cache_lock:
+        prepared = _payload_cache.get(digest)
+        if prepared is not None:
+            _payload_cache.move_to_end(digest)
+            return prepared
+
+    with open(path, "rb") as image_file:
+        raw = image_file.read()
+    mime_type, data, width, height = _encode(raw)
+    prepared = PreparedImage(digest, mime_type, data, width, height, len(raw))
+
+    with _cache_lock:
+        _remember(_payload_cache, digest, prepared)
+    return prepared
+
+
+def select_images(image_paths: List[str], max_images: Optional[int] = None) -> List[tuple]:
+    """
+    Deduplicate image paths/URLs and keep the latest max_images of them.
+
+    :param image_paths: Image file paths or URLs, oldest first.
+    :param max_images: Maximum number of images to keep (defaults to VISION_MAX_IMAGES).
+    :return: List of (key, local_path) pairs; key is the content hash of a local
+        file (local_path set) or the URL itself (local_path None).
+    """
+    max_images = VISION_MAX_IMAGES if max_images is None else max_images
+
+    unique: "OrderedDict[str, Optional[str]]" = OrderedDict()
+    for path in image_paths:
+        if path.startswith(("http://", "https://")):  # If it's a URL
+            key, local_path = path, None
+        else:  # For local files
+            key, local_path = image_digest(path), path
+        # Re-inserting moves a repeated image to its latest position
+        unique.pop(key, None)
+        unique[key] = local_path
+
+    selected = list(unique.items())
+    if len(selected) > max_images:
+        print(f"Sending the latest {max_images} of {len(selected)} images to the vision model")
+        selected = selected[-max_images:]
+    return selected
+
+
+def prepare_image_content(selected: List[tuple]) -> List[Dict[str, Any]]:
+    """
+    Build the image content parts of a vision request.
+
+    :param selected: (key, local_path) pairs from select_images().
+    :return: List of image_url content parts. Only the selected images are encoded.
+    """
+    content = []
+    for key, local_path in selected:
+        url = prepare_image(local_path, key).data_url if local_path else key
+        content.append({"type": "image_url", "image_url": {"url": url}})
+    return content
@@ -0,0 +1,480 @@
+# src/openai_tool/provider.py
+"""
+Shared OpenAI provider layer.
+
+Every OpenAI call in the app (the agent's ChatOpenAI, OpenAIClient and the vision
+client) goes through the pooled httpx clients created here. Their transport adds:
+
+- jittered exponential backoff on 429/5xx and connection errors, honouring Retry-After
+- a process-wide requests-per-minute and tokens-per-minute token bucket; callers
+  queue for capacity instead of sending requests that would be throttled
+- metrics on retries, throttling and limiter wait time (get_provider_metrics())
+
+The SDK clients are created with max_retries=0 so retries happen only here.
+"""
+from openai import OpenAI, AsyncOpenAI
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from dotenv import load_dotenv
+from typing import Dict, Any, Optional
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+import httpx
+
+from src.telemetry import end_span, registry, start_span
+
+load_dotenv()
+
+# OpenAI API Configuration
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Optional base URL, e.g. the local stub server (src/openai_tool/stub_server.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# Connection pool and timeouts
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "50"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+
+# Retry policy
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5"))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "30"))
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Account rate limits (0 disables a limit). Each worker process enforces its
+# share, so WEB_CONCURRENCY processes together stay within the account limits.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+
+def _process_share(limit: int) -> int:
+    return max(1, limit // WEB_CONCURRENCY) if limit > 0 else 0
+
+
+OPENAI_RPM_LIMIT = _process_share(int(os.getenv("OPENAI_RPM_LIMIT", "500")))
+OPENAI_TPM_LIMIT = _process_share(int(os.getenv("OPENAI_TPM_LIMIT", "200000")))
+# Completion tokens assumed when a request sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+# Tokens counted per inline image (a high-detail 768x1280 image is ~765 tokens)
+IMAGE_TOKENS = 800
+_DATA_URL = re.compile(rb"data:image/[a-z]+;base64,[A-Za-z0-9+/=]+")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at limit_per_minute / 60 per second.
+
+    Callers reserve capacity and are told how long to wait for it. Reservations may
+    drive the balance negative, which queues later callers behind earlier ones.
+    """
+
+    def __init__(self, limit_per_minute: int):
+        self.capacity = float(limit_per_minute)
+        self.rate = limit_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount from the bucket and return the seconds to wait before using it."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Return over-reserved capacity (e.g. estimated tokens that were not used)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class ProviderMetrics:
+    """Counters describing provider traffic, throttling and limiter waits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.attempts = 0
+            self.retries = 0
+            self.throttled = 0  # 429 responses
+            self.server_errors = 0
+            self.connection_errors = 0
+            self.failures = 0  # Requests that failed after all retries
+            self.limiter_waits = 0
+            self.limiter_wait_seconds = 0.0
+            self.limiter_max_wait_seconds = 0.0
+            self.retry_wait_seconds = 0.0
+            self.tokens_reserved = 0
+            self.tokens_used = 0
+            self.in_flight = 0
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_limiter_wait(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.limiter_waits += 1
+            self.limiter_wait_seconds += seconds
+            self.limiter_max_wait_seconds = max(self.limiter_max_wait_seconds, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "server_errors": self.server_errors,
+                "connection_errors": self.connection_errors,
+                "failures": self.failures,
+                "in_flight": self.in_flight,
+                "limiter_waits": self.limiter_waits,
+                "limiter_wait_seconds": round(self.limiter_wait_seconds, 3),
+                "limiter_max_wait_seconds": round(self.limiter_max_wait_seconds, 3),
+                "retry_wait_seconds": round(self.retry_wait_seconds, 3),
+                "tokens_reserved": self.tokens_reserved,
+                "tokens_used": self.tokens_used,
+                "rpm_limit": OPENAI_RPM_LIMIT,
+                "tpm_limit": OPENAI_TPM_LIMIT
+            }
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by all provider clients."""
+
+    def __init__(self, rpm_limit: int = OPENAI_RPM_LIMIT, tpm_limit: int = OPENAI_TPM_LIMIT):
+        self.requests = TokenBucket(rpm_limit) if rpm_limit > 0 else None
+        self.tokens = TokenBucket(tpm_limit) if tpm_limit > 0 else None
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and the estimated tokens; return the seconds to wait."""
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def settle(self, reserved: int, used: Optional[int]) -> None:
+        """Refund the difference once the actual token usage is known."""
+        if self.tokens is not None and used is not None and used < reserved:
+            self.tokens.refund(reserved - used)
+
+
+metrics = ProviderMetrics()
+limiter = RateLimiter()
+
+
+def _prometheus_samples():
+    """Provider counters as /metrics rows (see src/telemetry/metrics.py)."""
+    snapshot = metrics.snapshot()
+    for name in (
+        "requests", "attempts", "retries", "throttled", "server_errors", "connection_errors",
+        "failures", "limiter_waits", "limiter_wait_seconds", "retry_wait_seconds", "tokens_reserved", "tokens_used"
+    ):
+        yield f"sciencebridge_provider_{name}_total", "counter", f"OpenAI provider {name.replace('_', ' ')}", {(): snapshot[name]}
+    yield "sciencebridge_provider_in_flight", "gauge", "OpenAI requests in flight", {(): snapshot["in_flight"]}
+
+
+registry.register_collector(_prometheus_samples)
+
+
+def estimate_request_tokens(body: bytes) -> int:
+    """
+    Estimate the tokens a request will consume (prompt plus completion budget).
+
+    :param body: The JSON request body.
+    :return: Estimated total tokens (~4 characters per prompt token, a fixed cost per image).
+    """
+    images = 0
+    if b"data:image/" in body:
+        body, images = _DATA_URL.subn(b"", body)
+    prompt_tokens = len(body) // 4 + 1 + images * IMAGE_TOKENS
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        return prompt_tokens + DEFAULT_COMPLETION_TOKENS
+    completion_tokens = (
+        payload.get("max_completion_tokens") or payload.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    )
+    return prompt_tokens + int(completion_tokens)
+
+
+def _is_json_success(response: httpx.Response) -> bool:
+    """Successful non-streaming JSON response (streams are passed through unread)."""
+    return response.status_code == 200 and "application/json" in response.headers.get("content-type", "")
+
+
+def _response_tokens(response: httpx.Response) -> Optional[int]:
+    """Total tokens reported by a read JSON response."""
+    try:
+        return int(response.json()["usage"]["total_tokens"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """
+    Delay before the next attempt: the server's Retry-After if given, otherwise
+    exponential backoff with full jitter.
+    """
+    if response is not None:
+        retry_after_ms = response.headers.get("retry-after-ms")
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after_ms is not None:
+                return min(OPENAI_RETRY_MAX_DELAY, float(retry_after_ms) / 1000)
+            if retry_after is not None:
+                return min(OPENAI_RETRY_MAX_DELAY, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(OPENAI_RETRY_MAX_DELAY, OPENAI_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _should_retry(response: httpx.Response) -> bool:
+    """Retryable status, except 429s caused by an exhausted quota (retrying cannot help)."""
+    if response.status_code not in RETRY_STATUS_CODES:
+        return False
+    if response.status_code == 429:
+        response.read()
+        if b"insufficient_quota" in response.content:
+            return False
+    return True
+
+
+def _endpoint_name(request: httpx.Request) -> str:
+    """API endpoint of a request without the version prefix, e.g. "chat/completions"."""
+    path = request.url.path.strip("/")
+    return path.split("/", 1)[1] if path.startswith("v1/") else path
+
+
+def _count_failure(response: Optional[httpx.Response]) -> None:
+    if response is None:
+        metrics.add(connection_errors=1)
+    elif response.status_code == 429:
+        metrics.add(throttled=1)
+    elif response.status_code >= 500:
+        metrics.add(server_errors=1)
+
+
+class RateLimitedTransport(httpx.HTTPTransport):
+    """Pooled synchronous transport with rate limiting and retries."""
+
+    def __init__(self, rate_limiter: RateLimiter = limiter, max_retries: int = OPENAI_MAX_RETRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        reserved = estimate_request_tokens(body)
+        metrics.add(requests=1, tokens_reserved=reserved, in_flight=1)
+        # Includes limiter waits and retries; streams are timed to their headers
+        trace = start_span("provider", _endpoint_name(request))
+        status = "error"
+        try:
+            for attempt in range(self.max_retries + 1):
+                wait = self.rate_limiter.reserve(reserved if attempt == 0 else 0)
+                metrics.record_limiter_wait(wait)
+                if wait:
+                    time.sleep(wait)
+
+                metrics.add(attempts=1)
+                response = None
+                try:
+                    response = super().handle_request(request)
+                except (httpx.ConnectError, httpx.ReadTimeout, httpx.RemoteProtocolError):
+                    if attempt == self.max_retries:
+                        metrics.add(failures=1, connection_errors=1)
+                        raise
+
+                if response is not None and not _should_retry(response):
+                    used = None
+                    if _is_json_success(response):
+                        response.read()
+                        used = _response_tokens(response)
+                    self.rate_limiter.settle(reserved, used)
+                    metrics.add(tokens_used=used or 0)
+                    status = "ok" if response.status_code < 400 else "error"
+                    return response
+
+                _count_failure(response)
+                if attempt == self.max_retries:
+                    metrics.add(failures=1)
+                    return response
+                delay = _retry_delay(attempt, response)
+                if response is not None:
+                    response.close()
+                metrics.add(retries=1, retry_wait_seconds=delay)
+                time.sleep(delay)
+        finally:
+            metrics.add(in_flight=-1)
+            end_span(trace, status)
+
+
+class AsyncRateLimitedTransport(httpx.AsyncHTTPTransport):
+    """Pooled asynchronous transport with rate limiting and retries."""
+
+    def __init__(self, rate_limiter: RateLimiter = limiter, max_retries: int = OPENAI_MAX_RETRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        reserved = estimate_request_tokens(body)
+        metrics.add(requests=1, tokens_reserved=reserved, in_flight=1)
+        # Includes limiter waits and retries; streams are timed to their headers
+        trace = start_span("provider", _endpoint_name(request))
+        status = "error"
+        try:
+            for attempt in range(self.max_retries + 1):
+                wait = self.rate_limiter.reserve(reserved if attempt == 0 else 0)
+                metrics.record_limiter_wait(wait)
+                if wait:
+                    await asyncio.sleep(wait)
+
+                metrics.add(attempts=1)
+                response = None
+                try:
+                    response = await super().handle_async_request(request)
+                except (httpx.ConnectError, httpx.ReadTimeout, httpx.RemoteProtocolError):
+                    if attempt == self.max_retries:
+                        metrics.add(failures=1, connection_errors=1)
+                        raise
+
+                retry = False
+                if response is not None and response.status_code in RETRY_STATUS_CODES:
+                    await response.aread()
+                    retry = _should_retry(response)
+
+                if response is not None and not retry:
+                    used = None
+                    if _is_json_success(response):
+                        await response.aread()
+                        used = _response_tokens(response)
+                    self.rate_limiter.settle(reserved, used)
+                    metrics.add(tokens_used=used or 0)
+                    status = "ok" if response.status_code < 400 else "error"
+                    return response
+
+                _count_failure(response)
+                if attempt == self.max_retries:
+                    metrics.add(failures=1)
+                    return response
+                delay = _retry_delay(attempt, response)
+                if response is not None:
+                    await response.aclose()
+                metrics.add(retries=1, retry_wait_seconds=delay)
+                await asyncio.sleep(delay)
+        finally:
+            metrics.add(in_flight=-1)
+            end_span(trace, status)
+
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.RLock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_KEEPALIVE)
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def _build_response_models() -> None:
+    """
+    Complete the SDK's lazily built response models up front.
+
+    Pydantic builds them on first use, and threads racing through the first
+    responses can see a half-built serializer (ChatCompletion dumps as {}).
+    """
+    ChatCompletion.model_rebuild()
+    ChatCompletionChunk.model_rebuild()
+
+
+def _shared(name: str, factory):
+    """Create a process-wide client once."""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                if not _clients:
+                    _build_response_models()
+                client = _clients[name] = factory()
+    return client
+
+
+def get_http_client() -> httpx.Client:
+    """The pooled, rate-limited synchronous httpx client."""
+    return _shared("http", lambda: httpx.Client(transport=RateLimitedTransport(limits=_limits()), timeout=_timeout()))
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """The pooled, rate-limited asynchronous httpx client."""
+    return _shared(
+        "async_http",
+        lambda: httpx.AsyncClient(transport=AsyncRateLimitedTransport(limits=_limits()), timeout=_timeout())
+    )
+
+
+def get_openai_client() -> OpenAI:
+    """The shared synchronous OpenAI SDK client."""
+    return _shared(
+        "openai",
+        lambda: OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, http_client=get_http_client(), max_retries=0)
+    )
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """The shared asynchronous OpenAI SDK client."""
+    return _shared(
+        "async_openai",
+        lambda: AsyncOpenAI(
+            api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, http_client=get_async_http_client(), max_retries=0
+        )
+    )
+
+
+def get_chat_model(**kwargs):
+    """
+    Create a LangChain ChatOpenAI model that uses the shared clients.
+
+    :param kwargs: ChatOpenAI arguments (model, temperature, max_tokens, ...).
+    :return: A ChatOpenAI instance.
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        openai_api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        max_retries=0,
+        **kwargs
+    )
+
+
+def get_provider_metrics() -> Dict[str, Any]:
+    """Snapshot of provider traffic, retry and rate limiter metrics."""
+    return metrics.snapshot()
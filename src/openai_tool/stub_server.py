@@ -0,0 +1,255 @@
+# src/openai_tool/stub_server.py
+"""
+Local OpenAI-compatible stand-in for offline benchmarking.
+
+Serves scripted, deterministic chat completions so the full agent path
+(graph, executor, API) can run without a live OpenAI key. Point the app at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub
+
+and start it with:
+
+    python -m src.openai_tool.stub_server --port 8001 --latency-ms 200
+"""
+from fastapi import FastAPI, Body
+from typing import List, Dict, Any, Optional
+import argparse
+import os
+import asyncio
+import json
+import time
+import uuid
+
+# Default agent trajectory: inspect the data, plot it, explain the plot, submit the report
+DEFAULT_SCRIPT = {
+    "agent": [
+        {
+            "tool_calls": [
+                {"name": "fetch_dataset_info", "arguments": {"dataset_path": "src/data/uploads"}}
+            ]
+        },
+        {
+            "tool_calls": [
+                {
+                    "name": "execute_python",
+                    "arguments": {
+                        "code": (
+                            "import matplotlib\n"
+                            "matplotlib.use('Agg')\n"
+                            "import matplotlib.pyplot as plt\n"
+                            "xs = list(range(20))\n"
+                            "plt.plot(xs, [x * x for x in xs], label='x^2')\n"
+                            "plt.legend()\n"
+                            "plt.savefig('src/data/graphs/stub_plot.png')\n"
+                            "print('mean:', sum(xs) / len(xs))\n"
+                        )
+                    }
+                }
+            ]
+        },
+        {
+            "tool_calls": [
+                {
+                    "name": "explain_graph",
+                    "arguments": {
+                        "query": "Describe the trend in the plot",
+                        "image_paths": ["src/data/graphs/stub_plot.png"]
+                    }
+                }
+            ]
+        },
+        {
+            "tool_calls": [
+                {
+                    "name": "AgentReport",
+                    "arguments": {
+                        "action_plan": [
+                            {"step": 1, "description": "Inspect the available datasets"},
+                            {"step": 2, "description": "Plot the series and compute summary statistics"},
+                            {"step": 3, "description": "Explain the generated plot"}
+                        ],
+                        "decisions_and_justifications": [
+                            {
+                                "decision": "Use a line plot",
+                                "justification": "The series is ordered and continuous",
+                                "tool_used": "execute_python"
+                            }
+                        ],
+                        "observations": ["The series grows quadratically (mean x = 9.5000)"],
+                        "visualizations": [
+                            {
+                                "path": "src/data/graphs/stub_plot.png",
+                                "description": "Line plot of x squared",
+                                "key_insights": ["Values increase from 0 to 361"]
+                            }
+                        ],
+                        "summary": "Stubbed analysis completed.",
+                        "next_steps": ["Run against a real model"],
+                        "conclusion": "The stub trajectory completed successfully."
+                    }
+                }
+            ]
+        }
+    ],
+    "vision": "The plot shows a monotonically increasing, convex curve.",
+    "text": "This is a stubbed answer from the local OpenAI stand-in."
+}
+
+
+def _estimate_tokens(payload: Any) -> int:
+    """Rough prompt token estimate (~4 characters per token)."""
+    return len(json.dumps(payload, default=str)) // 4 + 1
+
+
+def _cached_tokens(prompt: str, previous: List[str]) -> int:
+    """
+    Simulate provider prefix caching: the longest prefix shared with an earlier request,
+    counted in 128-token blocks and only from 1024 tokens up.
+    """
+    shared = 0
+    for earlier in previous:
+        shared = max(shared, len(os.path.commonprefix([prompt, earlier])))
+    tokens = shared // 4
+    return 0 if tokens < 1024 else tokens - tokens % 128
+
+
+def _has_images(messages: List[Dict[str, Any]]) -> bool:
+    """Check whether any message carries image content parts."""
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list) and any(part.get("type") == "image_url" for part in content):
+            return True
+    return False
+
+
+def create_stub_app(
+    script: Optional[Dict[str, Any]] = None,
+    latency_ms: float = 0,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: int = 50,
+    cache_size: int = 64
+) -> FastAPI:
+    """
+    Create the stub server application.
+
+    Args:
+        script: Scripted responses ({"agent": [steps], "vision": str, "text": str}).
+            Each agent step is {"tool_calls": [{"name", "arguments"}]} or {"content": str}
+            and may override "latency_ms", "prompt_tokens" and "completion_tokens".
+        latency_ms: Artificial latency added to every completion
+        prompt_tokens: Fixed prompt token count to report (estimated from the request if None)
+        completion_tokens: Completion token count to report
+        cache_size: Number of recent prompts used to simulate prompt caching (0 disables)
+
+    Returns:
+        A FastAPI app exposing /v1/chat/completions and /v1/models
+    """
+    script = script or DEFAULT_SCRIPT
+    app = FastAPI(title="OpenAI stub server")
+    recent_prompts: List[str] = []
+
+    def _pick_step(body: Dict[str, Any]) -> Dict[str, Any]:
+        messages = body.get("messages", [])
+        if body.get("tools"):
+            # The step index is derived from the conversation itself, so replies are
+            # deterministic and the server needs no per-run state
+            steps = script["agent"]
+            forced = (body.get("tool_choice") or {}) if isinstance(body.get("tool_choice"), dict) else {}
+            forced_name = forced.get("function", {}).get("name")
+            if forced_name:
+                # Like the real API, a forced function is always called
+                for step in steps:
+                    if any(call["name"] == forced_name for call in step.get("tool_calls", [])):
+                        return step
+            index = sum(1 for message in messages if message.get("role") == "assistant")
+            return steps[min(index, len(steps) - 1)]
+        if _has_images(messages):
+            return {"content": script.get("vision", DEFAULT_SCRIPT["vision"])}
+        return {"content": script.get("text", DEFAULT_SCRIPT["text"])}
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "stub"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: Dict[str, Any] = Body(...)):
+        step = _pick_step(body)
+
+        delay = step.get("latency_ms", latency_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        message: Dict[str, Any] = {"role": "assistant", "content": step.get("content")}
+        finish_reason = "stop"
+        if step.get("tool_calls"):
+            index = sum(1 for m in body.get("messages", []) if m.get("role") == "assistant")
+            message["tool_calls"] = [
+                {
+                    "id": f"call_stub_{index}_{i}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}
+                }
+                for i, call in enumerate(step["tool_calls"])
+            ]
+            finish_reason = "tool_calls"
+
+        input_tokens = step.get("prompt_tokens", prompt_tokens)
+        if input_tokens is None:
+            input_tokens = _estimate_tokens(body.get("messages", []))
+        output_tokens = step.get("completion_tokens", completion_tokens)
+
+        cached_tokens = 0
+        if cache_size:
+            prompt = json.dumps([body.get("tools"), body.get("messages")], sort_keys=True)
+            cached_tokens = min(input_tokens, _cached_tokens(prompt, recent_prompts))
+            recent_prompts.append(prompt)
+            del recent_prompts[:-cache_size]
+
+        return {
+            "id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": input_tokens,
+                "completion_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+        }
+
+    return app
+
+
+def main():
+    """Run the stub server from the command line."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--script", help="Path to a JSON script of responses")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--prompt-tokens", type=int, default=None)
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--cache-size", type=int, default=64)
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+
+    app = create_stub_app(
+        script=script,
+        latency_ms=args.latency_ms,
+        prompt_tokens=args.prompt_tokens,
+        completion_tokens=args.completion_tokens,
+        cache_size=args.cache_size
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#src/python_executor/figure_data.py
+"""
+Serialize the data behind matplotlib figures into compact JSON sidecars.
+
+This module is loaded by file path inside the executor's subprocess (see
+SimplePythonExecutor.execute_code), so it must only depend on the standard
+library, numpy and matplotlib.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+SIDECAR_SUFFIX = ".data.json"
+
+# Series longer than this are downsampled; summary statistics use the full data
+MAX_POINTS = 200
+MAX_TEXTS = 20
+
+
+def sidecar_path(image_path: str) -> str:
+    """Path of the figure-data sidecar written next to a saved figure."""
+    return f"{image_path}{SIDECAR_SUFFIX}"
+
+
+def _number(value) -> Any:
+    """Convert numpy scalars (and dates) to JSON-friendly values, rounded to 6 significant digits."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if value != value or value in (float("inf"), float("-inf")):
+        return None
+    return float(f"{value:.6g}")
+
+
+def _values(values) -> List[Any]:
+    """Downsample a sequence to at most MAX_POINTS values, keeping the first and last."""
+    import numpy as np
+
+    values = np.asarray(values).ravel()
+    if len(values) > MAX_POINTS:
+        index = np.linspace(0, len(values) - 1, MAX_POINTS).round().astype(int)
+        values = values[index]
+    return [_number(value) for value in values]
+
+
+def _stats(x, y) -> Dict[str, Any]:
+    """Exact summary statistics of a series."""
+    import numpy as np
+
+    try:
+        y = np.asarray(y, dtype=float).ravel()
+        x = np.asarray(x).ravel()
+    except (TypeError, ValueError):
+        return {}
+    finite = np.isfinite(y)
+    if not finite.any():
+        return {"n": int(len(y))}
+    y_finite = y[finite]
+    stats = {
+        "n": int(len(y)),
+        "min": _number(y_finite.min()),
+        "max": _number(y_finite.max()),
+        "mean": _number(y_finite.mean())
+    }
+    if len(x) == len(y):
+        stats["x_at_min"] = _number(x[finite][y_finite.argmin()])
+        stats["x_at_max"] = _number(x[finite][y_finite.argmax()])
+    return stats
+
+
+def _label(artist) -> Optional[str]:
+    label = artist.get_label()
+    return None if not label or label.startswith("_") else label
+
+
+def _tick_labels(axis) -> Optional[List[str]]:
+    """Tick labels of a categorical axis (None when the ticks are plain numbers)."""
+    labels = [tick.get_text() for tick in axis.get_ticklabels() if tick.get_text()]
+    if not labels:
+        return None
+    try:
+        [float(label.replace("−", "-")) for label in labels]
+        return None
+    except ValueError:
+        return labels
+
+
+def _bars(container) -> Dict[str, Any]:
+    """Bar or histogram data from a BarContainer."""
+    patches = list(container.patches)
+    x = [patch.get_x() for patch in patches]
+    widths = [patch.get_width() for patch in patches]
+    heights = [patch.get_height() for patch in patches]
+    data = {"label": _label(container)}
+
+    # Adjacent bars with no gaps are a histogram: report bin edges and counts
+    contiguous = len(patches) > 1 and all(
+        abs(x[i] + widths[i] - x[i + 1]) <= 1e-9 * max(1.0, abs(x[i + 1])) for i in range(len(patches) - 1)
+    )
+    if contiguous:
+        data["kind"] = "histogram"
+        data["bin_edges"] = _values(x + [x[-1] + widths[-1]])
+        data["counts"] = _values(heights)
+    else:
+        data["kind"] = "bar"
+        data["x"] = _values([xi + w / 2 for xi, w in zip(x, widths)])
+        data["heights"] = _values(heights)
+    data["stats"] = _stats([xi + w / 2 for xi, w in zip(x, widths)], heights)
+    return data
+
+
+def _axes_data(ax) -> Dict[str, Any]:
+    """Extract the plotted data of one Axes."""
+    from matplotlib.collections import PathCollection, PolyCollection, LineCollection, QuadMesh
+    from matplotlib.container import BarContainer
+    from matplotlib.image import AxesImage
+
+    data: Dict[str, Any] = {
+        "title": ax.get_title() or None,
+        "xlabel": ax.get_xlabel() or None,
+        "ylabel": ax.get_ylabel() or None,
+        "xlim": [_number(v) for v in ax.get_xlim()],
+        "ylim": [_number(v) for v in ax.get_ylim()],
+        "xscale": ax.get_xscale(),
+        "yscale": ax.get_yscale(),
+        "series": [],
+        "unsupported": []
+    }
+    xticks = _tick_labels(ax.xaxis)
+    if xticks:
+        data["xticklabels"] = xticks
+    yticks = _tick_labels(ax.yaxis)
+    if yticks:
+        data["yticklabels"] = yticks
+
+    bar_patches = set()
+    for container in ax.containers:
+        if isinstance(container, BarContainer):
+            bar_patches.update(container.patches)
+            data["series"].append(_bars(container))
+
+    for line in ax.get_lines():
+        x, y = line.get_xdata(), line.get_ydata()
+        if len(x) < 2 and not _label(line):
+            continue  # Markers such as axhline end caps
+        data["series"].append({
+            "kind": "line",
+            "label": _label(line),
+            "x": _values(x),
+            "y": _values(y),
+            "stats": _stats(x, y)
+        })
+
+    for collection in ax.collections:
+        if isinstance(collection, PathCollection):
+            offsets = collection.get_offsets()
+            if len(offsets) == 0:
+                continue
+            x, y = offsets[:, 0], offsets[:, 1]
+            data["series"].append({
+                "kind": "scatter",
+                "label": _label(collection),
+                "x": _values(x),
+                "y": _values(y),
+                "stats": _stats(x, y)
+            })
+        elif isinstance(collection, (PolyCollection, LineCollection)):
+            # Shaded bands and error bars: keep the label, the series carry the data
+            data.setdefault("annotations", []).append({"kind": type(collection).__name__, "label": _label(collection)})
+        elif isinstance(collection, QuadMesh):
+            data["unsupported"].append("QuadMesh")
+        else:
+            data["unsupported"].append(type(collection).__name__)
+
+    for image in ax.images:
+        if isinstance(image, AxesImage):
+            data["unsupported"].append("AxesImage")
+
+    texts = [text.get_text() for text in ax.texts if text.get_text()][:MAX_TEXTS]
+    if texts:
+        data["texts"] = texts
+
+    legend = ax.get_legend()
+    if legend is not None:
+        data["legend"] = [text.get_text() for text in legend.get_texts()]
+
+    if ax.name != "rectilinear":
+        data["unsupported"].append(f"{ax.name} projection")
+
+    return data
+
+
+def extract_figure_data(fig) -> Dict[str, Any]:
+    """
+    Extract the plotted data of a figure.
+
+    Args:
+        fig: A matplotlib Figure
+
+    Returns:
+        Dict with the data of each Axes. "complete" is True when every Axes has
+        at least one series and no artist type that could not be serialized.
+    """
+    axes = [_axes_data(ax) for ax in fig.get_axes() if ax.get_visible() and ax.has_data()]
+    suptitle = fig._suptitle.get_text() if getattr(fig, "_suptitle", None) else None
+    complete = bool(axes) and all(ax["series"] and not ax["unsupported"] for ax in axes)
+    return {"suptitle": suptitle or None, "axes": axes, "complete": complete}
+
+
+def write_sidecar(fig, fname) -> Optional[str]:
+    """
+    Write the figure-data sidecar for a figure saved to fname.
+
+    Errors are swallowed so data extraction never breaks the user's savefig call.
+
+    Returns:
+        The sidecar path, or None if nothing was written
+    """
+    if not isinstance(fname, (str, os.PathLike)):
+        return None
+    try:
+        path = sidecar_path(os.fspath(fname))
+        with open(path, "w") as f:
+            json.dump(extract_figure_data(fig), f, separators=(",", ":"))
+        return path
+    except Exception:
+        return None
+
+
+def load_figure_data(image_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the figure-data sidecar of a saved figure.
+
+    Returns:
+        The figure data, or None if there is no sidecar or it is older than the image
+    """
+    path = sidecar_path(image_path)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(image_path):
+            return None  # The image was overwritten without a new sidecar
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -8,9 +8,17 @@ import traceback
 from typing import List, Optional, Dict, Any
 from contextlib import redirect_stdout, redirect_stderr
 import shutil
-import matplotlib.pyplot as plt
 import uuid
 import gc
+import time
+from contextlib import contextmanager
+
+from src.telemetry import span
+
+try:
+    import fcntl
+except ImportError:  # Windows: venv setup is not locked across processes
+    fcntl = None
 
 class SimplePythonExecutor:
     """
@@ -25,7 +33,8 @@ class SimplePythonExecutor:
         auto_install: bool = True,
         plots_dir: str = "plots",
         clear_plots_on_init: bool = False,
-        use_system_python: bool = False
+        use_system_python: bool = False,
+        plot_retention_hours: Optional[float] = None
     ):
         """
         Initialize the Python executor with a virtual environment.
@@ -37,11 +46,17 @@ class SimplePythonExecutor:
             plots_dir: Directory to save generated plots
             clear_plots_on_init: Whether to clear all plots when initializing
             use_system_python: If True, use system Python instead of venv (useful for Docker)
+            plot_retention_hours: If set, plot folders older than this are removed before each execution
         """
         # Set default venv path if not provided
         self.venv_path = venv_path or os.path.join(os.getcwd(), "venvs")
         self.plots_dir = plots_dir
         self.use_system_python = use_system_python
+        self.plot_retention_hours = plot_retention_hours
+        
+        # Code files go to a workspace private to this executor, so several
+        # executors (e.g. one per worker process) never touch each other's files
+        self.temp_dir = os.path.join(os.getcwd(), "temp", f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
         
         # Detect if we're in a Docker container
         self._detect_docker_environment()
@@ -71,12 +86,27 @@ class SimplePythonExecutor:
         
         # Create or verify the virtual environment
         if not self.use_system_python:
-            self._setup_venv()
+            with self._venv_lock():
+                self._setup_venv()
         
         # Install packages if auto_install is True
         if auto_install:
             self.install_packages(self.packages)
     
+    @contextmanager
+    def _venv_lock(self):
+        """Hold an exclusive file lock on the virtual environment across processes."""
+        if fcntl is None or self.use_system_python:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.venv_path) or ".", exist_ok=True)
+        with open(f"{self.venv_path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
     def _detect_docker_environment(self):
         """Detect if we're running in a Docker container and adjust settings accordingly."""
         # Check for common Docker indicators
@@ -178,43 +208,46 @@ class SimplePythonExecutor:
         pip_path = self._get_pip_path()
         
         try:
-            # Check which packages are already installed
-            installed_packages = self._get_installed_packages()
-            packages_to_install = [pkg for pkg in packages if pkg.lower() not in installed_packages]
+            # Installs are serialized with other processes sharing the environment
+            with self._venv_lock():
+                # Check which packages are already installed
+                installed_packages = self._get_installed_packages()
+                packages_to_install = [pkg for pkg in packages if pkg.lower() not in installed_packages]
             
-            if not packages_to_install:
-                return {
-                    "success": True,
-                    "message": f"All packages already installed: {', '.join(packages)}",
-                    "output": "No new packages to install"
-                }
+                if not packages_to_install:
+                    return {
+                        "success": True,
+                        "message": f"All packages already installed: {', '.join(packages)}",
+                        "output": "No new packages to install"
+                    }
             
-            # Run pip install for the specified packages
-            cmd = [pip_path, "install", "--upgrade"] + packages_to_install
+                # Run pip install for the specified packages
+                cmd = [pip_path, "install", "--upgrade"] + packages_to_install
             
-            print(f"Installing packages: {', '.join(packages_to_install)}")
-            print(f"Using pip at: {pip_path}")
+                print(f"Installing packages: {', '.join(packages_to_install)}")
+                print(f"Using pip at: {pip_path}")
             
-            process = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=False,
-                timeout=300  # 5 minute timeout
-            )
+                with span("executor", "install"):
+                    process = subprocess.run(
+                        cmd,
+                        capture_output=True,
+                        text=True,
+                        check=False,
+                        timeout=300  # 5 minute timeout
+                    )
             
-            if process.returncode == 0:
-                return {
-                    "success": True,
-                    "message": f"Installed packages: {', '.join(packages_to_install)}",
-                    "output": process.stdout
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": f"Failed to install packages: {process.stderr}",
-                    "error": process.stderr
-                }
+                if process.returncode == 0:
+                    return {
+                        "success": True,
+                        "message": f"Installed packages: {', '.join(packages_to_install)}",
+                        "output": process.stdout
+                    }
+                else:
+                    return {
+                        "success": False,
+                        "message": f"Failed to install packages: {process.stderr}",
+                        "error": process.stderr
+                    }
         except subprocess.TimeoutExpired:
             return {
                 "success": False,
@@ -302,13 +335,39 @@ class SimplePythonExecutor:
                 "error": traceback.format_exc()
             }
     
-    def execute_code(self, code: str, clear_previous_plots: bool = True) -> Dict[str, Any]:
+    def prune_plots(self, max_age_hours: float) -> int:
+        """
+        Remove execution plot folders older than max_age_hours.
+        
+        Only whole folders past the age limit are removed, so this is safe while
+        other processes are writing plots of their own executions.
+        
+        Returns:
+            Number of folders removed
+        """
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        try:
+            entries = list(os.scandir(self.plots_dir))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+    
+    def execute_code(self, code: str, clear_previous_plots: bool = False) -> Dict[str, Any]:
         """
         Execute Python code in the virtual environment or system Python.
         
         Args:
             code: Python code to execute
-            clear_previous_plots: Whether to clear all plots before execution
+            clear_previous_plots: Whether to clear all plots before execution. This
+                deletes plots of concurrent runs too, so only use it with a single user.
             
         Returns:
             Dict with execution results, including stdout, stderr, and plot paths
@@ -316,22 +375,26 @@ class SimplePythonExecutor:
         # Clear all previous plots if requested
         if clear_previous_plots:
             self.clear_plots_directory()
+        elif self.plot_retention_hours:
+            self.prune_plots(self.plot_retention_hours)
             
         python_path = self._get_python_path()
         
         # Generate a unique identifier for this execution
-        exec_id = str(uuid.uuid4())[:8]
+        exec_id = uuid.uuid4().hex[:12]
         
         # Create a temporary file to store the code
-        temp_dir = os.path.join(os.getcwd(), "temp")
-        os.makedirs(temp_dir, exist_ok=True)
+        os.makedirs(self.temp_dir, exist_ok=True)
         
-        code_file = os.path.join(temp_dir, f"code_{exec_id}.py")
+        code_file = os.path.join(self.temp_dir, f"code_{exec_id}.py")
         
         # Add code to save any matplotlib figures
         plot_dir = os.path.join(self.plots_dir, exec_id)
         os.makedirs(plot_dir, exist_ok=True)
         
+        # Figure data extraction helper, loaded by path in the subprocess
+        figure_data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "figure_data.py")
+        
         # Modify the code to automatically save generated plots
         plot_saving_code = f"""
 import matplotlib.pyplot as plt
@@ -377,6 +440,25 @@ def custom_show(*args, **kwargs):
 # Apply the custom show
 plt.show = custom_show
 
+# Write a JSON sidecar with the plotted data next to every saved figure
+# (see src/python_executor/figure_data.py), so graphs can be explained from the data
+try:
+    import importlib.util
+    from matplotlib.figure import Figure
+    _spec = importlib.util.spec_from_file_location("_figure_data", {figure_data_path!r})
+    _figure_data = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(_figure_data)
+    _original_figure_savefig = Figure.savefig
+
+    def _figure_savefig(self, fname, *args, **kwargs):
+        result = _original_figure_savefig(self, fname, *args, **kwargs)
+        _figure_data.write_sidecar(self, fname)
+        return result
+
+    Figure.savefig = _figure_savefig
+except Exception:
+    pass
+
 # At the end of script execution, print out the saved files
 def _print_saved_files():
     if saved_files:
@@ -401,17 +483,25 @@ atexit.register(_print_saved_files)
             # Add any necessary environment variables
             env['MPLCONFIGDIR'] = '/tmp/matplotlib'
             
-            process = subprocess.run(
-                [python_path, code_file],
-                capture_output=True,
-                text=True,
-                check=False,
-                env=env,
-                timeout=300  # 5 minute timeout
-            )
+            # Spawn and run are timed separately: spawn is the fork/exec, run includes
+            # the interpreter start, the imports and the user code
+            with span("executor", "spawn"):
+                process = subprocess.Popen(
+                    [python_path, code_file],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    env=env
+                )
+            with span("executor", "run"):
+                try:
+                    stdout, stderr = process.communicate(timeout=300)  # 5 minute timeout
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.communicate()
+                    raise
             
             # Parse the output to extract plot paths
-            stdout = process.stdout
             plot_paths = []
             
             # Look for the plot paths in the output
@@ -425,7 +515,7 @@ atexit.register(_print_saved_files)
             result = {
                 "success": process.returncode == 0,
                 "stdout": stdout,
-                "stderr": process.stderr,
+                "stderr": stderr,
                 "plot_paths": plot_paths,
                 "execution_id": exec_id
             }
@@ -480,11 +570,10 @@ atexit.register(_print_saved_files)
         Args:
             clear_plots: If True, also clear all plot directories
         """
-        # Clean up temp files
-        temp_dir = os.path.join(os.getcwd(), "temp")
-        if os.path.exists(temp_dir):
+        # Clean up this executor's temp files
+        if os.path.exists(self.temp_dir):
             try:
-                shutil.rmtree(temp_dir)
+                shutil.rmtree(self.temp_dir)
             except:
                 pass
         
@@ -0,0 +1,12 @@
+#src/telemetry/__init__.py
+"""
+Timing spans and metrics.
+
+Graph nodes, tool calls, executor phases and provider calls are timed with
+span()/traced(). Every span feeds the sciencebridge_span_duration_seconds
+histogram and the sciencebridge_spans_total counter, which app.main serves on
+/metrics in the Prometheus text format. With OTEL_EXPORTER_OTLP_ENDPOINT set
+(and OpenTelemetry installed), spans are also exported to that collector.
+"""
+from src.telemetry.metrics import Counter, Histogram, MetricsRegistry, registry
+from src.telemetry.tracing import configure_tracing, end_span, record_span, span, start_span, traced
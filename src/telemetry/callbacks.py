@@ -0,0 +1,42 @@
+#src/telemetry/callbacks.py
+from typing import Any, Dict
+from uuid import UUID
+import threading
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.telemetry.tracing import end_span, start_span
+
+
+class ToolSpanHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler recording a "tool" span for every tool call.
+
+    ToolNode runs parallel tool calls in worker threads, so open spans are
+    keyed by the callback run ID.
+    """
+
+    def __init__(self):
+        self._spans: Dict[UUID, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        handle = start_span("tool", name)
+        with self._lock:
+            self._spans[run_id] = handle
+
+    def _finish(self, run_id: UUID, status: str) -> None:
+        with self._lock:
+            handle = self._spans.pop(run_id, None)
+        if handle is not None:
+            end_span(handle, status)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "ok")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "error")
+
+
+tool_span_handler = ToolSpanHandler()
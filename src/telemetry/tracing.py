@@ -0,0 +1,126 @@
+#src/telemetry/tracing.py
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, Optional
+import functools
+import os
+import time
+
+from src.telemetry.metrics import registry
+
+# Optional OpenTelemetry export: set the standard OTLP endpoint, e.g. http://localhost:4318
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "sciencebridge")
+
+SPAN_DURATION = registry.histogram(
+    "sciencebridge_span_duration_seconds",
+    "Duration of traced operations (graph nodes, tool calls, executor phases, provider calls)",
+    ("kind", "span", "status")
+)
+SPAN_TOTAL = registry.counter(
+    "sciencebridge_spans_total",
+    "Number of traced operations",
+    ("kind", "span", "status")
+)
+
+_tracer = None
+
+
+def configure_tracing(endpoint: Optional[str] = OTEL_EXPORTER_OTLP_ENDPOINT, service_name: str = OTEL_SERVICE_NAME) -> bool:
+    """
+    Export spans to an OpenTelemetry collector over OTLP/HTTP.
+
+    Needs the optional opentelemetry-sdk and opentelemetry-exporter-otlp-proto-http
+    packages. Metrics are recorded either way.
+
+    Returns:
+        Whether the exporter is active
+    """
+    global _tracer
+    if not endpoint:
+        return False
+    if _tracer is not None:
+        return True
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        print("OTEL_EXPORTER_OTLP_ENDPOINT is set but OpenTelemetry is not installed; spans are not exported")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{endpoint.rstrip('/')}/v1/traces")))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("sciencebridge")
+    print(f"Exporting traces to {endpoint}")
+    return True
+
+
+def record_span(kind: str, name: str, seconds: float, status: str = "ok") -> None:
+    """Record a finished operation in the span metrics."""
+    SPAN_DURATION.observe(seconds, kind=kind, span=name, status=status)
+    SPAN_TOTAL.inc(kind=kind, span=name, status=status)
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes: Any) -> Iterator[None]:
+    """
+    Time a block as a span of the given kind ("node", "tool", "executor", "provider").
+
+    Exceptions are recorded as status="error" and re-raised.
+    """
+    started = time.perf_counter()
+    status = "ok"
+    otel_span = (
+        _tracer.start_as_current_span(f"{kind}.{name}", attributes={"kind": kind, **attributes})
+        if _tracer is not None else nullcontext()
+    )
+    with otel_span:
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            record_span(kind, name, time.perf_counter() - started, status)
+
+
+def traced(kind: str, name: str) -> Callable:
+    """
+    Decorator running a function inside span(kind, name).
+
+    The wrapper keeps the function's signature, so LangGraph still injects
+    config and store into wrapped nodes.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_span(kind: str, name: str, **attributes: Any) -> Dict[str, Any]:
+    """
+    Start a span that is finished later with end_span (for callback-style APIs).
+
+    Returns:
+        The span handle to pass to end_span
+    """
+    handle = {"kind": kind, "name": name, "started": time.perf_counter(), "otel": None}
+    if _tracer is not None:
+        handle["otel"] = _tracer.start_span(f"{kind}.{name}", attributes={"kind": kind, **attributes})
+    return handle
+
+
+def end_span(handle: Dict[str, Any], status: str = "ok") -> None:
+    """Finish a span started with start_span."""
+    record_span(handle["kind"], handle["name"], time.perf_counter() - handle["started"], status)
+    if handle["otel"] is not None:
+        if status != "ok":
+            from opentelemetry.trace import Status, StatusCode
+            handle["otel"].set_status(Status(StatusCode.ERROR))
+        handle["otel"].end()
@@ -8,6 +8,6 @@ echo "Starting Science Bridge application..."
 echo "Applying database migrations..."
 alembic upgrade head
 
-# Start the FastAPI application
-echo "Starting FastAPI server..."
-uvicorn app.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+# Start the FastAPI application (WEB_CONCURRENCY worker processes)
+echo "Starting FastAPI server with ${WEB_CONCURRENCY:-1} workers..."
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers ${WEB_CONCURRENCY:-1}